@@ -1,15 +1,30 @@
 import json
 import os
 import re
+import tempfile
+import time
+from concurrent import futures
 from datetime import timedelta
 from urllib.parse import urlparse
 
 from pipper import downloader
 from pipper import environment
+from pipper import storage
+from pipper import versioning
 from pipper.environment import Environment
 
 DELTA_REGEX = re.compile(r"(?P<number>[0-9]+)\s*(?P<unit>[a-zA-Z]+)")
 
+#: Number of packages resolved concurrently when not specified by the command.
+DEFAULT_JOBS = 8
+
+#: Name of the file within the cache directory containing authorized URLs.
+URL_CACHE_FILENAME = "authorized-urls.json"
+
+#: Fraction of their lifetime for which cached authorized URLs must remain
+#: valid in order to be reused.
+MIN_REMAINING_FRACTION = 0.5
+
 
 def to_time_delta(age: str | None) -> timedelta:
     """
@@ -56,27 +71,251 @@ def parse_url(pipper_url: str) -> dict:
     }
 
 
-def create_url(env: Environment, package_id: str) -> str:
-    """ """
-    data = downloader.parse_package_id(
-        env=env, package_id=package_id, use_latest_version=True
+def get_package_name(package_id: str) -> str:
+    """Returns the name of the package identified by a name, NAME:VERSION or URL."""
+    if "://" in package_id:
+        return versioning.parse_package_url(package_id).package_name
+    return package_id.split(":", 1)[0]
+
+
+def resolve_many(env: Environment, package_ids: list[str]) -> dict[str, dict]:
+    """
+    Resolves the package identifiers to the keys of their latest matching
+    remote versions. The versions of each distinct package are listed only
+    once, no matter how many identifiers refer to it, and the listings of
+    different packages are made concurrently.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param package_ids:
+        Identifiers of the packages to resolve. These can be package names,
+        NAME:VERSION combinations or URLs of pipper files.
+    :return:
+        A dictionary mapping the package identifiers to dictionaries with
+        the name, version and key of the resolved remote versions.
+    """
+    unstable = bool(env.args.get("unstable"))
+    resolved: dict[str, dict] = {}
+    ids_by_name: dict[str, list[str]] = {}
+    for package_id in package_ids:
+        if "://" in package_id:
+            resolved[package_id] = downloader.parse_package_id(env, package_id)
+        else:
+            ids_by_name.setdefault(get_package_name(package_id), []).append(package_id)
+
+    def resolve_package(name: str) -> dict[str, dict]:
+        available = versioning.list_versions(
+            env, name, include_prereleases=unstable, reverse=True
+        )
+        if not available:
+            raise ValueError(f'No pipper package "{name}" was found.')
+
+        results = {}
+        for package_id in ids_by_name[name]:
+            constraint = package_id.partition(":")[-1] or None
+            remote = versioning.select_latest_match(available, constraint)
+            if remote is None:
+                raise ValueError(f'No version of "{name}" matches "{constraint}".')
+            results[package_id] = {
+                "name": name,
+                "version": remote.version,
+                "key": remote.key,
+            }
+        return results
+
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        for results in executor.map(resolve_package, ids_by_name):
+            resolved.update(results)
+
+    return {package_id: resolved[package_id] for package_id in package_ids}
+
+
+def read_dependencies(env: Environment, key: str) -> list[str]:
+    """
+    Reads the dependencies of the remote pipper file from the package
+    metadata stored with it, which requires a single head request.
+    """
+    response = env.storage.head(key) or {}
+    metadata = json.loads((response.get("Metadata") or {}).get("package") or "{}")
+    return metadata.get("dependencies") or []
+
+
+def resolve_with_dependencies(
+    env: Environment, package_ids: list[str]
+) -> dict[str, dict]:
+    """
+    Resolves the package identifiers and all of their transitive pipper
+    dependencies one level of the dependency graph at a time. Each package is
+    only resolved once, at the version first requested for it. Dependencies
+    precede their dependents in the returned dictionary, which is the order in
+    which they must be installed from authorized URLs.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param package_ids:
+        Identifiers of the packages to resolve.
+    :return:
+        A dictionary mapping the package identifiers to dictionaries with
+        the name, version and key of the resolved remote versions.
+    """
+    resolved = level = resolve_many(env, package_ids)
+    requirements: dict[str, list[str]] = {}
+
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        while level:
+            names = {data["name"] for data in resolved.values()}
+            results = executor.map(
+                lambda data: (data["name"], read_dependencies(env, data["key"])),
+                level.values(),
+            )
+            dependency_ids = []
+            for name, dependencies in results:
+                requirements[name] = [get_package_name(d) for d in dependencies]
+                for package_id in dependencies:
+                    if get_package_name(package_id) not in names:
+                        names.add(get_package_name(package_id))
+                        dependency_ids.append(package_id)
+            level = resolve_many(env, dependency_ids)
+            resolved = {**resolved, **level}
+
+    ordered: dict[str, dict] = {}
+    visited: set[str] = set()
+
+    def visit(name: str):
+        if name in visited:
+            return
+        visited.add(name)
+        for dependency in requirements.get(name) or []:
+            visit(dependency)
+        ordered.update((k, d) for k, d in resolved.items() if d["name"] == name)
+
+    for data in resolved.values():
+        visit(data["name"])
+    return ordered
+
+
+def load_url_cache() -> dict:
+    """Loads the cached authorized URLs, dropping those that have expired."""
+    path = os.path.join(environment.CACHE_DIRECTORY, URL_CACHE_FILENAME)
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    now = time.time()
+    return {k: entry for k, entry in cache.items() if entry["expires"] > now}
+
+
+def save_url_cache(cache: dict):
+    """
+    Saves the authorized URLs into the cache directory. The URLs grant access
+    to the pipper files, so the file is only readable by the current user.
+    It is written to a temporary file first, which is created with those
+    permissions, and then replaces the previous cache file.
+    """
+    os.makedirs(environment.CACHE_DIRECTORY, exist_ok=True)
+    path = os.path.join(environment.CACHE_DIRECTORY, URL_CACHE_FILENAME)
+    descriptor, temp_path = tempfile.mkstemp(
+        prefix=f".{URL_CACHE_FILENAME}-", dir=environment.CACHE_DIRECTORY
     )
-    delta = to_time_delta(env.args.get("expires_in"))
+    try:
+        with os.fdopen(descriptor, "w") as f:
+            json.dump(cache, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
 
-    url = env.s3_client.generate_presigned_url(
-        ClientMethod="get_object",
-        ExpiresIn=int(delta.total_seconds()),
-        Params={"Bucket": env.bucket, "Key": data["key"]},
+
+def get_signing_identity(env: Environment) -> tuple[str, float | None]:
+    """
+    Returns the access key with which S3 URLs are signed and the time at
+    which its credentials expire, if they are temporary. URLs signed with
+    temporary credentials stop working when the credentials expire, no
+    matter how long they were meant to be valid for. Other storage backends
+    do not sign their URLs.
+    """
+    if not isinstance(env.storage, storage.S3Storage):
+        return "", None
+
+    credentials = env.aws_session.get_credentials()
+    if credentials is None:
+        return "", None
+    # Refreshable credentials, e.g. those of an assumed role, only expose
+    # their expiry through this attribute.
+    expiry = getattr(credentials, "_expiry_time", None)
+    return credentials.access_key, expiry.timestamp() if expiry else None
+
+
+def sign_many(env: Environment, keys: list[str], expires_in: int) -> dict[str, str]:
+    """
+    Creates authorized URLs for the keys. Signing is a local computation, so
+    no requests are made. When URL caching is enabled, URLs created earlier
+    for the same key and lifetime by the same access key are reused while
+    they remain valid for at least half of that lifetime. URLs signed with
+    temporary credentials are only considered valid until those expire.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param keys:
+        Keys of the pipper files to authorize.
+    :param expires_in:
+        Number of seconds the authorized URLs are valid for.
+    :return:
+        A dictionary mapping the keys to their authorized URLs.
+    """
+    use_cache = bool(env.args.get("cache_urls"))
+    cache = load_url_cache() if use_cache else {}
+    minimum_expiry = time.time() + expires_in * MIN_REMAINING_FRACTION
+    location = env.storage.location
+    access_key, credentials_expiry = (
+        get_signing_identity(env) if use_cache else ("", None)
     )
 
-    if not env.quiet:
-        print("[AUTHORIZED]: {} -> {}".format(data["name"], url))
-    return url
+    urls = {}
+    for key in keys:
+        cache_key = f"{access_key}:{location}/{key}@{expires_in}"
+        entry = cache.get(cache_key)
+        if not entry or entry["expires"] < minimum_expiry:
+            expires = time.time() + expires_in
+            entry = cache[cache_key] = {
+                "url": env.storage.presign(key, expires_in),
+                "expires": min(expires, credentials_expiry or expires),
+            }
+        urls[key] = entry["url"]
+
+    if use_cache:
+        save_url_cache(cache)
+    return urls
 
 
 def create_many_urls(env: Environment, package_ids: list) -> dict:
-    """ """
-    urls = {pid: create_url(env, pid) for pid in package_ids}
+    """
+    Creates authorized URLs for the packages, and for their transitive
+    dependencies if requested, by resolving all of them in a batch and then
+    signing them locally.
+    """
+    if env.args.get("include_dependencies"):
+        resolved = resolve_with_dependencies(env, package_ids)
+    else:
+        resolved = resolve_many(env, package_ids)
+
+    delta = to_time_delta(env.args.get("expires_in"))
+    signed = sign_many(
+        env,
+        [data["key"] for data in resolved.values()],
+        int(delta.total_seconds()),
+    )
+
+    urls = {}
+    for package_id, data in resolved.items():
+        urls[package_id] = signed[data["key"]]
+        if not env.quiet:
+            print("[AUTHORIZED]: {} -> {}".format(data["name"], urls[package_id]))
+
     save_path = env.args.get("save_path")
 
     if not save_path:
@@ -1,8 +1,11 @@
+import calendar
+import hashlib
 import json
 import os
 import pathlib
 import shutil
 import subprocess
+import sys
 import tempfile
 import time
 import zipfile
@@ -10,11 +13,302 @@ from datetime import UTC
 from datetime import datetime
 
 import toml
+from build import ProjectBuilder
 from pkginfo import Wheel
 
+from pipper import environment
 from pipper import versioning
 from pipper.environment import Environment
 
+#: Files that define how a package is built. These are always included in the
+#: source hash, even when they are ignored by version control.
+BUILD_CONFIG_FILES = (
+    "pyproject.toml",
+    "setup.py",
+    "setup.cfg",
+    "MANIFEST.in",
+    "poetry.lock",
+    "uv.lock",
+    "pipper.json",
+    "pipper.yaml",
+)
+
+#: Directories that never contribute to a build, such as build outputs, and
+#: are skipped even when version control does not ignore them. Files tracked
+#: by git are always included, e.g. those of a `pkg/build` subpackage.
+IGNORED_DIRECTORIES = (
+    ".git",
+    ".hg",
+    ".svn",
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    "__pycache__",
+    "build",
+    "dist",
+)
+
+#: Builds run in a fresh isolated environment created by the build frontend.
+BUILD_ISOLATED = "isolated"
+#: Builds run without isolation in a cached environment that is reused by all
+#: packages sharing the same build backend and build requirements.
+BUILD_CACHED = "cached"
+#: Builds run without isolation in the environment executing pipper.
+BUILD_NO_ISOLATION = "none"
+
+#: Bundle members that are already compressed and are stored as-is instead of
+#: being compressed a second time.
+STORED_EXTENSIONS = (".whl", ".zip")
+
+#: Timestamp of bundle members when SOURCE_DATE_EPOCH is not set, which is the
+#: earliest date that the zip format can represent (1980-01-01T00:00:00Z).
+DEFAULT_MEMBER_EPOCH = 315532800
+
+#: Build requirements assumed by PEP 517 for projects that do not declare any.
+DEFAULT_BUILD_REQUIRES = ["setuptools>=40.8.0"]
+
+
+def _is_ignored_directory(name: str) -> bool:
+    """Whether or not the named directory never contributes to a build."""
+    return name in IGNORED_DIRECTORIES or name.endswith(".egg-info")
+
+
+def _is_ignored_path(path: str) -> bool:
+    """Whether or not the relative path lies within an ignored directory."""
+    return any(_is_ignored_directory(part) for part in path.split("/")[:-1])
+
+
+def _list_git_files(package_directory: pathlib.Path) -> list[str] | None:
+    """
+    Lists the files in the package directory that are not ignored by git.
+    Tracked files are always listed, while untracked files are skipped when
+    they lie within directories that never contribute to a build, such as
+    build outputs that are not ignored by git. Returns None if the directory
+    is not part of a git repository or git is not available.
+    """
+    command = [
+        "git",
+        "-C",
+        str(package_directory),
+        "ls-files",
+        "-z",
+        "-t",
+        "--cached",
+        "--others",
+        "--exclude-standard",
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True)
+    except FileNotFoundError:
+        return None
+
+    if result.returncode != 0:
+        return None
+
+    # Each entry is prefixed with its status tag, which is "?" if untracked.
+    entries = [e for e in result.stdout.decode("utf-8").split("\0") if e]
+    return [
+        entry[2:]
+        for entry in entries
+        if not (entry.startswith("?") and _is_ignored_path(entry[2:]))
+    ]
+
+
+def _walk_files(package_directory: pathlib.Path) -> list[str]:
+    """
+    Lists all files in the package directory, skipping the directories that
+    never contribute to a build.
+    """
+    paths: list[str] = []
+    for root, directories, filenames in os.walk(package_directory):
+        directories[:] = [d for d in directories if not _is_ignored_directory(d)]
+        relative_root = pathlib.Path(root).relative_to(package_directory)
+        paths.extend(relative_root.joinpath(f).as_posix() for f in filenames)
+    return paths
+
+
+def list_source_files(package_directory: str) -> list[str]:
+    """
+    Lists the source files that make up the package as sorted paths relative
+    to the package directory. Version control ignores are respected when the
+    package resides within a git repository. The build configuration files are
+    always included when they exist.
+
+    :param package_directory:
+        Directory where the package being bundled resides.
+    """
+    directory = pathlib.Path(package_directory).absolute()
+    git_files = _list_git_files(directory)
+    paths = set(_walk_files(directory) if git_files is None else git_files)
+    paths.update(
+        name for name in BUILD_CONFIG_FILES if directory.joinpath(name).exists()
+    )
+    return sorted(p for p in paths if directory.joinpath(p).is_file())
+
+
+def compute_source_hash(package_directory: str) -> str:
+    """
+    Computes a sha256 content hash of the package source tree, which changes
+    whenever a source file or build configuration file is added, removed,
+    renamed or modified.
+
+    :param package_directory:
+        Directory where the package being bundled resides.
+    """
+    directory = pathlib.Path(package_directory).absolute()
+    digest = hashlib.sha256()
+    for path in list_source_files(str(directory)):
+        with open(directory.joinpath(path), "rb") as f:
+            file_digest = hashlib.file_digest(f, "sha256").digest()
+        digest.update(path.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(file_digest)
+    return digest.hexdigest()
+
+
+def _get_build_cache_directory(source_hash: str) -> pathlib.Path:
+    """
+    Returns the cache directory for wheels built from the given source hash.
+    Wheels are also keyed by interpreter because platform-specific wheels
+    built by one interpreter cannot be reused by another one.
+    """
+    return pathlib.Path(environment.CACHE_DIRECTORY).joinpath(
+        "builds", f"{source_hash}-{sys.implementation.cache_tag}"
+    )
+
+
+def _read_build_system(package_directory: str) -> dict:
+    """
+    Reads the build-system table from the pyproject.toml file in the package
+    directory, which is empty if the package does not have one.
+    """
+    path = pathlib.Path(package_directory).joinpath("pyproject.toml")
+    if not path.exists():
+        return {}
+    return toml.loads(path.read_text()).get("build-system") or {}
+
+
+def _get_environment_python(directory: pathlib.Path) -> pathlib.Path:
+    """Returns the path to the python executable in a virtual environment."""
+    if os.name == "nt":
+        return directory.joinpath("Scripts", "python.exe")
+    return directory.joinpath("bin", "python")
+
+
+def get_build_environment(package_directory: str) -> str:
+    """
+    Returns the python executable of a cached build environment containing the
+    build requirements of the specified package, creating the environment if
+    it does not exist yet. Build environments are keyed by the content of
+    the build backend and requirements along with the executing interpreter,
+    so packages that share them reuse the same environment.
+
+    :param package_directory:
+        Directory where the package being bundled resides.
+    """
+    build_system = _read_build_system(package_directory)
+    requires = sorted(build_system.get("requires") or DEFAULT_BUILD_REQUIRES)
+    key_data = {
+        "backend": build_system.get("build-backend") or "",
+        "requires": requires,
+        "python": sys.version,
+        "executable": sys.executable,
+    }
+    key = hashlib.sha256(json.dumps(key_data).encode("utf-8")).hexdigest()[:32]
+    directory = pathlib.Path(environment.CACHE_DIRECTORY).joinpath("build-envs", key)
+    python = _get_environment_python(directory)
+    marker_path = directory.joinpath("pipper-build-env.json")
+
+    if marker_path.exists():
+        print(f"[CACHED]: Reusing build environment {directory}")
+        marker = json.loads(marker_path.read_text())
+    else:
+        print(f"[CREATE]: Creating build environment {directory}")
+        # Remove the remains of an environment whose creation was interrupted.
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        command = [sys.executable, "-m", "venv", str(directory)]
+        subprocess.run(command).check_returncode()
+        _install_build_requires(python, ["build", *requires])
+        marker = {**key_data, "dynamic_requires": []}
+        marker_path.write_text(json.dumps(marker))
+
+    # Backends can require additional packages depending on the project being
+    # built, which are added to the environment when first encountered.
+    builder = ProjectBuilder(package_directory, python_executable=str(python))
+    dynamic_requires = builder.get_requires_for_build("wheel")
+    missing = sorted(set(dynamic_requires) - set(marker["dynamic_requires"]))
+    if missing:
+        _install_build_requires(python, missing)
+        marker["dynamic_requires"] = sorted([*marker["dynamic_requires"], *missing])
+        marker_path.write_text(json.dumps(marker))
+
+    return str(python)
+
+
+def _install_build_requires(python: pathlib.Path, requires: list[str]):
+    """Installs the build requirements into a cached build environment."""
+    command = [str(python), "-m", "pip", "install", "--quiet", *requires]
+    subprocess.run(command).check_returncode()
+
+
+def create_cached_wheel(
+    package_directory: str,
+    bundle_directory: str,
+    use_cache: bool = True,
+    build_environment: str = BUILD_ISOLATED,
+) -> dict:
+    """
+    Creates the wheel for the package like `create_wheel`, but reuses a
+    previously built wheel when the source hash of the package matches that
+    of an earlier build. Newly built wheels are stored in the build cache for
+    later reuse.
+
+    :param package_directory:
+        Directory where the package being bundled resides
+    :param bundle_directory:
+        Directory where the bundle is being assembled. This is where the
+        wheel file will be written.
+    :param use_cache:
+        Whether or not to reuse cached wheels. When False, the wheel is always
+        rebuilt, but the newly built wheel still replaces the cached one.
+    :param build_environment:
+        The kind of environment in which the wheel is built, which is one of
+        BUILD_ISOLATED, BUILD_CACHED or BUILD_NO_ISOLATION.
+
+    :return
+        Returns a dictionary containing distribution information about the
+        wheel package, which includes the source hash.
+    """
+    source_hash = compute_source_hash(package_directory)
+    cache_directory = _get_build_cache_directory(source_hash)
+    cached_data_path = cache_directory.joinpath("distribution.json")
+    wheel_path = os.path.join(bundle_directory, "package.whl")
+
+    if use_cache and cached_data_path.exists():
+        print(f"[CACHED]: Reusing wheel built from source hash {source_hash[:12]}")
+        shutil.copyfile(cache_directory.joinpath("package.whl"), wheel_path)
+        cached_data = json.loads(cached_data_path.read_text())
+        return {**cached_data, "wheel_path": wheel_path}
+
+    distribution_data = {
+        **create_wheel(package_directory, bundle_directory, build_environment),
+        "source_hash": source_hash,
+    }
+
+    cache_directory.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(distribution_data["wheel_path"], cache_directory / "package.whl")
+    cached_data = {k: v for k, v in distribution_data.items() if k != "wheel_path"}
+    # The data file is written last so that an interrupted copy of the wheel
+    # is never mistaken for a complete cache entry.
+    cached_data_path.write_text(json.dumps(cached_data))
+
+    return distribution_data
+
 
 def zip_bundle(
     bundle_directory: str, output_directory: str, distribution_data: dict
@@ -22,7 +316,8 @@ def zip_bundle(
     """
     Creates a pipper zip file from the temporarily stored meta data and wheel
     files and saves that zip file to the output directory location with the
-    pipper extension.
+    pipper extension. Bundles are reproducible: identical inputs produce
+    identical bytes as long as the SOURCE_DATE_EPOCH is the same.
 
     :param bundle_directory:
         The directory in which the bundle was assembled, which contains the
@@ -43,23 +338,92 @@ def zip_bundle(
     )
     zip_path = os.path.join(output_directory, filename)
 
+    # Members are written in a fixed order with fixed timestamps and
+    # permissions so that identical inputs always produce identical bundles.
+    epoch = max(get_source_date_epoch() or 0, DEFAULT_MEMBER_EPOCH)
+    date_time = time.gmtime(epoch)[:6]
+
     with zipfile.ZipFile(zip_path, mode="w") as zipper:
-        for filename in os.listdir(bundle_directory):
+        for filename in sorted(os.listdir(bundle_directory)):
             path = os.path.join(bundle_directory, filename)
-            zipper.write(path, filename)
+            info = zipfile.ZipInfo(filename, date_time=date_time)
+            info.external_attr = 0o644 << 16
+            info.compress_type = (
+                zipfile.ZIP_STORED
+                if filename.endswith(STORED_EXTENSIONS)
+                else zipfile.ZIP_DEFLATED
+            )
+            with open(path, "rb") as source, zipper.open(info, "w") as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
 
     return zip_path
 
 
+def get_source_date_epoch() -> int | None:
+    """
+    Returns the SOURCE_DATE_EPOCH timestamp used for reproducible builds if
+    one is set in the environment.
+    """
+    value = os.environ.get("SOURCE_DATE_EPOCH")
+    return int(value) if value else None
+
+
+def get_wheel_epoch(wheel_path: str | None) -> int:
+    """
+    Returns the timestamp of the most recently modified member of the wheel,
+    which is the default timestamp of bundles when SOURCE_DATE_EPOCH is not
+    set. It only depends on the contents of the wheel, so bundling the same
+    wheel again creates an identical bundle.
+
+    :param wheel_path:
+        Path to the wheel being bundled. The earliest timestamp that the zip
+        format can represent is returned if there is no wheel.
+    """
+    if not wheel_path or not os.path.exists(wheel_path):
+        return DEFAULT_MEMBER_EPOCH
+
+    with zipfile.ZipFile(wheel_path) as zipper:
+        times = [info.date_time for info in zipper.infolist()]
+    epochs = (calendar.timegm((*t, 0, 0, 0)) for t in times)
+    return max(DEFAULT_MEMBER_EPOCH, *epochs)
+
+
+def create_manifest(bundle_directory: str) -> dict:
+    """
+    Creates a manifest of the files in the bundle directory, other than the
+    metadata file itself, with the size and sha256 hash of each file.
+
+    :param bundle_directory:
+        The directory in which the bundle is being assembled.
+    """
+    manifest = {}
+    for filename in sorted(os.listdir(bundle_directory)):
+        if filename == "package.meta":
+            continue
+        with open(os.path.join(bundle_directory, filename), "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        manifest[filename] = {
+            "size": os.path.getsize(os.path.join(bundle_directory, filename)),
+            "sha256": digest,
+        }
+    return manifest
+
+
 def create_meta(
-    package_directory: str, bundle_directory: str, distribution_data: dict
+    package_directory: str | None,
+    bundle_directory: str,
+    distribution_data: dict,
+    configs_path: str | None = None,
 ) -> str:
     """
     Creates a JSON-formatted metadata file with information about the package
-    being bundled that is saved into the specified output directory.
+    being bundled that is saved into the specified output directory. The
+    metadata includes a manifest with the size and sha256 hash of every other
+    file in the bundle directory, so it must be created after those files.
 
     :param package_directory:
-        Directory where the package being bundled resides
+        Directory where the package being bundled resides, or None for a
+        prebuilt wheel, which only uses an explicit configuration file.
     :param bundle_directory:
         Directory where the bundle is being assembled. This is where the
         metadata file will be written.
@@ -67,29 +431,50 @@ def create_meta(
         Information about the package obtained during the wheel building
         process, which includes information retrieved from the setup.py
         file.
+    :param configs_path:
+        Path to a pipper.(json|yaml) configuration file to use instead of the
+        pipper.json file in the package directory.
 
     :return
         The absolute path to the created metadata file is returned.
     """
-
-    config_path = os.path.join(package_directory, "pipper.json")
-
-    try:
-        with open(config_path) as f:
-            metadata: dict = json.load(f)
-    except FileNotFoundError:
+    if configs_path:
+        if not os.path.exists(configs_path):
+            raise FileNotFoundError(f'Missing configuration file "{configs_path}"')
+        metadata: dict = environment.load_configs(configs_path)
+    elif package_directory:
+        config_path = os.path.join(package_directory, "pipper.json")
+        try:
+            with open(config_path) as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            metadata = {}
+    else:
         metadata = {}
 
+    # Bundles are reproducible, so the timestamp is never the current time.
+    epoch = get_source_date_epoch() or get_wheel_epoch(
+        distribution_data.get("wheel_path")
+    )
+    timestamp = datetime.fromtimestamp(epoch, UTC)
+
     metadata.update(
         {
             "name": distribution_data["package_name"],
             "wheel_name": distribution_data["wheel_name"],
             "version": distribution_data["version"],
             "safe_version": distribution_data["safe_version"],
-            "timestamp": datetime.now(UTC).isoformat(),
+            "timestamp": timestamp.isoformat(),
+            "manifest": create_manifest(bundle_directory),
         }
     )
 
+    if distribution_data.get("source_hash"):
+        metadata["source_hash"] = distribution_data["source_hash"]
+
+    if distribution_data.get("bytecode"):
+        metadata["bytecode"] = distribution_data["bytecode"]
+
     path = os.path.join(bundle_directory, "package.meta")
 
     with open(path, "w") as f:
@@ -98,7 +483,38 @@ def create_meta(
     return path
 
 
-def _create_setup_py_wheel(setup_path: str, bundle_directory: str) -> dict:
+def create_wheel_from_file(wheel_path: str, bundle_directory: str) -> dict:
+    """
+    Copies a prebuilt wheel into the bundle directory without invoking a
+    build backend. The package name and version are read from the wheel
+    metadata.
+
+    :param wheel_path:
+        Absolute path to the prebuilt wheel file to bundle.
+    :param bundle_directory:
+        Directory where the bundle is being assembled. This is where the
+        wheel file will be written.
+    """
+    wheel_info = Wheel(wheel_path)
+    version = wheel_info.version
+    if not version:
+        raise ValueError("Unable to extract version information from wheel.")
+
+    bundled_wheel_path = os.path.join(bundle_directory, "package.whl")
+    shutil.copyfile(wheel_path, bundled_wheel_path)
+
+    return {
+        "wheel_path": bundled_wheel_path,
+        "wheel_name": os.path.basename(wheel_path),
+        "package_name": wheel_info.name,
+        "version": version,
+        "safe_version": versioning.serialize(version),
+    }
+
+
+def _create_setup_py_wheel(
+    setup_path: str, bundle_directory: str, build_environment: str = BUILD_ISOLATED
+) -> dict:
     """
     Creates a wheel for a setup.py-based package definition.
 
@@ -106,15 +522,25 @@ def _create_setup_py_wheel(setup_path: str, bundle_directory: str) -> dict:
         Absolute path to the setup.py file from which to create a wheel.
     :param bundle_directory:
         Directory where bundling into a wheel should be carried out.
+    :param build_environment:
+        The kind of environment in which the wheel is built.
     """
     package_directory = pathlib.Path(setup_path).parent.absolute()
     dist_directory = package_directory.joinpath("dist")
 
+    python = (
+        get_build_environment(str(package_directory))
+        if build_environment == BUILD_CACHED
+        else "python"
+    )
+
     starting_directory = pathlib.Path(".").absolute()
     os.chdir(str(package_directory))
 
     # Use python -m build instead of deprecated run_setup
-    command = ["python", "-m", "build", "--wheel", "--outdir", str(dist_directory)]
+    command = [python, "-m", "build", "--wheel", "--outdir", str(dist_directory)]
+    if build_environment != BUILD_ISOLATED:
+        command.append("--no-isolation")
     result = subprocess.run(command)
     os.chdir(str(starting_directory))
     result.check_returncode()
@@ -198,21 +624,34 @@ def _create_poetry_wheel(package_directory: str, bundle_directory: str) -> dict:
     }
 
 
-def _create_uv_wheel(package_directory: str, bundle_directory: str) -> dict:
+def _create_uv_wheel(
+    package_directory: str,
+    bundle_directory: str,
+    build_environment: str = BUILD_ISOLATED,
+) -> dict:
     """
-    Creates a wheel for a uv-based package definition.
+    Creates a wheel for a uv-based package definition. Isolated uv builds
+    already reuse build requirements from the uv cache.
 
     :param package_directory:
         Absolute path to directory in which the uv package is defined.
     :param bundle_directory:
         Directory where bundling into a wheel should be carried out.
+    :param build_environment:
+        The kind of environment in which the wheel is built.
     """
     directory = pathlib.Path(package_directory).absolute()
     dist_directory = directory.joinpath("dist")
 
+    command = ["uv", "build", "--wheel"]
+    if build_environment == BUILD_CACHED:
+        python = get_build_environment(str(directory))
+        command += ["--no-build-isolation", "--python", python]
+    elif build_environment == BUILD_NO_ISOLATION:
+        command += ["--no-build-isolation", "--python", sys.executable]
+
     starting_directory = pathlib.Path(".").absolute()
     os.chdir(package_directory)
-    command = ["uv", "build", "--wheel"]
 
     result = subprocess.run(command)
     os.chdir(starting_directory)
@@ -241,7 +680,11 @@ def _create_uv_wheel(package_directory: str, bundle_directory: str) -> dict:
     }
 
 
-def create_wheel(package_directory: str, bundle_directory: str) -> dict:
+def create_wheel(
+    package_directory: str,
+    bundle_directory: str,
+    build_environment: str = BUILD_ISOLATED,
+) -> dict:
     """
     Creates a universally wheel distribution of the specified package and
     saves that to the bundle directory.
@@ -251,6 +694,10 @@ def create_wheel(package_directory: str, bundle_directory: str) -> dict:
     :param bundle_directory:
         Directory where the bundle is being assembled. This is where the
         wheel file will be written.
+    :param build_environment:
+        The kind of environment in which the wheel is built, which is one of
+        BUILD_ISOLATED, BUILD_CACHED or BUILD_NO_ISOLATION. Poetry builds
+        ignore this because poetry does not build in an isolated environment.
 
     :return
         Returns a dictionary containing distribution information about the
@@ -262,7 +709,9 @@ def create_wheel(package_directory: str, bundle_directory: str) -> dict:
     if setup_path.exists():
         # Assumes that "setup.py" must at least exist even if using setuptools
         # with a pyproject.toml + setup.cfg configuration.
-        return _create_setup_py_wheel(str(setup_path), bundle_directory)
+        return _create_setup_py_wheel(
+            str(setup_path), bundle_directory, build_environment
+        )
 
     pyproject_path = directory.joinpath("pyproject.toml")
     if pyproject_path.exists():
@@ -274,24 +723,245 @@ def create_wheel(package_directory: str, bundle_directory: str) -> dict:
             return _create_poetry_wheel(package_directory, bundle_directory)
         else:
             # Use uv for other PEP 517 backends (hatchling, flit, setuptools, etc.)
-            return _create_uv_wheel(package_directory, bundle_directory)
+            return _create_uv_wheel(
+                package_directory, bundle_directory, build_environment
+            )
 
     raise FileNotFoundError(
         f'No package configuration file found in "{package_directory}"'
     )
 
 
+def normalize_python_version(python_version: str) -> str:
+    """
+    Normalizes a python version such as "3.12", "312" or "cp312" into the
+    "MAJOR.MINOR" form.
+    """
+    version = python_version.lower().removeprefix("cp").removeprefix("py")
+    if "." not in version and len(version) > 1:
+        version = f"{version[0]}.{version[1:]}"
+    major, minor = version.split(".")[:2]
+    return f"{int(major)}.{int(minor)}"
+
+
+def find_interpreter(python_version: str) -> str:
+    """
+    Finds the python executable for the specified "MAJOR.MINOR" version, which
+    is the executing interpreter if it matches or otherwise a "pythonX.Y"
+    executable on the path.
+    """
+    if python_version == "{}.{}".format(*sys.version_info[:2]):
+        return sys.executable
+
+    interpreter = shutil.which(f"python{python_version}")
+    if interpreter is None:
+        raise FileNotFoundError(f"No python {python_version} interpreter was found.")
+    return interpreter
+
+
+def create_bytecode_overlay(
+    wheel_path: str, bundle_directory: str, python_version: str
+) -> tuple[str, str]:
+    """
+    Compiles the python files in the wheel with the specified interpreter
+    version and saves the resulting __pycache__ files into an overlay zip file
+    in the bundle directory. The bytecode uses checked-hash invalidation so
+    that it remains valid regardless of the modified times of the installed
+    source files.
+
+    :param wheel_path:
+        Path to the wheel file for which to create the bytecode overlay.
+    :param bundle_directory:
+        Directory where the bundle is being assembled. This is where the
+        overlay file will be written.
+    :param python_version:
+        The python version, e.g. "3.12", for which to compile the bytecode.
+
+    :return
+        The interpreter cache tag, e.g. "cpython-312", and the filename of the
+        overlay file within the bundle directory.
+    """
+    interpreter = find_interpreter(normalize_python_version(python_version))
+    cache_tag = subprocess.run(
+        [interpreter, "-c", "import sys; print(sys.implementation.cache_tag)"],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.strip()
+
+    directory = pathlib.Path(tempfile.mkdtemp(prefix="pipper-bytecode-"))
+    try:
+        with zipfile.ZipFile(wheel_path) as zipper:
+            zipper.extractall(directory)
+
+        command = [
+            interpreter,
+            "-m",
+            "compileall",
+            "-q",
+            "-j",
+            "0",
+            "--invalidation-mode",
+            "checked-hash",
+            str(directory),
+        ]
+        subprocess.run(command).check_returncode()
+
+        # Files in the wheel .data directory are installed outside of the
+        # package root and are excluded from the overlay.
+        paths = sorted(
+            path.relative_to(directory).as_posix()
+            for path in directory.rglob("__pycache__/*.pyc")
+            if not path.relative_to(directory).parts[0].endswith(".data")
+        )
+
+        filename = f"bytecode.{cache_tag}.zip"
+        date_time = time.gmtime(DEFAULT_MEMBER_EPOCH)[:6]
+        with zipfile.ZipFile(
+            os.path.join(bundle_directory, filename), "w", zipfile.ZIP_DEFLATED
+        ) as zipper:
+            for path in paths:
+                info = zipfile.ZipInfo(path, date_time=date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                zipper.writestr(info, directory.joinpath(path).read_bytes())
+    finally:
+        shutil.rmtree(directory)
+
+    return cache_tag, filename
+
+
+def add_bytecode_overlays(
+    distribution_data: dict, bundle_directory: str, python_versions: list[str]
+) -> dict:
+    """
+    Creates bytecode overlays for each of the specified python versions and
+    adds them to the distribution data as a "bytecode" mapping of interpreter
+    cache tags to overlay filenames.
+    """
+    overlays = dict(
+        create_bytecode_overlay(
+            distribution_data["wheel_path"], bundle_directory, version
+        )
+        for version in python_versions
+    )
+    for cache_tag in overlays:
+        print(f"[PRECOMPILED]: Added {cache_tag} bytecode overlay")
+    return {**distribution_data, "bytecode": overlays}
+
+
+def bundle_wheel_file(
+    wheel_path: str,
+    save_directory: str,
+    configs_path: str | None = None,
+    precompile: list[str] | None = None,
+) -> str:
+    """
+    Creates a pipper bundle from a prebuilt wheel file and saves it in the
+    specified directory.
+
+    :param wheel_path:
+        Absolute path to the prebuilt wheel file to bundle.
+    :param save_directory:
+        The directory where the pipper bundle will be saved.
+    :param configs_path:
+        Path to a pipper.(json|yaml) configuration file to include in the
+        bundle metadata. No configuration is included if not specified.
+    :param precompile:
+        Python versions for which to add precompiled bytecode overlays.
+
+    :return
+        Returns the absolute path to the created pipper bundle.
+    """
+    bundle_directory = tempfile.mkdtemp(prefix="pipper-bundle-")
+
+    try:
+        print(f"[COMPILE]: Using prebuilt wheel {os.path.basename(wheel_path)}")
+        distribution_data = create_wheel_from_file(wheel_path, bundle_directory)
+        if precompile:
+            distribution_data = add_bytecode_overlays(
+                distribution_data, bundle_directory, precompile
+            )
+        print("[COLLECT]: Creating package metadata")
+        create_meta(None, bundle_directory, distribution_data, configs_path)
+        print("[ASSEMBLE]: Creating pipper package bundle")
+        path = zip_bundle(bundle_directory, save_directory, distribution_data)
+        print("[BUNDLED]:", path)
+        return path
+    except Exception:
+        raise
+    finally:
+        shutil.rmtree(bundle_directory)
+
+
+def bundle_wheels(env: Environment) -> list[str]:
+    """
+    Executes the bundling process on a prebuilt wheel file, or on every wheel
+    file within a directory of prebuilt wheels.
+
+    :param env:
+        Environment configuration in which this command is being executed
+
+    :return
+        The paths of the created pipper bundles.
+    """
+    wheel_path = os.path.realpath(env.args["wheel_path"])
+    output_directory = env.args.get("output_directory")
+
+    if os.path.isdir(wheel_path):
+        wheel_paths = [
+            os.path.join(wheel_path, filename)
+            for filename in sorted(os.listdir(wheel_path))
+            if filename.endswith(".whl")
+        ]
+        default_directory = wheel_path
+    elif os.path.isfile(wheel_path):
+        wheel_paths = [wheel_path]
+        default_directory = os.path.dirname(wheel_path)
+    else:
+        raise FileNotFoundError(f'No such wheel file or directory "{wheel_path}"')
+
+    if not wheel_paths:
+        raise FileNotFoundError(f'No wheel files found in "{wheel_path}"')
+
+    # A configuration, and the dependencies in it, belongs to a single package.
+    configs_path = env.args.get("configs_path")
+    if configs_path and len(wheel_paths) > 1:
+        raise ValueError(
+            f"A configuration file cannot be applied to the {len(wheel_paths)} "
+            f'wheels in "{wheel_path}". Bundle them one at a time instead.'
+        )
+
+    save_directory = (
+        os.path.realpath(output_directory) if output_directory else default_directory
+    )
+    return [
+        bundle_wheel_file(
+            path,
+            save_directory,
+            configs_path,
+            env.args.get("precompile"),
+        )
+        for path in wheel_paths
+    ]
+
+
 def run(env: Environment):
     """
     Executes the bundling process on the specified package directory and saves
-    the pipper bundle file in the specified output directory.
+    the pipper bundle file in the specified output directory. If a prebuilt
+    wheel is specified instead, the wheel is bundled directly without building
+    the package.
 
     :param env:
         Environment configuration in which this command is being executed
     """
+    if env.args.get("wheel_path"):
+        return bundle_wheels(env)
 
     package_directory = env.args.get("package_directory") or "."
     output_directory = env.args.get("output_directory")
+    use_cache = not env.args.get("no_cache")
+    build_environment = env.args.get("build_environment") or BUILD_ISOLATED
 
     directory = os.path.realpath(package_directory)
     if not os.path.exists(directory):
@@ -305,9 +975,20 @@ def run(env: Environment):
 
     try:
         print("[COMPILE]: Creating universal wheel")
-        distribution_data = create_wheel(directory, bundle_directory)
+        distribution_data = create_cached_wheel(
+            directory, bundle_directory, use_cache, build_environment
+        )
+        if env.args.get("precompile"):
+            distribution_data = add_bytecode_overlays(
+                distribution_data, bundle_directory, env.args["precompile"]
+            )
         print("[COLLECT]: Creating package metadata")
-        create_meta(directory, bundle_directory, distribution_data)
+        create_meta(
+            directory,
+            bundle_directory,
+            distribution_data,
+            env.args.get("configs_path"),
+        )
         print("[ASSEMBLE]: Creating pipper package bundle")
         path = zip_bundle(bundle_directory, save_directory, distribution_data)
         print("[BUNDLED]:", path)
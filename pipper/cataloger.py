@@ -0,0 +1,157 @@
+import json
+import typing
+from concurrent import futures
+
+from pipper import indexer
+from pipper import storage
+from pipper import versioning
+from pipper.environment import Environment
+
+#: Number of packages summarized concurrently when not specified by the command.
+DEFAULT_JOBS = 16
+
+#: Columns of the catalog table with their widths and the summary fields
+#: they display.
+SUMMARY_COLUMNS = [
+    ("Package", 40, "name"),
+    ("Versions", 10, "versions"),
+    ("Latest", 20, "latest"),
+    ("Size", 14, "size"),
+    ("Last Published", 0, "last_published"),
+]
+
+
+def iter_packages(env: Environment) -> typing.Iterator[tuple[str, str]]:
+    """
+    Iterates over the packages in the repository with delimited listings of
+    its root prefix that do not enumerate the pipper files themselves. The
+    shard prefixes of sharded repositories are listed concurrently. Packages
+    are yielded as they are listed, so that they can be processed before the
+    listing is complete.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :return:
+        Pairs of the package names and the key prefixes containing their
+        pipper files.
+    """
+    backend = env.storage
+    root = f"{env.root_prefix}/"
+    names: set[str] = set()
+    shards: list[str] = []
+
+    def packages_in(prefixes: typing.Iterable[str], parent: str):
+        for prefix in prefixes:
+            name = prefix[len(parent) : -1]
+            if name not in names:
+                names.add(name)
+                yield name, prefix
+
+    for prefix in backend.list_prefixes(root):
+        segment = prefix[len(root) : -1]
+        if versioning.layout.is_shard(segment):
+            shards.append(prefix)
+        elif segment != indexer.INDEX_DIRECTORY:
+            yield from packages_in([prefix], root)
+
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        listings = executor.map(lambda p: list(backend.list_prefixes(p)), shards)
+        for shard, prefixes in zip(shards, listings, strict=True):
+            yield from packages_in(prefixes, shard)
+
+
+def summarize(backend: storage.Storage, name: str, prefix: str) -> dict:
+    """
+    Summarizes the versions of the package with a single listing of its
+    pipper files.
+
+    :param backend:
+        Storage backend of the repository.
+    :param name:
+        Name of the package.
+    :param prefix:
+        Key prefix containing the pipper files of the package.
+    :return:
+        The number of versions, the latest version, the total size in bytes
+        and the last publish time of the package.
+    """
+    entries = [e for e in backend.list_objects(prefix) if e["Key"].endswith(".pipper")]
+    remotes = sorted(versioning.RemoteVersion("", e["Key"]) for e in entries)
+    releases = [r for r in remotes if not r.is_prerelease] or remotes
+    published = max((e["LastModified"] for e in entries), default=None)
+    return {
+        "name": name,
+        "versions": len(entries),
+        "latest": releases[-1].version if releases else None,
+        "size": sum(e["Size"] for e in entries),
+        "last_published": published.isoformat() if published else None,
+    }
+
+
+def iter_summaries(
+    env: Environment, packages: typing.Iterable[tuple[str, str]]
+) -> typing.Iterator[dict]:
+    """
+    Summarizes the packages concurrently as they are listed and yields the
+    summaries in the order in which they complete. Only a limited number of
+    summaries are pending at any time, so that the memory used does not grow
+    with the size of the repository.
+    """
+    backend = env.storage
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending: set[futures.Future] = set()
+        for name, prefix in packages:
+            pending.add(executor.submit(summarize, backend, name, prefix))
+            if len(pending) >= 2 * jobs:
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                yield from (future.result() for future in done)
+
+        for future in futures.as_completed(pending):
+            yield future.result()
+
+
+def format_row(values: list[str]) -> str:
+    """Formats the values as a row of the catalog table."""
+    return "".join(
+        str(value).ljust(width) if width else str(value)
+        for value, (_, width, _) in zip(values, SUMMARY_COLUMNS, strict=True)
+    )
+
+
+def catalog(env: Environment) -> int:
+    """
+    Lists the packages in the repository and, if requested, summaries of
+    their versions. Results are printed as they arrive, as a table or as
+    JSON lines, instead of after the whole repository has been listed.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :return:
+        The number of packages in the repository.
+    """
+    as_json = env.args.get("json")
+    packages = iter_packages(env)
+    count = 0
+
+    if not env.args.get("summary"):
+        for name, _ in packages:
+            count += 1
+            print(json.dumps({"name": name}) if as_json else name, flush=True)
+        return count
+
+    if not as_json:
+        print(format_row([title for title, _, _ in SUMMARY_COLUMNS]), flush=True)
+
+    for summary in iter_summaries(env, packages):
+        count += 1
+        if as_json:
+            print(json.dumps(summary), flush=True)
+        else:
+            values = [summary[field] or "-" for _, _, field in SUMMARY_COLUMNS]
+            print(format_row(values), flush=True)
+
+    return count
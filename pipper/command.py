@@ -7,8 +7,11 @@ from pipper import downloader
 from pipper import info
 from pipper import installer
 from pipper import parser
+from pipper import proxy
 from pipper import publisher
 from pipper import repository
+from pipper import s3
+from pipper import tracing
 from pipper.environment import Environment
 
 ACTIONS = {
@@ -18,6 +21,8 @@ ACTIONS = {
     "bundle": bundler.run,
     "publish": publisher.run,
     "info": info.run,
+    "outdated": info.run_outdated,
+    "proxy": proxy.run,
     "repository": repository.run,
 }
 
@@ -30,10 +35,47 @@ def show_version(env: Environment):
         print(f"Version: {pipper.__version__}")
 
 
+def show_request_report(env: Environment):
+    """
+    Shows how many S3 requests were hedged, abandoned at their deadline or
+    rate limited during the command, if any.
+    """
+    counters = {
+        name: count
+        for name, count in sorted(s3.get_counters().items())
+        if name.endswith((".hedged", ".hedge_won", ".timeout", ".rate_limited"))
+    }
+    if counters and not env.quiet:
+        report = ", ".join(f"{name}={count}" for name, count in counters.items())
+        print(f"[REQUESTS]: {report}")
+
+
+def show_timings(env: Environment):
+    """
+    Shows the timing spans recorded during the command and writes them to the
+    trace output file when one was specified.
+    """
+    if not tracing.is_enabled():
+        return
+
+    if env.args.get("timings"):
+        print(f"[TIMINGS]:\n{tracing.format_summary()}")
+
+    if env.args.get("trace_out"):
+        path = tracing.write_trace(env.args["trace_out"])
+        print(f"[TRACE]: {path}")
+
+    tracing.disable()
+
+
 def run(cli_args: list | None = None):
     """Executes the command based on command line arguments."""
     args = parser.parse(cli_args)
-    env = Environment(args)
+    if args.get("timings") or args.get("trace_out"):
+        tracing.enable()
+
+    with tracing.span("environment"):
+        env = Environment(args)
 
     if args.get("version"):
         show_version(env)
@@ -46,14 +88,20 @@ def run(cli_args: list | None = None):
         args["parser"].print_help()
         raise ValueError(message)
 
-    if not env.quiet:
+    # Headers are left out of output that is parsed by scripts.
+    show_headers = not (env.quiet or env.args.get("json"))
+    if show_headers:
         print(f"\n\n=== {env.action.upper()} ===\n")
 
     try:
-        action(env)
+        with tracing.span(env.action):
+            action(env)
     except Exception as err:
         print(f"[ERROR]: Unable to complete action. {err}\n")
         raise
+    finally:
+        show_request_report(env)
+        show_timings(env)
 
-    if not env.quiet:
+    if show_headers:
         print("\n")
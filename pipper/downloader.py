@@ -1,17 +1,26 @@
+import hashlib
 import json
 import os
 import shutil
 import zipfile
 from contextlib import closing
+from urllib.parse import urlparse
 
 import requests
 
 from pipper import environment
+from pipper import storage
+from pipper import tracing
 from pipper import versioning
+from pipper import wheelhouse
 from pipper import wrapper
 from pipper.environment import Environment
 
+#: Size in bytes of the chunks in which unsigned downloads are written.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
+
+@tracing.traced("resolve")
 def parse_package_id(
     env: Environment,
     package_id: str,
@@ -45,7 +54,7 @@ def parse_package_id(
             - key: S3 key for the remote pipper file where the specified
                     package name and version reside
     """
-    if package_id.startswith("https://"):
+    if package_id.startswith(("https://", storage.LOCAL_SCHEME)):
         r = versioning.parse_package_url(package_id)
         return {
             "url": r.url,
@@ -61,17 +70,26 @@ def parse_package_id(
     upgrade = use_latest_version or env.args.get("upgrade")
     unstable = include_prereleases or env.args.get("unstable")
 
+    # Keys of the listed remote versions, which can differ from the computed
+    # keys for packages not yet migrated to the sharded layout.
+    remote_keys: dict[str, str] = {}
+
+    def find_remote_version(constraint: str | None = None) -> str:
+        remote = versioning.find_latest_match(
+            env, name, constraint, include_prereleases=bool(unstable)
+        )
+        if remote is None:
+            raise ValueError(f'No version of "{name}" matches "{constraint}"')
+        remote_keys[remote.version] = remote.key
+        return remote.version
+
     def possible_versions():
         if len(package_parts) > 1:
-            yield versioning.find_latest_match(
-                env, *package_parts, include_prereleases=unstable
-            ).version
+            yield find_remote_version(package_parts[1])
         if not upgrade:
             existing = wrapper.status(env, name)
             yield existing.version if existing else None
-        yield versioning.find_latest_match(
-            env, name, include_prereleases=unstable
-        ).version
+        yield find_remote_version()
 
     try:
         version = next(v for v in possible_versions() if v is not None)
@@ -85,12 +103,19 @@ def parse_package_id(
         "name": name,
         "version": version,
         "bucket": env.bucket,
-        "key": versioning.make_s3_key(name, version, env.root_prefix),
+        "key": remote_keys.get(version)
+        or versioning.make_s3_key(name, version, env.root_prefix, env.sharded),
     }
 
 
+@tracing.traced("download")
 def save(url: str, local_path: str) -> str:
     """..."""
+    if storage.is_local(url):
+        shutil.copyfile(urlparse(url).path, local_path)
+        tracing.add_file_size(local_path)
+        return local_path
+
     with closing(requests.get(url, stream=True)) as response:
         if response.status_code != 200:
             print(
@@ -104,9 +129,83 @@ def save(url: str, local_path: str) -> str:
                 f.flush()
                 os.fsync(f.fileno())
 
+    tracing.add_file_size(local_path)
     return local_path
 
 
+def save_unsigned(url: str, local_path: str) -> bool:
+    """
+    Downloads the file with an unsigned GET request, e.g. from a CDN or a
+    publicly readable endpoint in front of the repository bucket.
+
+    :param url:
+        URL of the file to download.
+    :param local_path:
+        Local path where the downloaded file will be saved.
+    :return:
+        Whether or not the file was downloaded.
+    """
+    try:
+        with closing(requests.get(url, stream=True, timeout=30)) as response:
+            response.raise_for_status()
+            with open(local_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+    except (OSError, requests.RequestException) as error:
+        print(f"[WARNING]: Unable to download {url}. {error}")
+        return False
+    return True
+
+
+@tracing.traced("download")
+def fetch_bundle(env: Environment, key: str, local_path: str) -> bool:
+    """
+    Downloads a pipper bundle from the repository. When the repository has a
+    download base URL, the bundle is first fetched from it with an unsigned
+    GET request, which avoids S3 API calls entirely, before falling back to
+    the repository storage.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param key:
+        The key of the pipper bundle in the repository.
+    :param local_path:
+        Local path where the downloaded bundle will be saved.
+    :return:
+        Whether or not the bundle exists and was downloaded.
+    """
+    base_url = env.download_base_url
+    tracing.annotate(key=key)
+    if base_url and save_unsigned(f"{base_url.rstrip('/')}/{key}", local_path):
+        tracing.add_file_size(local_path)
+        return True
+
+    if not env.storage.exists(key):
+        return False
+
+    env.storage.get(key, local_path)
+    tracing.add_file_size(local_path)
+    return True
+
+
+def verify_file(path: str, expected: dict):
+    """
+    Verifies that the file at the specified path matches the size and sha256
+    hash recorded for it in a pipper bundle manifest.
+
+    :param path:
+        Path of the file extracted from a pipper bundle.
+    :param expected:
+        The manifest entry for the file, containing its size and sha256 hash.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+
+    if os.path.getsize(path) != expected["size"] or digest != expected["sha256"]:
+        raise ValueError(f'Extracted file "{path}" does not match the bundle manifest.')
+
+
+@tracing.traced("extract")
 def extract_pipper_file(
     local_bundle_path: str, extract_directory: str | None = None
 ) -> dict:
@@ -130,6 +229,10 @@ def extract_pipper_file(
         zipper.extract("package.whl", directory)
         shutil.move(os.path.join(directory, "package.whl"), wheel_path)
 
+    expected = (metadata.get("manifest") or {}).get("package.whl")
+    if expected:
+        verify_file(wheel_path, expected)
+
     return {
         "meta_path": metadata_path,
         "wheel_path": wheel_path,
@@ -149,9 +252,11 @@ def download_package(env: Environment, package_id: str) -> str:
 
     if "url" in data:
         save(package_id, path)
-    else:
-        env.s3_client.download_file(
-            Bucket=data["bucket"], Key=data["key"], Filename=path
+    elif not fetch_bundle(env, data["key"], path):
+        raise FileNotFoundError(
+            'Version {} not available for "{}" package'.format(
+                data["version"], data["name"]
+            )
         )
 
     print("[DOWNLOADED]: {} -> {}".format(data["name"], path))
@@ -177,6 +282,9 @@ def download_from_configs(env: Environment, configs_path: str | None = None) ->
 
 def run(env: Environment):
     """..."""
+    if env.args.get("wheelhouse"):
+        return wheelhouse.export(env)
+
     package_ids = env.args.get("packages")
     if not package_ids:
         return download_from_configs(env, env.args.get("configs_path"))
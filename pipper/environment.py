@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 import pathlib
@@ -8,11 +9,16 @@ from botocore.client import BaseClient
 from botocore.credentials import Credentials
 
 from pipper import s3
+from pipper import storage
 
 REPOSITORY_CONFIGS_PATH = os.path.join(
     os.path.expanduser("~"), ".pipper", "repositories.json"
 )
 
+CACHE_DIRECTORY = os.environ.get("PIPPER_CACHE_DIRECTORY") or os.path.join(
+    os.path.expanduser("~"), ".pipper", "cache"
+)
+
 
 class Environment:
     def __init__(self, args: dict | None = None):
@@ -21,7 +27,32 @@ class Environment:
         default_repository = load_repository(None, True)
         self.repository = repository or default_repository
         self.aws_session = get_session(self.args, repository, default_repository)
-        self.s3_client: BaseClient = self.aws_session.client("s3")
+        s3.configure(
+            deadlines=s3.parse_deadlines(self.args.get("request_deadlines")),
+            hedge=bool(self.args.get("hedge")),
+            hedge_quantile=self.args.get("hedge_quantile") or s3.DEFAULT_HEDGE_QUANTILE,
+            rate_limit=self._get_number("rate_limit"),
+            burst=self._get_number("burst"),
+            start_jitter=self._get_number("start_jitter") or 0.0,
+        )
+        self.s3_client: BaseClient = self.aws_session.client(
+            "s3",
+            config=s3.CLIENT_CONFIG,
+            endpoint_url=self.endpoint_url,
+            region_name=self.region,
+        )
+        #: Times at which the legacy key prefixes of packages in a sharded
+        #: repository were found empty, by package name.
+        self.empty_legacy_listings: dict[str, float] = {}
+
+    @functools.cached_property
+    def storage(self) -> storage.Storage:
+        """
+        The storage backend of the repository, which is determined by the
+        bucket being either an S3 bucket name or a file:// URL of a local
+        directory.
+        """
+        return storage.create_storage(self.bucket, self.s3_client)
 
     @property
     def target_directory(self) -> pathlib.Path | None:
@@ -41,6 +72,49 @@ class Environment:
     def bucket(self) -> str:
         return self.args.get("bucket") or self.repository["bucket"]
 
+    @property
+    def endpoint_url(self) -> str | None:
+        """
+        Custom S3 endpoint URL for repositories hosted by an S3-compatible
+        service such as MinIO.
+        """
+        return self.args.get("endpoint_url") or self.repository.get("endpoint_url")
+
+    @property
+    def region(self) -> str | None:
+        """AWS region of the repository bucket, which avoids redirected requests."""
+        return self.args.get("region") or self.repository.get("region")
+
+    @property
+    def download_base_url(self) -> str | None:
+        """
+        Read-only base URL, e.g. of a CloudFront distribution or a regional or
+        VPC endpoint, from which pipper bundles are downloaded by their keys
+        with unsigned requests instead of through the S3 API.
+        """
+        return self.args.get("download_base_url") or self.repository.get(
+            "download_base_url"
+        )
+
+    def _get_number(self, name: str) -> float | None:
+        """
+        Returns the numeric setting from the command arguments or, if not
+        specified there, from the repository configuration.
+        """
+        value = self.args.get(name)
+        value = self.repository.get(name) if value is None else value
+        return None if value is None else float(value)
+
+    @property
+    def sharded(self) -> bool:
+        """
+        Whether or not the repository uses the sharded key layout, which adds
+        a hash shard segment before the package name to spread the request
+        rate of the repository over many key prefixes.
+        """
+        layout = self.args.get("layout") or self.repository.get("layout")
+        return layout == "sharded"
+
     @property
     def root_prefix(self) -> str:
         return (
@@ -172,6 +246,10 @@ def get_session(
     session = next(s for s in generate_session() if s is not None)
     credentials: Credentials = session.get_credentials()
 
+    # The credentials are not reported when the output is parsed by scripts.
+    if args.get("quiet") or args.get("json"):
+        return session
+
     access_key = getattr(credentials, "access_key", None)
     secret = getattr(credentials, "secret_key", "NONE")[:8]
     token = getattr(credentials, "token", None)
@@ -0,0 +1,316 @@
+import hashlib
+import html
+import json
+import os
+import re
+import tempfile
+import zipfile
+from concurrent import futures
+
+from pipper import storage
+from pipper.environment import Environment
+
+#: Directory within the root prefix of the repository containing the index.
+#: Package names start with a letter or digit and shard segments are an
+#: underscore followed by two hexadecimal characters, so the index never
+#: shares its key prefix with the pipper files of a package.
+INDEX_DIRECTORY = "_simple"
+
+#: Name of the file within the index directory that records which pipper files
+#: have been indexed, so that the index can be updated incrementally.
+STATE_FILENAME = "pipper-index.json"
+
+#: Number of pipper files indexed concurrently when not specified by the command.
+DEFAULT_JOBS = 8
+
+HTML_CONTENT_TYPE = "text/html"
+JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+WHEEL_CONTENT_TYPE = "application/octet-stream"
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes a project name as specified by PEP 503."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def get_index_prefix(env: Environment) -> str:
+    """Returns the key prefix of the index within the repository."""
+    return f"{env.root_prefix}/{INDEX_DIRECTORY}"
+
+
+def load_state(backend: storage.Storage, index_prefix: str) -> dict:
+    """
+    Loads the indexing state of the repository, which maps the keys of the
+    indexed pipper files to their ETags and the wheels extracted from them.
+    """
+    key = f"{index_prefix}/{STATE_FILENAME}"
+    with tempfile.TemporaryDirectory(prefix="pipper-index-") as directory:
+        path = os.path.join(directory, STATE_FILENAME)
+        if not backend.exists(key):
+            return {}
+        backend.get(key, path)
+        with open(path) as f:
+            return json.load(f)
+
+
+def put_text(
+    backend: storage.Storage,
+    key: str,
+    text: str,
+    content_type: str,
+    acl: str | None = None,
+):
+    """Uploads the text as the object with the given content type and ACL."""
+    with tempfile.TemporaryDirectory(prefix="pipper-index-") as directory:
+        path = os.path.join(directory, "page")
+        with open(path, "w") as f:
+            f.write(text)
+        backend.put(key, path, {}, acl=acl, content_type=content_type)
+
+
+def index_bundle(
+    backend: storage.Storage,
+    index_prefix: str,
+    key: str,
+    etag: str,
+    local_path: str | None = None,
+    acl: str | None = None,
+) -> dict:
+    """
+    Extracts the wheel from the pipper file and uploads it into the index
+    directory of its project.
+
+    :param backend:
+        Storage backend of the repository.
+    :param index_prefix:
+        Key prefix of the index within the repository.
+    :param key:
+        Key of the pipper file to index.
+    :param etag:
+        ETag of the pipper file, which is recorded to detect changes to it.
+    :param local_path:
+        Path of a local copy of the pipper file, e.g. one that was just
+        published, which avoids downloading it again.
+    :param acl:
+        Canned ACL of the uploaded wheel, which is private if not specified.
+    :return:
+        The indexing state entry of the pipper file.
+    """
+    with tempfile.TemporaryDirectory(prefix="pipper-index-") as directory:
+        bundle_path = local_path or os.path.join(directory, "package.pipper")
+        if not local_path:
+            backend.get(key, bundle_path)
+
+        with zipfile.ZipFile(bundle_path) as zipper:
+            metadata = json.loads(zipper.read("package.meta"))
+            wheel_path = zipper.extract("package.whl", directory)
+
+        with open(wheel_path, "rb") as f:
+            sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+
+        filename = metadata["wheel_name"]
+        project = normalize_name(filename.split("-", 1)[0])
+        backend.put(
+            f"{index_prefix}/{project}/{filename}",
+            wheel_path,
+            {"sha256": sha256},
+            acl=acl,
+            content_type=WHEEL_CONTENT_TYPE,
+        )
+
+    return {"etag": etag, "project": project, "filename": filename, "sha256": sha256}
+
+
+def render_project_html(project: str, files: list[dict]) -> str:
+    """Renders the PEP 503 page listing the wheels of the project."""
+    links = "\n".join(
+        '    <a href="{0}#sha256={1}">{0}</a><br/>'.format(
+            html.escape(f["filename"]), f["sha256"]
+        )
+        for f in files
+    )
+    return (
+        "<!DOCTYPE html>\n<html>\n  <head>\n"
+        '    <meta name="pypi:repository-version" content="1.0">\n'
+        f"    <title>Links for {project}</title>\n  </head>\n  <body>\n"
+        f"    <h1>Links for {project}</h1>\n{links}\n  </body>\n</html>\n"
+    )
+
+
+def render_project_json(project: str, files: list[dict]) -> str:
+    """Renders the PEP 691 JSON page listing the wheels of the project."""
+    return json.dumps(
+        {
+            "meta": {"api-version": "1.0"},
+            "name": project,
+            "files": [
+                {
+                    "filename": f["filename"],
+                    "url": f["filename"],
+                    "hashes": {"sha256": f["sha256"]},
+                }
+                for f in files
+            ],
+        }
+    )
+
+
+def render_root_html(projects: list[str]) -> str:
+    """Renders the PEP 503 root page listing all projects."""
+    links = "\n".join(f'    <a href="{p}/">{p}</a><br/>' for p in projects)
+    return (
+        "<!DOCTYPE html>\n<html>\n  <head>\n"
+        '    <meta name="pypi:repository-version" content="1.0">\n'
+        "    <title>Simple index</title>\n  </head>\n"
+        f"  <body>\n{links}\n  </body>\n</html>\n"
+    )
+
+
+def render_root_json(projects: list[str]) -> str:
+    """Renders the PEP 691 JSON root page listing all projects."""
+    return json.dumps(
+        {
+            "meta": {"api-version": "1.0"},
+            "projects": [{"name": p} for p in projects],
+        }
+    )
+
+
+def write_pages(
+    backend: storage.Storage,
+    index_prefix: str,
+    state: dict,
+    projects: set[str],
+    acl: str | None = None,
+):
+    """
+    Writes the HTML and JSON pages of the changed projects and of the root
+    of the index with the canned ACL.
+    """
+    # Copies of a pipper file in both key layouts share the same wheel.
+    files_by_project: dict[str, dict[str, dict]] = {}
+    for entry in state.values():
+        by_filename = files_by_project.setdefault(entry["project"], {})
+        by_filename[entry["filename"]] = entry
+
+    for project in sorted(projects):
+        by_filename = files_by_project.get(project) or {}
+        files = [by_filename[filename] for filename in sorted(by_filename)]
+        prefix = f"{index_prefix}/{project}"
+        html_page = render_project_html(project, files)
+        put_text(backend, f"{prefix}/index.html", html_page, HTML_CONTENT_TYPE, acl)
+        json_page = render_project_json(project, files)
+        put_text(backend, f"{prefix}/index.json", json_page, JSON_CONTENT_TYPE, acl)
+
+    names = sorted(files_by_project)
+    root_html = render_root_html(names)
+    put_text(backend, f"{index_prefix}/index.html", root_html, HTML_CONTENT_TYPE, acl)
+    root_json = render_root_json(names)
+    put_text(backend, f"{index_prefix}/index.json", root_json, JSON_CONTENT_TYPE, acl)
+
+
+def list_bundles(backend: storage.Storage, root_prefix: str) -> dict[str, str]:
+    """Lists the ETags of all pipper files in the repository by their keys."""
+    return {
+        entry["Key"]: entry["ETag"]
+        for entry in backend.list_objects(f"{root_prefix}/")
+        if entry["Key"].endswith(".pipper")
+    }
+
+
+def get_etags(backend: storage.Storage, keys: list[str]) -> dict[str, str]:
+    """Looks up the ETags of the pipper files by their keys."""
+    return {key: (backend.head(key) or {}).get("ETag", "") for key in keys}
+
+
+def find_orphans(index_prefix: str, state: dict, replaced: list[dict]) -> list[str]:
+    """
+    Returns the keys of the wheels in the index that belonged to removed or
+    replaced pipper files and that no indexed pipper file refers to anymore.
+    """
+    remaining = {(entry["project"], entry["filename"]) for entry in state.values()}
+    orphans = {(entry["project"], entry["filename"]) for entry in replaced}
+    return [
+        f"{index_prefix}/{project}/{filename}"
+        for project, filename in sorted(orphans - remaining)
+    ]
+
+
+def build_index(env: Environment, local_bundles: dict[str, str] | None = None) -> dict:
+    """
+    Builds or incrementally updates the static PEP 503/691 simple index of the
+    repository. The wheels of new or changed pipper files are extracted into
+    the index, the wheels of removed pipper files are deleted from it and only
+    the pages of the affected projects are rewritten, which lets pip and uv
+    install pipper packages directly from the repository. The wheels and
+    pages are uploaded with the canned ACL of the command, if any, while the
+    indexing state remains private.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param local_bundles:
+        Paths of local copies of pipper files by their keys, which are used
+        instead of downloading those pipper files. When given, an existing
+        index is only updated with these pipper files without listing the
+        repository, e.g. after they were published.
+    :return:
+        The updated indexing state of the repository.
+    """
+    backend = env.storage
+    acl = env.args.get("s3_object_acl")
+    index_prefix = get_index_prefix(env)
+    state = load_state(backend, index_prefix)
+
+    # An existing index is updated with just the local pipper files, which
+    # avoids listing the repository but cannot detect removed pipper files.
+    removed: dict[str, dict] = {}
+    if local_bundles and state:
+        listing = get_etags(backend, list(local_bundles))
+    else:
+        listing = list_bundles(backend, env.root_prefix)
+        removed = {key: state.pop(key) for key in list(state) if key not in listing}
+    changed = sorted(
+        key for key, etag in listing.items() if state.get(key, {}).get("etag") != etag
+    )
+    replaced = [state[key] for key in changed if key in state]
+
+    print(f"[INDEXING]: {len(changed)} of {len(listing)} pipper files")
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {
+            executor.submit(
+                index_bundle,
+                backend,
+                index_prefix,
+                key,
+                listing[key],
+                (local_bundles or {}).get(key),
+                acl,
+            ): key
+            for key in changed
+        }
+        for future in futures.as_completed(pending):
+            entry = state[pending[future]] = future.result()
+            print(f"[INDEXED]: {entry['filename']}")
+
+    if not changed and not removed and state:
+        print("[CURRENT]: The index is already up to date")
+        return state
+
+    projects = {state[key]["project"] for key in changed}
+    projects.update(entry["project"] for entry in [*removed.values(), *replaced])
+    write_pages(backend, index_prefix, state, projects, acl)
+    orphans = find_orphans(index_prefix, state, [*removed.values(), *replaced])
+    if orphans:
+        backend.delete(orphans)
+        print(f"[REMOVED]: {len(orphans)} wheels that are no longer indexed")
+    put_text(
+        backend,
+        f"{index_prefix}/{STATE_FILENAME}",
+        json.dumps(state),
+        "application/json",
+    )
+
+    location = f"{backend.location}/{index_prefix}/"
+    print(f"[INDEX]: {location}")
+    return state
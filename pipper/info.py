@@ -1,22 +1,47 @@
+import json
 import textwrap
+from concurrent import futures
 
 import semver
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion
+from packaging.version import parse as parse_version
 
+from pipper import cataloger
+from pipper import environment
 from pipper import versioning
 from pipper import wrapper
 from pipper.environment import Environment
 
-
-def get_package_metadata(env: Environment, package_name: str, package_version: str):
+#: Number of packages looked up concurrently when not specified by the command.
+DEFAULT_JOBS = 8
+
+#: Columns of the report table and the report entry fields they display.
+REPORT_COLUMNS = [
+    ("Package", "name"),
+    ("Installed", "installed"),
+    ("Wanted", "wanted"),
+    ("Latest", "latest"),
+    ("Status", "status"),
+]
+
+
+def get_package_metadata(
+    env: Environment,
+    package_name: str,
+    package_version: str,
+    key: str | None = None,
+):
     """ """
-    response = env.s3_client.head_object(
-        Bucket=env.bucket,
-        Key=versioning.make_s3_key(
-            package_name=package_name,
-            package_version=package_version,
-            root_prefix=env.root_prefix,
-        ),
+    key = key or versioning.make_s3_key(
+        package_name=package_name,
+        package_version=package_version,
+        root_prefix=env.root_prefix,
+        sharded=env.sharded,
     )
+    response = env.storage.head(key)
+    if response is None:
+        raise FileNotFoundError(f'Remote package "{key}" does not exist.')
     return {**response["Metadata"]}
 
 
@@ -37,7 +62,9 @@ def print_with_remote(env: Environment, package_name: str):
     remote_versions = versioning.list_versions(env, package_name)
 
     try:
-        latest = get_package_metadata(env, package_name, remote_versions[-1].version)
+        latest = get_package_metadata(
+            env, package_name, remote_versions[-1].version, remote_versions[-1].key
+        )
     except IndexError:
         latest = {"version": "None", "timestamp": "Never"}
 
@@ -78,11 +105,141 @@ def print_with_remote(env: Environment, package_name: str):
     )
 
 
+def get_status(installed: str | None, latest: str | None) -> str:
+    """
+    Compares the installed version of a package with its latest remote
+    version, returning one of missing, unknown, behind, ahead or current.
+    """
+    if installed is None:
+        return "missing"
+    if latest is None:
+        return "unknown"
+
+    try:
+        current, released = parse_version(installed), parse_version(latest)
+    except InvalidVersion:
+        return "unknown"
+
+    if current < released:
+        return "behind"
+    return "ahead" if current > released else "current"
+
+
+def get_report_entry(
+    env: Environment, package_id: str, installed: dict[str, str]
+) -> dict:
+    """
+    Looks up the remote versions of the package with a single listing and
+    compares them with the installed version of the package.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param package_id:
+        Identifier of the package, either a name, a NAME:VERSION combination
+        or a URL of a pipper file.
+    :param installed:
+        Versions of the installed distributions by their canonical names.
+    :return:
+        A report entry with the installed version, the latest version that
+        satisfies the version constraint of the package identifier, the
+        latest version and the status of the package.
+    """
+    if "://" in package_id:
+        name, constraint = versioning.parse_package_url(package_id).package_name, None
+    else:
+        name, _, constraint = package_id.partition(":")
+
+    available = versioning.list_versions(env, name, reverse=True)
+    wanted = versioning.select_latest_match(available, constraint or None)
+    latest = available[0].version if available else None
+    version = installed.get(canonicalize_name(name))
+    return {
+        "name": name,
+        "installed": version,
+        "wanted": wanted.version if wanted else None,
+        "latest": latest,
+        "status": get_status(version, latest),
+    }
+
+
+def create_report(env: Environment) -> list[dict]:
+    """
+    Creates a report comparing the installed versions of multiple packages
+    with their remote versions, looking up the packages concurrently. The
+    packages are the dependencies in the pipper.(json|yaml) configs file if
+    one is available and otherwise the installed distributions that are
+    published in the repository, which are found with a listing of the
+    packages in the repository instead of one listing per distribution.
+
+    :param env:
+        Command environment in which this function is being executed
+    :return:
+        The report entries of the packages.
+    """
+    installed = wrapper.list_installed(env)
+    try:
+        configs = environment.load_configs(env.args.get("configs_path"))
+        prefix = "dev_" if env.args.get("dev") else ""
+        package_ids = configs.get(f"{prefix}dependencies") or []
+        from_configs = True
+    except FileNotFoundError:
+        # Packages are looked up by their published names, which may differ
+        # from the canonical names of the installed distributions.
+        package_ids = sorted(
+            name
+            for name, _ in cataloger.iter_packages(env)
+            if canonicalize_name(name) in installed
+        )
+        from_configs = False
+
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        entries = list(
+            executor.map(lambda p: get_report_entry(env, p, installed), package_ids)
+        )
+
+    # Packages without remote versions are not pipper packages.
+    return [e for e in entries if from_configs or e["latest"] is not None]
+
+
+def print_report(env: Environment, entries: list[dict]):
+    """Prints the report entries as a table or, if requested, as JSON."""
+    if env.args.get("json"):
+        print(json.dumps(entries, indent=2))
+        return
+
+    rows = [[title for title, _ in REPORT_COLUMNS]] + [
+        [str(entry[field] or "-") for _, field in REPORT_COLUMNS] for entry in entries
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(REPORT_COLUMNS))]
+    for row in rows:
+        print(
+            "  ".join(
+                cell.ljust(width) for cell, width in zip(row, widths, strict=True)
+            ).rstrip()
+        )
+
+
+def run_outdated(env: Environment) -> list[dict]:
+    """Executes an outdated command for the specified environment."""
+    entries = [e for e in create_report(env) if e["status"] in ("behind", "missing")]
+    print_report(env, entries)
+    return entries
+
+
 def run(env: Environment):
     """Executes an info command for the specified environment."""
     local_only = env.args.get("local_only", False)
     package_name = env.args.get("package_name", "unknown")
 
+    if env.args.get("all"):
+        entries = create_report(env)
+        print_report(env, entries)
+        return entries
+
+    if not package_name:
+        raise ValueError("A package name or the --all flag must be specified.")
+
     if local_only:
         return print_local_only(env, package_name)
     return print_with_remote(env, package_name)
@@ -1,20 +1,133 @@
+import base64
+import csv
+import hashlib
+import io
 import os
+import pathlib
 import shutil
+import sys
 import tempfile
+import zipfile
+from importlib import metadata as importlib_metadata
 
 from pipper import downloader
 from pipper import environment
-from pipper import s3
+from pipper import tracing
 from pipper import wrapper
 from pipper.environment import Environment
 
 
+def get_distribution(
+    name: str, target_directory: str | None = None
+) -> importlib_metadata.Distribution | None:
+    """
+    Returns the installed distribution of the package, which is searched for
+    in the target directory if specified, or None if it is not installed.
+    """
+    if target_directory:
+        path = [wrapper.clean_path(target_directory)]
+        found = importlib_metadata.distributions(name=name, path=path)
+    else:
+        found = importlib_metadata.distributions(name=name)
+    return next(iter(found), None)
+
+
+def add_to_record(distribution: importlib_metadata.Distribution, names: list[str]):
+    """
+    Adds the files to the RECORD file of the distribution so that they are
+    removed when the package is uninstalled. Existing entries of the files,
+    e.g. for bytecode that pip compiled, are replaced.
+
+    :param distribution:
+        The installed distribution to which the files belong.
+    :param names:
+        Paths of the files relative to the root of the distribution.
+    """
+    record = next(
+        (
+            path
+            for path in distribution.files or []
+            if path.name == "RECORD" and path.parent.name.endswith(".dist-info")
+        ),
+        None,
+    )
+    if record is None:
+        return
+
+    record_path = pathlib.Path(str(distribution.locate_file(record)))
+    root = pathlib.Path(str(distribution.locate_file("")))
+    with open(record_path, newline="") as f:
+        rows = [row for row in csv.reader(f) if row and row[0] not in names]
+    for name in names:
+        contents = root.joinpath(name).read_bytes()
+        digest = base64.urlsafe_b64encode(hashlib.sha256(contents).digest())
+        rows.append(
+            [name, f"sha256={digest.rstrip(b'=').decode()}", str(len(contents))]
+        )
+    with open(record_path, "w", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerows(rows)
+
+
+def install_bytecode_overlay(
+    bundle_path: str, metadata: dict, target_directory: str | None = None
+) -> bool:
+    """
+    Lays down the precompiled bytecode overlay from the pipper bundle for the
+    running interpreter next to the installed package source files, and adds
+    the bytecode files to the RECORD of the installed distribution. Bundles
+    without an overlay for the running interpreter are ignored.
+
+    :param bundle_path:
+        Path to the pipper bundle file that was installed.
+    :param metadata:
+        The package metadata from the pipper bundle.
+    :param target_directory:
+        Alternate installation location if the package was installed there.
+    :return
+        Whether or not a bytecode overlay was installed.
+    """
+    filename = (metadata.get("bytecode") or {}).get(sys.implementation.cache_tag)
+    if not filename:
+        return False
+
+    distribution = get_distribution(metadata["name"], target_directory)
+    if target_directory:
+        root = pathlib.Path(wrapper.clean_path(target_directory))
+    elif distribution is not None:
+        root = pathlib.Path(str(distribution.locate_file("")))
+    else:
+        return False
+
+    with zipfile.ZipFile(bundle_path) as zipper:
+        contents = zipper.read(filename)
+
+    written = []
+    with zipfile.ZipFile(io.BytesIO(contents)) as overlay:
+        for name in overlay.namelist():
+            path = root.joinpath(name)
+            # Bytecode is only useful next to the source file it was compiled
+            # from, which is ../name.py relative to the __pycache__ file.
+            source = path.parent.parent.joinpath(f"{path.name.split('.')[0]}.py")
+            if ".." in pathlib.PurePosixPath(name).parts or not source.exists():
+                continue
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(overlay.read(name))
+            written.append(name)
+
+    if distribution is not None:
+        add_to_record(distribution, written)
+    cache_tag = sys.implementation.cache_tag
+    print(f"[PRECOMPILED]: Installed {len(written)} {cache_tag} files")
+    return True
+
+
 def install_pipper_file(
     local_source_path: str,
     to_user: bool = False,
     target_directory: str | None = None,
     dry_run: bool = False,
     use_pip_legacy_resolver: bool = False,
+    compile_bytecode: bool = True,
 ) -> dict:
     """
     Installs the specified local pipper bundle file.
@@ -31,6 +144,8 @@ def install_pipper_file(
         happened.
     :param use_pip_legacy_resolver:
         Whether to use pip legacy resolver.
+    :param compile_bytecode:
+        Whether or not pip should compile the installed python files.
     :return
         The package metadata from the pipper bundle
     """
@@ -44,7 +159,12 @@ def install_pipper_file(
             target_directory=target_directory,
             dry_run=dry_run,
             use_pip_legacy_resolver=use_pip_legacy_resolver,
+            compile_bytecode=compile_bytecode,
         )
+        if not dry_run:
+            install_bytecode_overlay(
+                local_source_path, extracted["metadata"], target_directory
+            )
         return extracted["metadata"]
     except Exception:
         raise
@@ -52,6 +172,64 @@ def install_pipper_file(
         shutil.rmtree(directory)
 
 
+def is_compile_deferred(env: Environment) -> bool:
+    """
+    Whether or not bytecode compilation is deferred until all packages have
+    been installed, at which point they are compiled in parallel. Specifying
+    optimization levels defers compilation as well, since pip only compiles
+    the default level.
+    """
+    return env.args.get("compile_workers") is not None or bool(env.args.get("optimize"))
+
+
+def is_pip_compiling(env: Environment) -> bool:
+    """Whether or not pip compiles the files of each package it installs."""
+    return not env.args.get("no_compile") and not is_compile_deferred(env)
+
+
+def get_install_directories(env: Environment) -> list[str]:
+    """Returns the directories into which the command installs packages."""
+    return wrapper.get_install_directories(
+        to_user=env.args.get("pip_user") or False,
+        target_directory=env.args.get("target_directory"),
+    )
+
+
+def snapshot_installed(env: Environment) -> dict[str, int] | None:
+    """
+    Takes a snapshot of the distributions installed before the installation
+    if compilation is deferred, so that only the files installed afterwards
+    are compiled. Returns None if compilation is not deferred.
+    """
+    if env.args.get("no_compile") or not is_compile_deferred(env):
+        return None
+    return wrapper.snapshot_records(get_install_directories(env))
+
+
+def compile_installed(env: Environment, snapshot: dict[str, int] | None):
+    """
+    Compiles the bytecode of the python files of the distributions installed
+    since the snapshot in parallel, as listed in their RECORD files, if
+    compilation was deferred until the end of the installation. Files of
+    other distributions in the install directories are not compiled.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param snapshot:
+        Snapshot of the distributions installed before the installation,
+        which is None if compilation is not deferred.
+    """
+    if snapshot is None:
+        return
+
+    wrapper.compile_bytecode(
+        files=wrapper.list_installed_files(get_install_directories(env), snapshot),
+        workers=env.args.get("compile_workers") or 0,
+        optimize=env.args.get("optimize"),
+        dry_run=bool(env.args.get("dry_run")),
+    )
+
+
 def install_dependencies(env: Environment, dependencies: list[str]):
     """
 
@@ -76,6 +254,7 @@ def install_dependencies(env: Environment, dependencies: list[str]):
         do_install(name)
 
 
+@tracing.traced("install")
 def install(env: Environment, package_id: str):
     """
     Installs the specified pipper package, which is specified by either a
@@ -87,6 +266,7 @@ def install(env: Environment, package_id: str):
         Identifier for the package to be loaded. This can be either a package
         name, or a package name and version (NAME:VERSION) combination.
     """
+    tracing.annotate(package=package_id)
     upgrade = env.args.get("upgrade")
     data = downloader.parse_package_id(env, package_id)
     is_url = "url" in data
@@ -109,11 +289,13 @@ def install(env: Environment, package_id: str):
         )
         return
 
-    remote_version_exists = is_url or s3.key_exists(
-        env.s3_client, data["bucket"], data["key"]
-    )
+    directory = tempfile.mkdtemp(prefix="pipper-download-")
+    path = os.path.join(directory, "package.pipper")
 
-    if not remote_version_exists:
+    if is_url:
+        downloader.save(package_id, path)
+    elif not downloader.fetch_bundle(env, data["key"], path):
+        shutil.rmtree(directory)
         print(
             "[ERROR]: Version {} not available for {} package".format(
                 data["version"], data["name"]
@@ -121,16 +303,6 @@ def install(env: Environment, package_id: str):
         )
         return
 
-    directory = tempfile.mkdtemp(prefix="pipper-download-")
-    path = os.path.join(directory, "package.pipper")
-
-    if is_url:
-        downloader.save(package_id, path)
-    else:
-        env.s3_client.download_file(
-            Bucket=data["bucket"], Key=data["key"], Filename=path
-        )
-
     print("DOWNLOAD PATH:", os.path.exists(path), path)
 
     try:
@@ -140,6 +312,7 @@ def install(env: Environment, package_id: str):
             target_directory=env.args.get("target_directory"),
             dry_run=bool(env.args.get("dry_run")),
             use_pip_legacy_resolver=env.args.get("use_pip_legacy_resolver") or False,
+            compile_bytecode=is_pip_compiling(env),
         )
     except Exception:
         raise
@@ -191,6 +364,7 @@ def install_from_configs(env: Environment, configs_path: str | None = None):
             target_directory=target_directory,
             dry_run=bool(env.args.get("dry_run")),
             use_pip_legacy_resolver=use_pip_legacy_resolver,
+            compile_bytecode=is_pip_compiling(env),
         )
 
     for package in configs.get("conda", []):
@@ -218,8 +392,11 @@ def run(env: Environment):
     :param env:
         Command environment in which this function is being executed
     """
+    snapshot = snapshot_installed(env)
     packages = env.args.get("packages")
     if packages:
-        return install_many(env, packages)
+        install_many(env, packages)
+    else:
+        install_from_configs(env, env.args.get("configs_path"))
 
-    install_from_configs(env, env.args.get("configs_path"))
+    compile_installed(env, snapshot)
@@ -25,6 +25,14 @@ def required_length(minimum: int, maximum: int, optional: bool = False):
     return RequiredLength
 
 
+def non_negative_int(value: str) -> int:
+    """Parses an integer argument that must not be negative."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is not a non-negative integer")
+    return number
+
+
 def read_file(*args) -> str:
     """ """
     path = os.path.join(package_directory, *args)
@@ -43,6 +51,27 @@ def populate_with_common(parser: ArgumentParser) -> ArgumentParser:
         help="Quiet output only returns necessary information for commands",
     )
 
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        default=False,
+        help="""
+            Prints a breakdown of where the command spent its time, e.g. in
+            resolving versions, downloading, extracting and pip, along with
+            the bytes transferred and the S3 requests made in each phase.
+            """,
+    )
+
+    parser.add_argument(
+        "--trace-out",
+        dest="trace_out",
+        help="""
+            Writes the timing spans of the command to this path as a Chrome
+            trace event file, which can be opened in chrome://tracing or
+            Perfetto.
+            """,
+    )
+
     return parser
 
 
@@ -75,7 +104,125 @@ def populate_with_credentials(parser: ArgumentParser) -> ArgumentParser:
         "-b",
         "--bucket",
         dest="bucket",
-        help="Name of the bucket containing the pipper packages",
+        help=" ".join(
+            [
+                "Name of the bucket containing the pipper packages, or a",
+                "file:// URL of a local directory containing them.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--endpoint-url",
+        dest="endpoint_url",
+        help="Endpoint URL of an S3-compatible service hosting the bucket.",
+    )
+
+    parser.add_argument(
+        "--region",
+        dest="region",
+        help="AWS region of the bucket containing the pipper packages.",
+    )
+
+    parser.add_argument(
+        "--download-base-url",
+        dest="download_base_url",
+        help=" ".join(
+            [
+                "Base URL, e.g. of a CDN in front of the bucket, from which",
+                "pipper packages are downloaded with unsigned requests before",
+                "falling back to the S3 API.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--deadline",
+        dest="request_deadlines",
+        action="append",
+        metavar="[OPERATION=]SECONDS",
+        help=" ".join(
+            [
+                "Maximum number of seconds an S3 read attempt may take before it",
+                "is abandoned and retried, for all reads or for the named read",
+                "operation, e.g. list_objects_v2=2. Writes are never abandoned.",
+                "Can be used multiple times.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--hedge",
+        dest="hedge",
+        action="store_true",
+        default=False,
+        help=" ".join(
+            [
+                "Issue a duplicate of S3 listing and metadata requests that are",
+                "slower than usual and use the first response.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--hedge-quantile",
+        dest="hedge_quantile",
+        type=float,
+        help=" ".join(
+            [
+                "Latency quantile of recent requests after which hedged requests",
+                "are duplicated. Defaults to 0.95.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--rate-limit",
+        dest="rate_limit",
+        type=float,
+        help=" ".join(
+            [
+                "Maximum number of S3 requests per second made by all threads of",
+                "the process. The limit is lowered while S3 throttles requests.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--burst",
+        dest="burst",
+        type=float,
+        help=" ".join(
+            [
+                "Number of S3 requests that can be made at once before the rate",
+                "limit applies. Defaults to one second of requests.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--start-jitter",
+        dest="start_jitter",
+        type=float,
+        help=" ".join(
+            [
+                "Maximum number of seconds, chosen at random, by which the first",
+                "S3 request is delayed to spread the requests of many hosts.",
+            ]
+        ),
+    )
+
+    parser.add_argument(
+        "--layout",
+        dest="layout",
+        choices=["legacy", "sharded"],
+        help=" ".join(
+            [
+                "Key layout of the repository. The sharded layout adds a hash",
+                "shard segment before the package names to spread the request",
+                "rate of large repositories over many key prefixes.",
+            ]
+        ),
     )
 
     parser.add_argument(
@@ -138,6 +285,36 @@ def populate_install(parser: ArgumentParser) -> ArgumentParser:
         default=False,
         help="Upgrade existing packages to latest version",
     )
+    parser.add_argument(
+        "--no-compile",
+        dest="no_compile",
+        action="store_true",
+        default=False,
+        help="Do not compile the installed python files into bytecode.",
+    )
+    parser.add_argument(
+        "--compile-workers",
+        dest="compile_workers",
+        type=int,
+        metavar="N",
+        help=(
+            "Compile the bytecode of all installed packages once at the end of "
+            "the installation using N worker processes instead of letting pip "
+            "compile each package serially. Use 0 for one worker per core."
+        ),
+    )
+    parser.add_argument(
+        "--optimize",
+        dest="optimize",
+        type=int,
+        action="append",
+        choices=[0, 1, 2],
+        help=(
+            "Bytecode optimization level to compile at the end of the "
+            "installation, which defers compilation like --compile-workers. Can "
+            "be specified multiple times to compile multiple levels."
+        ),
+    )
     parser.add_argument(
         "--use-pip-legacy-resolver",
         dest="use_pip_legacy_resolver",
@@ -156,8 +333,72 @@ def populate_bundle(parser: ArgumentParser) -> ArgumentParser:
     """ """
     parser.description = read_file("resources", "bundle_action.txt")
 
-    parser.add_argument("package_directory")
+    parser.add_argument("package_directory", nargs="?")
     parser.add_argument("-o", "--output", dest="output_directory")
+    parser.add_argument(
+        "-w",
+        "--wheel",
+        dest="wheel_path",
+        help=(
+            "Bundle a prebuilt wheel file, or every wheel file in a directory, "
+            "instead of building the package in the package directory."
+        ),
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        "--config",
+        dest="configs_path",
+        help=(
+            "Path to the pipper.(json|yaml) configuration file to include in the "
+            "bundle metadata."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        default=False,
+        help=(
+            "Always rebuild the wheel instead of reusing a cached wheel built "
+            "from identical package source files."
+        ),
+    )
+
+    parser.add_argument(
+        "--precompile",
+        dest="precompile",
+        action="append",
+        metavar="PYVER",
+        help=(
+            "Add precompiled bytecode for the specified python version, e.g. "
+            "3.12, to the bundle, which is used by installations running that "
+            "python version. Can be specified multiple times."
+        ),
+    )
+
+    isolation = parser.add_mutually_exclusive_group()
+    isolation.add_argument(
+        "--reuse-build-env",
+        dest="build_environment",
+        action="store_const",
+        const="cached",
+        help=(
+            "Build the wheel in a cached build environment that is reused by "
+            "packages with the same build backend and build requirements "
+            "instead of a fresh isolated environment."
+        ),
+    )
+    isolation.add_argument(
+        "--no-isolation",
+        dest="build_environment",
+        action="store_const",
+        const="none",
+        help=(
+            "Build the wheel in the current environment, which must already "
+            "contain the build requirements."
+        ),
+    )
 
     return parser
 
@@ -167,8 +408,51 @@ def populate_publish(parser: ArgumentParser) -> ArgumentParser:
     parser.description = read_file("resources", "publish_action.txt")
 
     parser.add_argument(
-        "target_path",
-        help="Path of the pipper file or directory containing the pipper file",
+        "target_paths",
+        nargs="+",
+        help="Paths of pipper files or directories containing pipper files",
+    )
+
+    parser.add_argument(
+        "-a",
+        "--all",
+        dest="publish_all",
+        action="store_true",
+        default=False,
+        help=(
+            "Publish every pipper file in target directories instead of only "
+            "the most recently modified one."
+        ),
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of pipper files to upload concurrently (default 4).",
+    )
+
+    parser.add_argument(
+        "--update-index",
+        dest="update_index",
+        action="store_true",
+        default=False,
+        help=(
+            "Incrementally update the static simple index of the repository "
+            "with the published pipper files."
+        ),
+    )
+
+    parser.add_argument(
+        "--continue-on-error",
+        dest="continue_on_error",
+        action="store_true",
+        default=False,
+        help=(
+            "Keep publishing the remaining pipper files after one fails to "
+            "upload instead of cancelling the pending uploads."
+        ),
     )
 
     parser.add_argument(
@@ -177,7 +461,13 @@ def populate_publish(parser: ArgumentParser) -> ArgumentParser:
         dest="force",
         action="store_true",
         default=False,
-        help="Force publishing even if the version has already been published",
+        help=" ".join(
+            [
+                "Force publishing even if the version has already been published",
+                "with different contents. Identical contents are never uploaded",
+                "again.",
+            ]
+        ),
     )
 
     parser.add_argument(
@@ -188,7 +478,7 @@ def populate_publish(parser: ArgumentParser) -> ArgumentParser:
         help=" ".join(
             [
                 "Raise an exception if publish is skipped because version is",
-                "already published.",
+                "already published or conflicts with the published contents.",
             ]
         ),
     )
@@ -216,7 +506,22 @@ def populate_info(parser: ArgumentParser) -> ArgumentParser:
     parser.description = read_file("resources", "info_action.txt")
 
     parser.add_argument(
-        "package_name", help="Name of the package about which to retrieve information"
+        "package_name",
+        nargs="?",
+        help="Name of the package about which to retrieve information",
+    )
+
+    parser.add_argument(
+        "-a",
+        "--all",
+        dest="all",
+        action="store_true",
+        default=False,
+        help=(
+            "Report on all dependencies in the pipper.(json|yaml) configs file, "
+            "or on all installed pipper packages if there is none, looking up "
+            "their remote versions concurrently."
+        ),
     )
 
     parser.add_argument(
@@ -228,6 +533,37 @@ def populate_info(parser: ArgumentParser) -> ArgumentParser:
         help="Only get local package information",
     )
 
+    return populate_report(parser)
+
+
+def populate_report(parser: ArgumentParser) -> ArgumentParser:
+    """ """
+    parser.add_argument("-i", "--input", dest="configs_path")
+    parser.add_argument(
+        "--dev",
+        "--devel",
+        "--development",
+        dest="dev",
+        action="store_true",
+        help="""
+            Only significant when reading a pipper.(json|yaml) source file,
+            this will report on "dev_dependencies" instead of "dependencies".
+            """,
+    )
+    parser.add_argument(
+        "--json",
+        dest="json",
+        action="store_true",
+        default=False,
+        help="Print the report as JSON instead of as a table.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of packages to look up concurrently.",
+    )
     parser.add_argument(
         "-t",
         "--target",
@@ -244,6 +580,16 @@ def populate_info(parser: ArgumentParser) -> ArgumentParser:
     return populate_with_credentials(parser)
 
 
+def populate_outdated(parser: ArgumentParser) -> ArgumentParser:
+    """ """
+    parser.description = (
+        "Lists the pipper dependencies in the pipper.(json|yaml) configs file, "
+        "or the installed pipper packages if there is none, that are missing "
+        "or behind their latest remote versions."
+    )
+    return populate_report(parser)
+
+
 def populate_download(parser: ArgumentParser) -> ArgumentParser:
     """ """
     parser.description = read_file("resources", "download_action.txt")
@@ -268,6 +614,23 @@ def populate_download(parser: ArgumentParser) -> ArgumentParser:
     parser.add_argument(
         "-e", "--extract", dest="extract", action="store_true", default=False
     )
+    parser.add_argument(
+        "--wheelhouse",
+        dest="wheelhouse",
+        metavar="<dir>",
+        help=(
+            "Exports the bare wheels of the packages and all of their "
+            "transitive pipper and pypi dependencies into a flat directory "
+            "along with a requirements file pinning their hashes."
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of pipper files to download concurrently.",
+    )
 
     return populate_with_credentials(parser)
 
@@ -301,6 +664,168 @@ def populate_repository(parser: ArgumentParser) -> ArgumentParser:
     )
     populate_with_credentials(modify_parser)
 
+    sync_parser = subparsers.add_parser("sync")
+    sync_parser.description = (
+        "Incrementally mirrors the pipper files of a repository to another "
+        "bucket, prefix or local directory. Repository locations are bucket "
+        "names, s3://bucket/root-prefix URLs or file:///directory URLs."
+    )
+    sync_parser.add_argument("source")
+    sync_parser.add_argument("destination")
+    sync_parser.add_argument(
+        "--package",
+        dest="package_names",
+        action="append",
+        help="Only copy the specified package. Can be used multiple times.",
+    )
+    sync_parser.add_argument(
+        "--version",
+        dest="version_prefix",
+        help="Only copy versions matching this version prefix, e.g. 1.2.*",
+    )
+    sync_parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of pipper files to copy concurrently.",
+    )
+    sync_parser.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        default=False,
+        help="List the pipper files that would be copied without copying them.",
+    )
+    populate_with_credentials(sync_parser)
+
+    migrate_parser = subparsers.add_parser("migrate")
+    migrate_parser.description = (
+        "Copies the pipper files of the repository to their keys in the "
+        "target key layout. The original keys are kept unless --delete is "
+        "specified, so that clients can be reconfigured gradually."
+    )
+    migrate_parser.add_argument(
+        "--to",
+        dest="target_layout",
+        choices=["legacy", "sharded"],
+        default="sharded",
+        help="The key layout to migrate the repository to.",
+    )
+    migrate_parser.add_argument(
+        "--delete",
+        dest="delete",
+        action="store_true",
+        default=False,
+        help="Delete the pipper files at their original keys after copying.",
+    )
+    migrate_parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of pipper files to copy concurrently.",
+    )
+    migrate_parser.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        default=False,
+        help="List the pipper files that would be migrated without copying them.",
+    )
+    populate_with_credentials(migrate_parser)
+
+    catalog_parser = subparsers.add_parser("catalog")
+    catalog_parser.description = (
+        "Lists the packages in the repository as they are found, optionally "
+        "with summaries of their versions."
+    )
+    catalog_parser.add_argument(
+        "-s",
+        "--summary",
+        dest="summary",
+        action="store_true",
+        default=False,
+        help=(
+            "Include the number of versions, the latest version, the total size "
+            "and the last publish time of each package."
+        ),
+    )
+    catalog_parser.add_argument(
+        "--json",
+        dest="json",
+        action="store_true",
+        default=False,
+        help="Print each package as a line of JSON instead of as a table row.",
+    )
+    catalog_parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of packages to summarize concurrently.",
+    )
+    populate_with_credentials(catalog_parser)
+
+    prune_parser = subparsers.add_parser("prune")
+    prune_parser.description = (
+        "Removes old versions of a package from the repository according to "
+        "retention rules. Versions that are not selected by a rule are kept."
+    )
+    prune_parser.add_argument("package_name")
+    prune_parser.add_argument(
+        "--keep-latest",
+        dest="keep_latest",
+        type=non_negative_int,
+        help="Number of the highest release versions to keep.",
+    )
+    prune_parser.add_argument(
+        "--keep-prereleases",
+        dest="keep_prereleases",
+        type=non_negative_int,
+        help="Number of the highest pre-release versions to keep.",
+    )
+    prune_parser.add_argument(
+        "--older-than",
+        dest="older_than",
+        help=(
+            "Only remove versions published longer ago than this age, given as "
+            "a number of days, hours, minutes or seconds, e.g. 30d, 12h, 90m."
+        ),
+    )
+    prune_parser.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        default=False,
+        help="List the versions that would be removed without removing them.",
+    )
+    populate_with_credentials(prune_parser)
+
+    index_parser = subparsers.add_parser("build-index")
+    index_parser.description = (
+        "Builds or incrementally updates a static PEP 503/691 simple index of "
+        "the wheels in the repository, from which pip and uv can install "
+        "pipper packages directly."
+    )
+    index_parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of pipper files to index concurrently.",
+    )
+    index_parser.add_argument(
+        "--acl",
+        dest="s3_object_acl",
+        help=(
+            "Canned ACL of the wheels and pages of the index, e.g. "
+            '"public-read" to serve the index from the bucket directly. They '
+            "are private by default."
+        ),
+    )
+    populate_with_credentials(index_parser)
+
     return parser
 
 
@@ -337,6 +862,75 @@ def populate_authorize(parser: ArgumentParser) -> ArgumentParser:
         help="Compact output as a single-line, space-separated list",
     )
 
+    parser.add_argument(
+        "--include-dependencies",
+        dest="include_dependencies",
+        action="store_true",
+        default=False,
+        help=(
+            "Also authorize the transitive pipper dependencies of the packages, "
+            "which are listed before the packages that depend on them."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache-urls",
+        dest="cache_urls",
+        action="store_true",
+        default=False,
+        help=(
+            "Reuse authorized URLs created by earlier invocations for the same "
+            "files and expiration while they remain valid for at least half "
+            "of the expiration."
+        ),
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        help="Maximum number of packages to resolve concurrently.",
+    )
+
+    return populate_with_credentials(parser)
+
+
+def populate_proxy(parser: ArgumentParser) -> ArgumentParser:
+    """ """
+    parser.description = (
+        "Serves the repository over HTTP with a disk cache for pipper clients "
+        "that use the proxy URL as their repository bucket."
+    )
+
+    parser.add_argument(
+        "--host",
+        dest="host",
+        default="127.0.0.1",
+        help="Host name or address on which the proxy listens.",
+    )
+
+    parser.add_argument(
+        "--port",
+        dest="port",
+        type=int,
+        default=8080,
+        help="Port on which the proxy listens.",
+    )
+
+    parser.add_argument(
+        "--cache-directory",
+        dest="cache_directory",
+        help="Directory in which downloaded pipper files are cached.",
+    )
+
+    parser.add_argument(
+        "--ttl",
+        dest="ttl",
+        type=float,
+        help="Number of seconds listings are cached. Defaults to 30.",
+    )
+
     return populate_with_credentials(parser)
 
 
@@ -373,9 +967,11 @@ def parse(cli_args: list | None = None) -> dict:
         populate_bundle(subparsers.add_parser("bundle")),
         populate_publish(subparsers.add_parser("publish")),
         populate_info(subparsers.add_parser("info")),
+        populate_outdated(subparsers.add_parser("outdated")),
         populate_download(subparsers.add_parser("download")),
         populate_authorize(subparsers.add_parser("authorize")),
         populate_repository(subparsers.add_parser("repository")),
+        populate_proxy(subparsers.add_parser("proxy")),
     ]
 
     for p in parsers:
@@ -0,0 +1,325 @@
+import json
+import os
+import pathlib
+import re
+import tempfile
+import threading
+import time
+import typing
+from concurrent import futures
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import unquote
+from urllib.parse import urlparse
+
+from pipper import environment
+from pipper import storage
+from pipper.environment import Environment
+
+#: Number of seconds listings and head responses are cached before they are
+#: requested from the repository again.
+DEFAULT_TTL = 30
+
+#: Size in bytes of the chunks in which cached files are sent to clients.
+CHUNK_SIZE = 1024 * 1024
+
+#: Single byte range of a Range request header, which is either a first and
+#: an optional last position or the length of a suffix, e.g. "bytes=-500".
+RANGE_REGEX = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class ProxyCache:
+    """
+    Caches the responses of a repository storage backend for the proxy. Listings
+    and head responses are kept in memory for a limited time while downloaded
+    pipper files are kept on disk until their ETag changes. Concurrent requests
+    for the same uncached data share a single request to the repository.
+    """
+
+    def __init__(self, backend: storage.Storage, directory: str, ttl: float):
+        self.backend = backend
+        self.directory = pathlib.Path(directory)
+        self.ttl = ttl
+        self._responses: dict[tuple, tuple[float, typing.Any]] = {}
+        self._in_flight: dict[tuple, futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def _single_flight(self, identifier: tuple, function: typing.Callable):
+        """Calls the function unless an identical call is already in flight."""
+        future: futures.Future = futures.Future()
+        with self._lock:
+            pending = self._in_flight.setdefault(identifier, future)
+
+        if pending is not future:
+            return pending.result()
+
+        try:
+            result = function()
+            future.set_result(result)
+            return result
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(identifier, None)
+
+    def _cached(self, identifier: tuple, function: typing.Callable):
+        """Returns the cached response or requests and caches it."""
+        with self._lock:
+            expires, response = self._responses.get(identifier, (0, None))
+        if expires > time.monotonic():
+            return response
+
+        response = self._single_flight(identifier, function)
+        with self._lock:
+            self._responses[identifier] = (time.monotonic() + self.ttl, response)
+        return response
+
+    def list_objects(self, prefix: str) -> list[dict]:
+        return self._cached(
+            ("list", prefix), lambda: list(self.backend.list_objects(prefix))
+        )
+
+    def head(self, key: str) -> dict | None:
+        return self._cached(("head", key), lambda: self.backend.head(key))
+
+    def get_path(self, key: str) -> pathlib.Path | None:
+        """
+        Returns the path of the cached file for the key, downloading it from
+        the repository first if it is not cached or has changed since.
+        """
+        response = self.head(key)
+        if response is None:
+            return None
+
+        path = self.directory.joinpath(key)
+        if not path.resolve().is_relative_to(self.directory.resolve()):
+            raise ValueError(f'Key "{key}" is outside of the cache directory')
+        etag_path = path.with_name(f"{path.name}.etag")
+
+        def is_cached() -> bool:
+            exists = path.exists() and etag_path.exists()
+            return exists and etag_path.read_text() == response["ETag"]
+
+        if is_cached():
+            return path
+
+        def download():
+            # The file may have been downloaded by a concurrent request that
+            # completed after the check above.
+            if is_cached():
+                return path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=path.parent) as directory:
+                temporary_path = os.path.join(directory, path.name)
+                self.backend.get(key, temporary_path)
+                os.replace(temporary_path, path)
+            etag_path.write_text(response["ETag"])
+            return path
+
+        return self._single_flight(("get", key), download)
+
+
+def normalize_key(key: str) -> str | None:
+    """
+    Normalizes a requested key by removing empty and "." segments. Keys that
+    are empty, absolute or contain ".." segments are rejected, as they could
+    refer to files outside of the repository and the cache directories.
+
+    :param key:
+        The decoded key of the request.
+    :return:
+        The normalized key, or None if the key is rejected.
+    """
+    parts = key.replace("\\", "/").split("/")
+    if key.startswith(("/", "\\")) or ".." in parts or ":" in parts[0]:
+        return None
+    normalized = "/".join(part for part in parts if part not in ("", "."))
+    return normalized or None
+
+
+def _serialize(entry: dict) -> dict:
+    """Converts a listing entry or head response into JSON-compatible data."""
+    return {
+        name: value.isoformat() if hasattr(value, "isoformat") else value
+        for name, value in entry.items()
+        if name in ("Key", "Size", "ETag", "LastModified", "Metadata", "ContentLength")
+    }
+
+
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parses a Range request header into the first and last positions of the
+    requested bytes of a file. Only single byte ranges are supported, so
+    headers that are missing, malformed or request multiple ranges are
+    ignored and the whole file is sent.
+
+    :param header:
+        The value of the Range request header, if any.
+    :param size:
+        Size of the requested file in bytes.
+    :return:
+        The first and last positions of the range, or None if the header is
+        ignored.
+    :raises ValueError:
+        If the range does not overlap with the file.
+    """
+    match = RANGE_REGEX.fullmatch(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if not start:
+        if int(end) == 0 or size == 0:
+            raise ValueError(f"Empty suffix range of a {size} byte file")
+        return max(0, size - int(end)), size - 1
+
+    first = int(start)
+    if end and int(end) < first:
+        return None
+    if first >= size:
+        raise ValueError(f"Range starts after the end of a {size} byte file")
+    return first, min(int(end), size - 1) if end else size - 1
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    """
+    Serves the repository listing, head and download requests of pipper
+    clients using the http:// storage backend.
+    """
+
+    server: "ProxyServer"
+
+    def _send_json(self, data: typing.Any, status: HTTPStatus = HTTPStatus.OK):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, path: pathlib.Path):
+        size = path.stat().st_size
+        try:
+            byte_range = _parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        first, last = byte_range or (0, size - 1)
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(last - first + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+        self.end_headers()
+        with path.open("rb") as f:
+            f.seek(first)
+            remaining = last - first + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def _send_listing(self, prefix: str):
+        if prefix and normalize_key(prefix) is None:
+            self.send_error(HTTPStatus.BAD_REQUEST)
+            return
+        entries = [_serialize(e) for e in self.server.cache.list_objects(prefix)]
+        self._send_json({"Contents": entries})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        route, _, key = url.path.lstrip("/").partition("/")
+        key = normalize_key(unquote(key))
+        cache = self.server.cache
+
+        if route == "list":
+            self._send_listing((parse_qs(url.query).get("prefix") or [""])[0])
+        elif key is None:
+            self.send_error(HTTPStatus.BAD_REQUEST)
+        elif route == "head" and (response := cache.head(key)) is not None:
+            self._send_json(_serialize(response))
+        elif route == "objects" and (path := cache.get_path(key)) is not None:
+            self._send_file(path)
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+
+    def log_message(self, format: str, *args):
+        if not self.server.quiet:
+            print(f"[PROXY]: {self.address_string()} {format % args}")
+
+
+class ProxyServer(ThreadingHTTPServer):
+    """Threaded HTTP server that proxies a pipper repository."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], cache: ProxyCache, quiet: bool):
+        super().__init__(address, ProxyHandler)
+        self.cache = cache
+        self.quiet = quiet
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+
+def create_server(
+    backend: storage.Storage,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    cache_directory: str | None = None,
+    ttl: float = DEFAULT_TTL,
+    quiet: bool = False,
+) -> ProxyServer:
+    """
+    Creates the caching proxy server for the repository storage backend.
+
+    :param backend:
+        Storage backend of the repository to proxy.
+    :param host:
+        Host name or address on which the server listens.
+    :param port:
+        Port on which the server listens. A free port is chosen if zero.
+    :param cache_directory:
+        Directory in which downloaded pipper files are cached.
+    :param ttl:
+        Number of seconds listings and head responses are cached.
+    :param quiet:
+        Whether or not to suppress the logging of requests.
+    """
+    directory = cache_directory or os.path.join(environment.CACHE_DIRECTORY, "proxy")
+    cache = ProxyCache(backend, directory, ttl)
+    return ProxyServer((host, port), cache, quiet)
+
+
+def run(env: Environment):
+    """Execute the proxy command"""
+    server = create_server(
+        backend=env.storage,
+        host=env.args.get("host") or "127.0.0.1",
+        port=int(env.args.get("port") or 8080),
+        cache_directory=env.args.get("cache_directory"),
+        ttl=float(env.args.get("ttl") or DEFAULT_TTL),
+        quiet=env.quiet,
+    )
+    print(f"[PROXY]: Serving {env.storage.location} at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
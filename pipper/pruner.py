@@ -0,0 +1,136 @@
+import datetime
+import re
+
+from pipper import versioning
+from pipper.environment import Environment
+
+#: Ages accepted by the --older-than option, e.g. "30d" or "12 hours".
+AGE_REGEX = re.compile(r"^\s*(?P<number>[0-9]+)\s*(?P<unit>[a-zA-Z]+)\s*$")
+
+#: Names of the timedelta arguments by the units accepted in ages.
+AGE_UNITS = {
+    **dict.fromkeys(["d", "day", "days"], "days"),
+    **dict.fromkeys(["h", "hr", "hrs", "hour", "hours"], "hours"),
+    **dict.fromkeys(["m", "min", "mins", "minute", "minutes"], "minutes"),
+    **dict.fromkeys(["s", "sec", "secs", "second", "seconds"], "seconds"),
+}
+
+
+def parse_age(age: str) -> datetime.timedelta:
+    """
+    Converts an age such as "30d" into a timedelta. Unlike the expiration of
+    the authorize action, which falls back to a default, ages that are not a
+    number followed by a known unit are rejected, as pruning with a wrong
+    age would remove the wrong versions.
+
+    :param age:
+        Number followed by a unit of days, hours, minutes or seconds.
+    :return:
+        The age as a timedelta.
+    """
+    match = AGE_REGEX.match(age)
+    unit = AGE_UNITS.get(match.group("unit").lower()) if match else None
+    if match is None or unit is None:
+        raise ValueError(
+            f'Invalid age "{age}", which must be a number followed by one of the '
+            'units "d", "h", "m" (minutes) or "s", e.g. "30d".'
+        )
+    return datetime.timedelta(**{unit: int(match.group("number"))})
+
+
+def list_entries(env: Environment, package_name: str) -> list[dict]:
+    """
+    Lists the pipper files of the package with a single listing of its key
+    prefix. In sharded repositories, the pipper files at the legacy keys of
+    the package are listed as well, so that the copies of pruned versions
+    are removed from both layouts.
+    """
+    return versioning.list_package_entries(env, package_name)
+
+
+def select_pruned(
+    entries: list[dict],
+    keep_latest: int | None = None,
+    keep_prereleases: int | None = None,
+    older_than: datetime.datetime | None = None,
+) -> list[dict]:
+    """
+    Selects the pipper files to remove according to the retention rules.
+
+    :param entries:
+        Listing entries of the pipper files of a package, which may contain
+        several pipper files of the same version in different key layouts.
+    :param keep_latest:
+        Number of the highest release versions to keep. All releases are
+        kept if None.
+    :param keep_prereleases:
+        Number of the highest pre-release versions to keep. All pre-releases
+        are kept if None.
+    :param older_than:
+        Only pipper files published before this time are removed if set.
+    :return:
+        The entries of the pipper files to remove, sorted by version.
+    """
+    remotes: dict[str, versioning.RemoteVersion] = {}
+    versions: dict[str, list[dict]] = {}
+    for entry in entries:
+        remote = versioning.RemoteVersion("", entry["Key"])
+        remotes.setdefault(remote.safe_version, remote)
+        versions.setdefault(remote.safe_version, []).append(entry)
+
+    ordered = sorted(remotes.values())
+    releases = [r for r in ordered if not r.is_prerelease]
+    prereleases = [r for r in ordered if r.is_prerelease]
+
+    candidates = []
+    for group, keep in [(releases, keep_latest), (prereleases, keep_prereleases)]:
+        if keep is not None:
+            candidates.extend(group[: max(0, len(group) - keep)])
+
+    return [
+        entry
+        for remote in sorted(candidates)
+        for entry in versions[remote.safe_version]
+        if older_than is None or entry["LastModified"] < older_than
+    ]
+
+
+def prune(env: Environment) -> list[str]:
+    """
+    Removes old versions of the package from the repository according to the
+    retention rules, keeping its listings, and with them version resolution,
+    fast over its lifetime. The pipper files are selected from a single
+    listing and deleted in batches.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :return:
+        The keys of the removed pipper files.
+    """
+    package_name = env.args["package_name"]
+    keep_latest = env.args.get("keep_latest")
+    keep_prereleases = env.args.get("keep_prereleases")
+    if keep_latest is None and keep_prereleases is None:
+        raise ValueError(
+            "At least one of --keep-latest or --keep-prereleases must be specified."
+        )
+
+    older_than = None
+    if (age := env.args.get("older_than")) is not None:
+        now = datetime.datetime.now(datetime.UTC)
+        older_than = now - parse_age(age)
+
+    entries = list_entries(env, package_name)
+    pruned = select_pruned(entries, keep_latest, keep_prereleases, older_than)
+    keys = [entry["Key"] for entry in pruned]
+    print(f'[PRUNING]: {len(keys)} of {len(entries)} versions of "{package_name}"')
+
+    if env.args.get("dry_run"):
+        for key in keys:
+            print(f"[DRY-RUN]: Would remove {key}")
+        return keys
+
+    env.storage.delete(keys)
+    for key in keys:
+        print(f"[REMOVED]: {key}")
+    return keys
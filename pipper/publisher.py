@@ -1,11 +1,30 @@
+import hashlib
 import json
 import os
+import pathlib
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 
-from pipper import s3
+from pipper import indexer
+from pipper import tracing
 from pipper import versioning
 from pipper.environment import Environment
 
+#: Number of bundles uploaded concurrently when not specified by the command.
+DEFAULT_JOBS = 4
+
+#: Explanations printed for bundles that are not uploaded because the version
+#: has already been published.
+PUBLISHED_MESSAGES = {
+    "identical": "Already published with identical contents.",
+    "conflict": (
+        "Already published with different contents. Use --force to replace "
+        "the published version."
+    ),
+    "skipped": "Already published. Use --force to replace the published version.",
+}
+
 
 def is_already_published(env: Environment, metadata: dict) -> bool:
     """
@@ -17,15 +36,39 @@ def is_already_published(env: Environment, metadata: dict) -> bool:
     :param metadata:
         Dictionary containing the metadata extracted from the pipper bundle in question.
     """
-    return s3.key_exists(
-        s3_client=env.s3_client,
-        bucket=env.bucket,
-        key=versioning.make_s3_key(
-            package_name=metadata["name"],
-            package_version=metadata["version"],
-            root_prefix=env.root_prefix,
-        ),
+    key = versioning.make_s3_key(
+        package_name=metadata["name"],
+        package_version=metadata["version"],
+        root_prefix=env.root_prefix,
+        sharded=env.sharded,
     )
+    return bool(find_published_keys(env, [key]))
+
+
+def compute_sha256(bundle_path: str) -> str:
+    """
+    Computes the sha256 hash of the contents of the specified pipper bundle.
+
+    :param bundle_path:
+        Absolute path to a pipper bundle file to hash.
+    """
+    with pathlib.Path(bundle_path).open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def get_published_sha256(env: Environment, key: str) -> str | None:
+    """
+    Retrieves the sha256 hash of the contents of a published pipper bundle
+    from its object metadata with a single head request. Bundles published by
+    older versions of pipper do not have a hash and return None.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param key:
+        The S3 key of the published pipper bundle.
+    """
+    response = env.storage.head(key) or {}
+    return (response.get("Metadata") or {}).get("sha256")
 
 
 def read_metadata(bundle_path: str) -> dict:
@@ -68,6 +111,63 @@ def get_pipper_files_in(target_directory: str) -> list:
     return [e["path"] for e in path_entries if os.path.isfile(e["path"])]
 
 
+def find_published_keys(env: Environment, keys: list[str]) -> set[str]:
+    """
+    Determines which of the specified keys have already been published using
+    a single listing for each package instead of one request per key.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param keys:
+        The S3 keys of pipper bundles to check for.
+    :return:
+        The subset of the keys that already exist in the remote bucket.
+    """
+    return env.storage.keys_exist(keys)
+
+
+@tracing.traced("upload")
+def upload(
+    env: Environment, bundle_path: str, metadata: dict, sha256: str | None = None
+):
+    """
+    Uploads the pipper bundle to the remote S3 bucket.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param bundle_path:
+        Path of the pipper bundle to upload.
+    :param metadata:
+        Dictionary containing the metadata extracted from the pipper bundle.
+    :param sha256:
+        The sha256 hash of the bundle contents, which is stored in the object
+        metadata to detect identical and conflicting publishes later on.
+    """
+    print('[PUBLISHING]: "{}" version {}'.format(metadata["name"], metadata["version"]))
+    tracing.annotate(package=metadata["name"], version=metadata["version"])
+    tracing.add_file_size(bundle_path)
+
+    env.storage.put(
+        key=versioning.make_s3_key(
+            metadata["name"],
+            metadata["version"],
+            root_prefix=env.root_prefix,
+            sharded=env.sharded,
+        ),
+        path=bundle_path,
+        metadata={
+            "package": json.dumps(metadata),
+            "version": metadata["version"],
+            "safe_version": metadata["safe_version"],
+            "name": metadata["name"],
+            "timestamp": metadata["timestamp"],
+            "sha256": sha256 or compute_sha256(bundle_path),
+        },
+        # Allow overriding the ACL from the command.
+        acl=env.args.get("s3_object_acl"),
+    )
+
+
 def from_pipper_file(env: Environment, bundle_path: str):
     """
     Uploads the pipper file located in the specified bundle path.
@@ -79,67 +179,229 @@ def from_pipper_file(env: Environment, bundle_path: str):
         exist in the directory, the one most recently created/modified will be
         uploaded.
     """
-    metadata = read_metadata(bundle_path)
+    publish_many(env, [bundle_path])
+
+
+def upload_many(
+    env: Environment,
+    bundles: dict[str, dict],
+    bundle_paths: list[str],
+    jobs: int,
+    continue_on_error: bool = False,
+    hashes: dict[str, str] | None = None,
+) -> tuple[dict[str, str], dict[str, Exception]]:
+    """
+    Uploads the specified pipper bundles concurrently using a bounded pool of
+    worker threads.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param bundles:
+        Dictionary mapping bundle paths to their metadata.
+    :param bundle_paths:
+        Paths of the pipper bundles to upload.
+    :param jobs:
+        Maximum number of concurrent uploads.
+    :param continue_on_error:
+        Whether to keep uploading after a failure instead of cancelling the
+        uploads that have not started yet.
+    :param hashes:
+        Dictionary mapping bundle paths to the sha256 hashes of their contents.
+    :return:
+        The upload status of each bundle path and the errors of failed uploads.
+    """
+    statuses: dict[str, str] = {}
+    errors: dict[str, Exception] = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                upload, env, path, bundles[path], (hashes or {}).get(path)
+            ): path
+            for path in bundle_paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                future.result()
+                statuses[path] = "published"
+            except Exception as error:
+                statuses[path] = "failed"
+                errors[path] = error
+                if not continue_on_error:
+                    for f in futures:
+                        f.cancel()
+
+    for path in bundle_paths:
+        statuses.setdefault(path, "cancelled")
+
+    return statuses, errors
+
+
+def classify_published(
+    env: Environment, key: str, sha256: str, force: bool = False
+) -> str | None:
+    """
+    Compares a bundle with the bundle already published at the same key.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param key:
+        The S3 key of the already published bundle.
+    :param sha256:
+        The sha256 hash of the contents of the local bundle.
+    :param force:
+        Whether or not conflicting and unverifiable bundles should be replaced.
+    :return:
+        None if the bundle should be uploaded. Otherwise "identical" if the
+        published bundle has the same contents, "conflict" if its contents
+        differ, or "skipped" if its contents cannot be compared because it was
+        published without a hash.
+    """
+    published_sha256 = get_published_sha256(env, key)
+    if published_sha256 == sha256:
+        return "identical"
+    if force:
+        return None
+    return "conflict" if published_sha256 else "skipped"
 
-    print('[SYNCING]: "{}"'.format(metadata["name"]))
 
+def publish_many(env: Environment, bundle_paths: list[str]) -> dict[str, str]:
+    """
+    Publishes multiple pipper bundles. The metadata of every bundle is read
+    up front and whether or not each bundle has already been published is
+    determined with batched listings. Already published bundles are compared
+    by content hash: identical bundles are never uploaded again, while bundles
+    whose contents differ from the published ones are reported as conflicts
+    and only replaced when forced. The remaining bundles are uploaded
+    concurrently. Unless the environment specifies to continue on errors,
+    pending uploads are cancelled after the first failure.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param bundle_paths:
+        Paths of the pipper bundles to publish.
+    :return:
+        A dictionary mapping each bundle path to its publishing status, which
+        is one of "published", "identical", "conflict", "skipped", "failed"
+        or "cancelled".
+    """
     force: bool = env.args.get("force") or False
-    if not force and is_already_published(env, metadata):
-        print(
-            '[SKIPPED]: "{}" version {} is already published'.format(
-                metadata["name"], metadata["version"]
-            )
+    continue_on_error: bool = env.args.get("continue_on_error") or False
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+
+    bundles = {path: read_metadata(path) for path in bundle_paths}
+    hashes = {path: compute_sha256(path) for path in bundle_paths}
+    keys = {
+        path: versioning.make_s3_key(
+            package_name=metadata["name"],
+            package_version=metadata["version"],
+            root_prefix=env.root_prefix,
+            sharded=env.sharded,
         )
+        for path, metadata in bundles.items()
+    }
+    for metadata in bundles.values():
+        print('[SYNCING]: "{}"'.format(metadata["name"]))
 
-        if env.args.get("skip_fails"):
-            raise ValueError("Failed because this version and published version match.")
+    published = find_published_keys(env, list(keys.values()))
 
-        return
+    statuses: dict[str, str] = {}
+    for path, metadata in bundles.items():
+        if keys[path] not in published:
+            continue
+        status = classify_published(env, keys[path], hashes[path], force)
+        if status is None:
+            continue
 
-    print('[PUBLISHING]: "{}" version {}'.format(metadata["name"], metadata["version"]))
+        statuses[path] = status
+        label = PUBLISHED_MESSAGES[status]
+        print(f'[{status.upper()}]: "{metadata["name"]}" version {metadata["version"]}')
+        print(f"    {label}")
 
-    content_length = os.path.getsize(bundle_path)
+    pending = [path for path in bundles if path not in statuses]
+    uploaded, errors = upload_many(
+        env, bundles, pending, jobs, continue_on_error, hashes
+    )
+    statuses.update(uploaded)
 
-    with open(bundle_path, "rb") as f:
-        env.s3_client.put_object(
-            # Allow overriding the ACL from the command.
-            ACL=env.args.get("s3_object_acl") or "private",
-            Body=f,
-            Bucket=env.bucket,
-            Key=versioning.make_s3_key(
-                metadata["name"],
-                metadata["version"],
-                root_prefix=env.root_prefix,
-            ),
-            ContentType="application/zip",
-            ContentLength=content_length,
-            Metadata={
-                "package": json.dumps(metadata),
-                "version": metadata["version"],
-                "safe_version": metadata["safe_version"],
-                "name": metadata["name"],
-                "timestamp": metadata["timestamp"],
-            },
+    if len(bundles) > 1:
+        print("\n[SUMMARY]:")
+        for path, metadata in bundles.items():
+            print(
+                "  * {} {} {}".format(
+                    statuses[path].upper(), metadata["name"], metadata["version"]
+                )
+            )
+
+    if errors:
+        failures = ", ".join(
+            f"{os.path.basename(path)} ({error})" for path, error in errors.items()
         )
+        raise RuntimeError(f"Failed to publish {len(errors)} bundle(s): {failures}")
 
+    not_published = {"skipped", "conflict"}.intersection(statuses.values())
+    if env.args.get("skip_fails") and not_published:
+        raise ValueError("Failed because this version and published version match.")
 
-def run(env: Environment):
+    return statuses
+
+
+def get_bundle_paths(env: Environment) -> list[str]:
     """
-    Executes a publish action, which uploads the bundled pipper package to its
-    remote S3 backend based on the environment and command line options.
+    Determines the paths of the pipper bundles to publish from the target paths
+    specified in the command. Directories resolve to their most recently
+    modified pipper bundle, or to all of their pipper bundles if the all flag
+    is set.
 
     :param env:
         Configuration data for the execution environment for this command invocation.
     """
-    target_path = os.path.realpath(env.args["target_path"])
+    publish_all: bool = env.args.get("publish_all") or False
+    target_paths = env.args.get("target_paths") or []
 
-    if not os.path.exists(target_path):
-        raise FileNotFoundError(f'No such path "{target_path}"')
+    bundle_paths: list[str] = []
+    for target in target_paths:
+        target_path = os.path.realpath(target)
+        if not os.path.exists(target_path):
+            raise FileNotFoundError(f'No such path "{target_path}"')
 
-    bundle_path = (
-        get_pipper_files_in(target_path)[-1]
-        if os.path.isdir(target_path)
-        else target_path
-    )
+        if not os.path.isdir(target_path):
+            bundle_paths.append(target_path)
+            continue
+
+        found = get_pipper_files_in(target_path)
+        if not found:
+            raise FileNotFoundError(f'No pipper bundles found in "{target_path}"')
+        bundle_paths.extend(found if publish_all else found[-1:])
+
+    return list(dict.fromkeys(bundle_paths))
 
-    return from_pipper_file(env, bundle_path)
+
+def run(env: Environment):
+    """
+    Executes a publish action, which uploads the bundled pipper packages to
+    their remote S3 backend based on the environment and command line options.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    """
+    statuses = publish_many(env, get_bundle_paths(env))
+    if not env.args.get("update_index"):
+        return statuses
+
+    published = {}
+    for path, status in statuses.items():
+        if status == "published":
+            metadata = read_metadata(path)
+            key = versioning.make_s3_key(
+                metadata["name"],
+                metadata["version"],
+                root_prefix=env.root_prefix,
+                sharded=env.sharded,
+            )
+            published[key] = path
+    indexer.build_index(env, published)
+    return statuses
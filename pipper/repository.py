@@ -1,6 +1,10 @@
 import copy
 
+from pipper import cataloger
 from pipper import environment
+from pipper import indexer
+from pipper import pruner
+from pipper import syncer
 from pipper.environment import Environment
 
 
@@ -25,6 +29,13 @@ def add(env: Environment) -> dict:
     credentials = explode_credentials(env.args.get("aws_credentials"))
     bucket = env.args.get("bucket")
     root_prefix = env.args.get("root_prefix")
+    endpoint_url = env.args.get("endpoint_url")
+    region = env.args.get("region")
+    download_base_url = env.args.get("download_base_url")
+    layout = env.args.get("layout")
+    rate_limit = env.args.get("rate_limit")
+    burst = env.args.get("burst")
+    start_jitter = env.args.get("start_jitter")
     is_default = env.args.get("default")
 
     if name in configs["repositories"]:
@@ -41,6 +52,13 @@ def add(env: Environment) -> dict:
             "bucket": bucket,
             "profile": profile,
             "root_prefix": root_prefix or "pipper",
+            "endpoint_url": endpoint_url,
+            "region": region,
+            "download_base_url": download_base_url,
+            "layout": layout or "legacy",
+            "rate_limit": rate_limit,
+            "burst": burst,
+            "start_jitter": start_jitter,
             "access_key_id": credentials.get("access_key_id"),
             "secret_access_key": credentials[1] if credentials else None,
             "session_token": credentials[2] if credentials else None,
@@ -72,6 +90,13 @@ def modify(env: Environment):
     credentials = explode_credentials(env.args.get("aws_credentials"))
     bucket = env.args.get("bucket")
     root_prefix = env.args.get("root_prefix")
+    endpoint_url = env.args.get("endpoint_url")
+    region = env.args.get("region")
+    download_base_url = env.args.get("download_base_url")
+    layout = env.args.get("layout")
+    rate_limit = env.args.get("rate_limit")
+    burst = env.args.get("burst")
+    start_jitter = env.args.get("start_jitter")
     is_default = env.args.get("default")
 
     if copy_from and copy_from in configs["repository"]:
@@ -82,6 +107,15 @@ def modify(env: Environment):
             "bucket": bucket or existing["bucket"],
             "root_prefix": root_prefix or existing["root_prefix"] or "pipper",
             "profile": profile or existing["profile"],
+            "endpoint_url": endpoint_url or existing.get("endpoint_url"),
+            "region": region or existing.get("region"),
+            "download_base_url": (
+                download_base_url or existing.get("download_base_url")
+            ),
+            "layout": layout or existing.get("layout") or "legacy",
+            "rate_limit": rate_limit or existing.get("rate_limit"),
+            "burst": burst or existing.get("burst"),
+            "start_jitter": start_jitter or existing.get("start_jitter"),
             "access_key_id": creds["access_key_id"],
             "secret_access_key": creds["secret_access_key"],
             "session_token": creds["session_token"],
@@ -150,5 +184,15 @@ def run(env: Environment):
         return list_repos()
     elif action == "exists":
         return repo_exists(env)
+    elif action == "sync":
+        return syncer.sync(env)
+    elif action == "catalog":
+        return cataloger.catalog(env)
+    elif action == "prune":
+        return pruner.prune(env)
+    elif action == "migrate":
+        return syncer.migrate(env)
+    elif action == "build-index":
+        return indexer.build_index(env)
 
     raise ValueError(f'Unknown repository action "{action}"')
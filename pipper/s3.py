@@ -1,5 +1,174 @@
+import collections
+import os
+import random
+import threading
+import time
+import typing
+from concurrent import futures
+
 import boto3
+from botocore import exceptions as botocore_exceptions
 from botocore.client import BaseClient
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from pipper import tracing
+
+#: Client configuration that disables botocore's own retries, which would
+#: otherwise multiply the attempts made by pipper and hide requests from its
+#: counters. Throttled and failed requests are retried by `call` instead.
+CLIENT_CONFIG = Config(retries={"mode": "standard", "total_max_attempts": 1})
+
+#: Error codes returned by S3 when the request rate is too high.
+THROTTLING_CODES = {
+    "503",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+#: Error codes returned by S3 for transient failures of a request.
+TRANSIENT_CODES = {
+    "500",
+    "502",
+    "504",
+    "InternalError",
+    "ServiceUnavailable",
+    "RequestTimeout",
+    "RequestTimeoutException",
+    "PriorRequestNotComplete",
+}
+
+#: Errors raised by botocore when a connection fails or is interrupted.
+TRANSIENT_ERRORS = (
+    botocore_exceptions.ConnectionError,
+    botocore_exceptions.HTTPClientError,
+)
+
+#: Error codes returned by S3 when an object does not exist.
+MISSING_CODES = {"404", "NoSuchKey", "NotFound"}
+
+#: Number of times a throttled or failed request is attempted before giving
+#: up. This is the only retry layer, as botocore's retries are disabled.
+MAX_ATTEMPTS = 5
+
+#: Base and maximum delays in seconds for the exponential backoff between
+#: throttled attempts.
+BACKOFF_BASE = 0.2
+BACKOFF_CAP = 10.0
+
+#: Read-only operations whose identical concurrent calls share one request.
+COALESCED_OPERATIONS = {"head_object", "list_objects_v2"}
+
+#: Idempotent read operations, the only ones that are abandoned at their
+#: deadline or duplicated when hedging is enabled. Object GETs are only
+#: included when they read a byte range, and writes are never repeated while
+#: an abandoned attempt may still be sending its body.
+READ_OPERATIONS = {"head_object", "list_objects_v2", "get_object"}
+
+#: Latency quantile of recent requests of an operation after which hedged
+#: requests of that operation are duplicated.
+DEFAULT_HEDGE_QUANTILE = 0.95
+
+#: Seconds after which hedged requests are duplicated until enough latencies
+#: of the operation have been observed to compute the quantile.
+DEFAULT_HEDGE_DELAY = 1.0
+
+#: Lower bound in seconds of the delay before a hedged request is duplicated,
+#: which keeps very fast operations from being duplicated routinely.
+MIN_HEDGE_DELAY = 0.05
+
+#: Number of recent latencies per operation from which the hedge delay is
+#: computed and the minimum number required to compute it.
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+#: Maximum number of S3 requests with deadlines or hedging in flight at once.
+MAX_REQUEST_THREADS = 64
+
+#: Factor by which the rate limit is reduced when S3 throttles a request.
+RATE_DECREASE_FACTOR = 0.5
+
+#: Requests per second by which the reduced rate limit recovers with each
+#: successful request, up to the configured rate limit.
+RATE_RECOVERY = 0.5
+
+#: Lowest rate limit in requests per second to which throttling reduces it.
+MIN_RATE = 1.0
+
+_counters: typing.Counter[str] = collections.Counter()
+_in_flight: dict[tuple, futures.Future] = {}
+_latencies: dict[str, collections.deque[float]] = collections.defaultdict(
+    lambda: collections.deque(maxlen=LATENCY_WINDOW)
+)
+_settings: dict[str, typing.Any] = {
+    "deadlines": {},
+    "hedge": False,
+    "hedge_quantile": DEFAULT_HEDGE_QUANTILE,
+    "hedge_delay": DEFAULT_HEDGE_DELAY,
+}
+_executor: futures.ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter for the S3 requests of all threads in the process.
+    Tokens accumulate at the rate limit up to the burst size and each request
+    takes one, waiting for it if necessary. The rate limit is reduced
+    multiplicatively when S3 throttles a request and recovers additively with
+    successful requests, so that many hosts sharing a bucket converge on a
+    request rate S3 accepts instead of amplifying bursts with retries.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes a token, waiting until one is available.
+
+        :return:
+            The number of seconds waited for the token.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self.updated
+                self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttled(self):
+        """Reduces the rate limit after S3 throttled a request."""
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate * RATE_DECREASE_FACTOR)
+
+    def succeeded(self):
+        """Recovers the rate limit towards its maximum after a successful request."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + RATE_RECOVERY)
+
+
+_bucket: TokenBucket | None = None
+_start_lock = threading.Lock()
+_start_jitter = {"seconds": 0.0, "done": True}
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when an S3 request does not complete within its deadline."""
 
 
 def session_from_credentials_list(
@@ -34,15 +203,436 @@ def session_from_profile_name(
     return boto3.Session(profile_name=profile_name)
 
 
-def key_exists(s3_client, bucket: str, key: str) -> bool:
-    """ """
+def configure(
+    deadlines: dict[str, float] | None = None,
+    hedge: bool = False,
+    hedge_quantile: float = DEFAULT_HEDGE_QUANTILE,
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    rate_limit: float | None = None,
+    burst: float | None = None,
+    start_jitter: float = 0.0,
+):
+    """
+    Configures the deadlines, hedging and rate limiting of the S3 requests of
+    this process.
+
+    :param deadlines:
+        Maximum number of seconds each attempt of a read operation may take
+        by operation name. The deadline of the "*" entry applies to read
+        operations without their own deadline. Attempts exceeding their
+        deadline are abandoned and retried like throttled attempts.
+    :param hedge:
+        Whether or not to issue a duplicate of listing and metadata requests
+        that take longer than the hedge quantile of their recent latencies.
+        The first response of either request is used.
+    :param hedge_quantile:
+        Latency quantile of recent requests after which requests are hedged.
+    :param hedge_delay:
+        Seconds after which requests are hedged until enough latencies have
+        been observed to compute the quantile.
+    :param rate_limit:
+        Maximum number of S3 requests per second shared by all threads of the
+        process. Requests are not rate limited if None.
+    :param burst:
+        Number of requests that can be made at once before the rate limit
+        applies, which defaults to one second of requests.
+    :param start_jitter:
+        Maximum number of seconds by which the first S3 request of the process
+        is delayed, chosen at random, so that hosts started at the same moment
+        spread their requests.
+    """
+    global _bucket
+    with _lock:
+        _settings.update(
+            deadlines=dict(deadlines or {}),
+            hedge=hedge,
+            hedge_quantile=hedge_quantile,
+            hedge_delay=hedge_delay,
+        )
+        _latencies.clear()
+        _bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+    with _start_lock:
+        _start_jitter.update(seconds=start_jitter, done=not start_jitter)
+
+
+def parse_deadlines(values: list[str] | None) -> dict[str, float]:
+    """
+    Parses deadline command line values, which are either a number of seconds
+    applying to all read operations or an `operation=seconds` pair naming one
+    of the read operations.
+    """
+    deadlines = {}
+    for value in values or []:
+        operation, _, seconds = value.rpartition("=")
+        if operation and operation not in READ_OPERATIONS:
+            raise ValueError(
+                f"Deadlines only apply to the read operations {sorted(READ_OPERATIONS)}"
+                f' and not to "{operation}".'
+            )
+        deadlines[operation or "*"] = float(seconds)
+    return deadlines
+
+
+def get_counters() -> dict[str, int]:
+    """
+    Returns the number of S3 requests made by this process per operation.
+    Throttled attempts are counted as "{operation}.throttled", calls that
+    were served by an identical in-flight request as "{operation}.coalesced",
+    duplicated requests as "{operation}.hedged", duplicates that responded
+    first as "{operation}.hedge_won", attempts that failed transiently as
+    "{operation}.failed", attempts abandoned at their deadline as
+    "{operation}.timeout" and requests that waited for the rate limit as
+    "{operation}.rate_limited".
+    """
+    with _lock:
+        return dict(_counters)
+
+
+def reset_counters():
+    """Resets the per-operation S3 request counters."""
+    with _lock:
+        _counters.clear()
+
+
+def _count(name: str):
+    """Increments the named request counter."""
+    with _lock:
+        _counters[name] += 1
+
+
+def get_error_code(error: ClientError) -> str:
+    """Returns the S3 error code of the client error."""
+    return str(error.response.get("Error", {}).get("Code", ""))
+
+
+def get_hedge_delay(operation: str) -> float:
+    """
+    Returns the number of seconds after which a request of the operation is
+    hedged, which is the hedge quantile of its recent latencies.
+    """
+    with _lock:
+        latencies = sorted(_latencies[operation])
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return _settings["hedge_delay"]
+        index = int(_settings["hedge_quantile"] * (len(latencies) - 1))
+        return max(MIN_HEDGE_DELAY, latencies[index])
+
+
+def _wait_for_start():
+    """
+    Delays the first S3 request of the process by the random start jitter.
+    Requests of other threads wait until the delay has passed.
+    """
+    if _start_jitter["done"]:
+        return
+    with _start_lock:
+        if not _start_jitter["done"]:
+            time.sleep(random.uniform(0, _start_jitter["seconds"]))
+            _start_jitter["done"] = True
+
+
+def _timed_call(s3_client: BaseClient, operation: str, kwargs: dict) -> typing.Any:
+    """
+    Calls the S3 client operation within the rate limit and records its
+    latency.
+    """
+    _wait_for_start()
+    bucket = _bucket
+    if bucket is not None and bucket.acquire() > 0:
+        _count(f"{operation}.rate_limited")
+
+    started = time.monotonic()
+    response = getattr(s3_client, operation)(**kwargs)
+    with _lock:
+        _latencies[operation].append(time.monotonic() - started)
+    if bucket is not None:
+        bucket.succeeded()
+    return response
+
+
+def _get_executor() -> futures.ThreadPoolExecutor:
+    """Returns the thread pool making requests with deadlines or hedging."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(
+                max_workers=MAX_REQUEST_THREADS, thread_name_prefix="pipper-s3"
+            )
+        return _executor
+
+
+def is_read(operation: str, kwargs: dict) -> bool:
+    """
+    Whether or not the request is an idempotent read that can be abandoned
+    or duplicated safely, i.e. a listing, a head request or a ranged GET.
+    """
+    if operation == "get_object":
+        return "Range" in kwargs
+    return operation in READ_OPERATIONS
+
+
+def _attempt(s3_client: BaseClient, operation: str, kwargs: dict) -> typing.Any:
+    """
+    Makes a single attempt of the S3 request. Writes and other requests that
+    are not idempotent reads, or reads without a deadline or hedging, are
+    made directly. Otherwise the request is made in a background thread,
+    duplicated if it is hedged and slower than usual, and abandoned at its
+    deadline. The first response of the original and the duplicate request
+    is returned, or raised if it is an error.
+    """
+    if not is_read(operation, kwargs):
+        return _timed_call(s3_client, operation, kwargs)
+
+    with _lock:
+        deadlines = _settings["deadlines"]
+        deadline = deadlines.get(operation, deadlines.get("*"))
+        hedged = _settings["hedge"]
+    if deadline is None and not hedged:
+        return _timed_call(s3_client, operation, kwargs)
+
+    started = time.monotonic()
+    executor = _get_executor()
+    original = executor.submit(_timed_call, s3_client, operation, kwargs)
+    pending = {original}
+    if hedged:
+        delay = get_hedge_delay(operation)
+        if not futures.wait(pending, timeout=min(delay, deadline or delay)).done:
+            _count(f"{operation}.hedged")
+            pending.add(executor.submit(_timed_call, s3_client, operation, kwargs))
+
+    elapsed = time.monotonic() - started
+    timeout = None if deadline is None else max(0.0, deadline - elapsed)
+    done, _ = futures.wait(
+        pending, timeout=timeout, return_when=futures.FIRST_COMPLETED
+    )
+    if not done:
+        _count(f"{operation}.timeout")
+        raise DeadlineExceededError(f'S3 "{operation}" request exceeded {deadline}s')
+
+    winner = original if original in done else next(iter(done))
+    if winner is not original:
+        _count(f"{operation}.hedge_won")
+    return winner.result()
+
+
+def get_retry_reason(error: Exception) -> str | None:
+    """
+    Returns why a request that failed with the error is retried, which is
+    "throttled" or "failed", or None if the error is not retried.
+    """
+    if isinstance(error, TRANSIENT_ERRORS):
+        return "failed"
+    if not isinstance(error, ClientError):
+        return None
+    code = get_error_code(error)
+    if code in THROTTLING_CODES:
+        return "throttled"
+    return "failed" if code in TRANSIENT_CODES else None
+
+
+def _call_with_backoff(s3_client: BaseClient, operation: str, **kwargs) -> typing.Any:
+    """
+    Calls the S3 client operation and retries it with an exponential backoff
+    and full jitter when the request rate is throttled or the request fails
+    transiently. Attempts that exceed their deadline are retried immediately.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        _count(operation)
+        try:
+            return _attempt(s3_client, operation, kwargs)
+        except DeadlineExceededError:
+            if attempt == MAX_ATTEMPTS:
+                raise
+        except (ClientError, *TRANSIENT_ERRORS) as error:
+            reason = get_retry_reason(error)
+            if reason is None:
+                raise
+            _count(f"{operation}.{reason}")
+            if reason == "throttled" and _bucket is not None:
+                _bucket.throttled()
+            if attempt == MAX_ATTEMPTS:
+                raise
+            delay = min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt)
+            time.sleep(random.uniform(0, delay))
+
+
+def call(s3_client: BaseClient, operation: str, **kwargs) -> typing.Any:
+    """
+    Makes an S3 request through the client. All S3 requests made by pipper
+    go through this function, which counts them per operation, backs off when
+    S3 throttles the request rate and coalesces identical read-only requests
+    that are in flight at the same time into a single request. Coalesced
+    callers receive the same response object, which must not be modified.
+
+    :param s3_client:
+        The S3 client with which to make the request.
+    :param operation:
+        Name of the S3 client method to call, e.g. "head_object".
+    :param kwargs:
+        Keyword arguments for the S3 client method.
+    """
+    tracing.add("s3_calls")
+    if operation not in COALESCED_OPERATIONS:
+        return _call_with_backoff(s3_client, operation, **kwargs)
+
+    identifier = (id(s3_client), operation, tuple(sorted(kwargs.items())))
+    future: futures.Future = futures.Future()
+    with _lock:
+        pending = _in_flight.setdefault(identifier, future)
+
+    if pending is not future:
+        _count(f"{operation}.coalesced")
+        return pending.result()
+
     try:
-        response = s3_client.list_objects(Bucket=bucket, Prefix=key, MaxKeys=1)
-        return len(response["Contents"]) > 0
-    except Exception:
-        return False
+        response = _call_with_backoff(s3_client, operation, **kwargs)
+        future.set_result(response)
+        return response
+    except BaseException as error:
+        future.set_exception(error)
+        raise
+    finally:
+        with _lock:
+            _in_flight.pop(identifier, None)
+
+
+def key_exists(s3_client: BaseClient, bucket: str, key: str) -> bool:
+    """
+    Determines whether or not the object exists with a single head request.
+    Errors other than a missing object, e.g. denied access or throttling that
+    persisted after retrying, are raised instead of being treated as missing.
+
+    :param s3_client:
+        The S3 client with which to make the request.
+    :param bucket:
+        Name of the S3 bucket in which to look for the object.
+    :param key:
+        The S3 key of the object.
+    """
+    try:
+        call(s3_client, "head_object", Bucket=bucket, Key=key)
+        return True
+    except ClientError as error:
+        if get_error_code(error) in MISSING_CODES:
+            return False
+        raise
+
+
+def keys_exist(s3_client: BaseClient, bucket: str, keys: list[str]) -> set[str]:
+    """
+    Determines which of the keys exist with as few requests as possible. The
+    keys are grouped by their parent prefix and each group is checked with a
+    single, paginated listing of the longest prefix the keys in the group
+    have in common instead of one head request per key.
+
+    :param s3_client:
+        The S3 client with which to make the requests.
+    :param bucket:
+        Name of the S3 bucket in which to look for the objects.
+    :param keys:
+        The S3 keys to look for.
+    :return:
+        The subset of the keys that exist in the bucket.
+    """
+    groups: dict[str, set[str]] = collections.defaultdict(set)
+    for key in keys:
+        groups[key.rsplit("/", 1)[0]].add(key)
+
+    existing: set[str] = set()
+    for group in groups.values():
+        existing.update(
+            entry["Key"]
+            for entry in list_all_objects(
+                s3_client, bucket, os.path.commonprefix(list(group))
+            )
+            if entry["Key"] in group
+        )
+    return existing
 
 
 def list_objects(s3_client: BaseClient, bucket: str, prefix: str, **kwargs) -> dict:
-    """..."""
-    return s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix, **kwargs)
+    """
+    Lists a single page of the objects in the bucket that start with the prefix.
+
+    :param s3_client:
+        The S3 client with which to make the request.
+    :param bucket:
+        Name of the S3 bucket to list.
+    :param prefix:
+        The key prefix of the objects to list.
+    :param kwargs:
+        Additional arguments for the list_objects_v2 request, e.g. the
+        ContinuationToken of the next page.
+    """
+    return call(s3_client, "list_objects_v2", Bucket=bucket, Prefix=prefix, **kwargs)
+
+
+def list_all_objects(
+    s3_client: BaseClient, bucket: str, prefix: str
+) -> typing.Iterator[dict]:
+    """
+    Iterates over the entries of all the objects in the bucket that start with
+    the prefix, requesting the next page of the listing as needed.
+
+    :param s3_client:
+        The S3 client with which to make the requests.
+    :param bucket:
+        Name of the S3 bucket to list.
+    :param prefix:
+        The key prefix of the objects to list.
+    """
+    continuation_kwargs: dict = {}
+    while True:
+        response = list_objects(s3_client, bucket, prefix, **continuation_kwargs)
+        yield from response.get("Contents") or []
+        token = response.get("NextContinuationToken")
+        if not token:
+            return
+        continuation_kwargs = {"ContinuationToken": token}
+
+
+def list_all_prefixes(
+    s3_client: BaseClient, bucket: str, prefix: str
+) -> typing.Iterator[str]:
+    """
+    Iterates over the common prefixes one level below the prefix, i.e. the
+    "directories" it contains, using a delimited listing that does not
+    enumerate the objects within them.
+
+    :param s3_client:
+        The S3 client with which to make the requests.
+    :param bucket:
+        Name of the S3 bucket to list.
+    :param prefix:
+        The key prefix to list, which should end with a "/".
+    """
+    continuation_kwargs: dict = {}
+    while True:
+        response = list_objects(
+            s3_client, bucket, prefix, Delimiter="/", **continuation_kwargs
+        )
+        for entry in response.get("CommonPrefixes") or []:
+            yield entry["Prefix"]
+        token = response.get("NextContinuationToken")
+        if not token:
+            return
+        continuation_kwargs = {"ContinuationToken": token}
+
+
+def download_file(s3_client: BaseClient, bucket: str, key: str, path: str):
+    """
+    Downloads the object to the local path with the managed transfer of the
+    S3 client. The transfer goes through `call` like every other request, so
+    it is counted, rate limited and retried as a whole when it is throttled
+    or fails transiently.
+
+    :param s3_client:
+        The S3 client with which to download the object.
+    :param bucket:
+        Name of the S3 bucket containing the object.
+    :param key:
+        The S3 key of the object to download.
+    :param path:
+        Local path where the downloaded file will be saved.
+    """
+    call(s3_client, "download_file", Bucket=bucket, Key=key, Filename=path)
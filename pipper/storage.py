@@ -0,0 +1,465 @@
+import abc
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import typing
+from contextlib import closing
+from urllib.parse import quote
+
+import requests
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+
+from pipper import s3
+
+#: URL scheme of repositories that reside in a local directory.
+LOCAL_SCHEME = "file://"
+
+#: Number of seconds to wait for a proxy server to respond.
+HTTP_TIMEOUT = 60
+
+#: Maximum number of objects deleted by a single S3 request.
+DELETE_BATCH_SIZE = 1000
+
+#: Directory within a local repository in which the object metadata is stored
+#: alongside the objects as JSON sidecar files.
+LOCAL_METADATA_DIRECTORY = ".metadata"
+
+
+class Storage(abc.ABC):
+    """
+    Interface of the storage backends in which pipper repositories reside.
+    Objects are addressed by keys, like S3 objects, and listing entries and
+    head responses follow the S3 response structure so that all backends can
+    be used interchangeably. Backends must implement every abstract method,
+    so that incomplete backends cannot be created.
+    """
+
+    @property
+    @abc.abstractmethod
+    def location(self) -> str:
+        """URL identifying the root of the storage backend."""
+
+    @abc.abstractmethod
+    def list_objects(self, prefix: str) -> typing.Iterator[dict]:
+        """
+        Iterates over the entries of the objects whose keys start with the
+        prefix. Each entry contains the "Key", "Size", "ETag" and
+        "LastModified" of the object.
+        """
+
+    def list_prefixes(self, prefix: str) -> typing.Iterator[str]:
+        """
+        Iterates over the prefixes one level below the prefix, which must end
+        with a "/", e.g. `pipper/foo/` for the prefix `pipper/`. By default
+        these are derived from the listing of all objects below the prefix.
+        """
+        children: set[str] = set()
+        for entry in self.list_objects(prefix):
+            head, separator, _ = entry["Key"][len(prefix) :].partition("/")
+            child = f"{prefix}{head}/"
+            if separator and child not in children:
+                children.add(child)
+                yield child
+
+    @abc.abstractmethod
+    def head(self, key: str) -> dict | None:
+        """
+        Returns the "Metadata", "ContentLength", "ETag" and "LastModified" of
+        the object, or None if the object does not exist.
+        """
+
+    @abc.abstractmethod
+    def get(self, key: str, path: str):
+        """Downloads the object to the local path."""
+
+    @abc.abstractmethod
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        """Reads the bytes of the object from start up to and including end."""
+
+    @abc.abstractmethod
+    def put(
+        self,
+        key: str,
+        path: str,
+        metadata: dict,
+        acl: str | None = None,
+        content_type: str = "application/zip",
+    ):
+        """Uploads the local file as the object with the given metadata."""
+
+    @abc.abstractmethod
+    def presign(self, key: str, expires_in: int) -> str:
+        """Creates a URL that grants temporary read access to the object."""
+
+    @abc.abstractmethod
+    def delete(self, keys: list[str]):
+        """Deletes the objects with as few requests as possible."""
+
+    def exists(self, key: str) -> bool:
+        """Determines whether or not the object exists."""
+        return self.head(key) is not None
+
+    def copy(self, source: "Storage", source_key: str, key: str):
+        """
+        Copies the object, including its metadata, from the source backend by
+        downloading it to a temporary file and uploading it from there.
+        """
+        response = source.head(source_key)
+        if response is None:
+            raise FileNotFoundError(f'Object "{source_key}" does not exist.')
+
+        with tempfile.TemporaryDirectory(prefix="pipper-copy-") as directory:
+            path = os.path.join(directory, "object")
+            source.get(source_key, path)
+            self.put(key, path, response.get("Metadata") or {})
+
+    def keys_exist(self, keys: list[str]) -> set[str]:
+        """Returns the subset of the keys for which objects exist."""
+        return {key for key in keys if self.exists(key)}
+
+
+class S3Storage(Storage):
+    """
+    Storage backend for repositories in an S3 bucket, or in a bucket of an
+    S3-compatible service such as MinIO when the client was created with a
+    custom endpoint URL.
+    """
+
+    def __init__(self, s3_client: BaseClient, bucket: str):
+        self.s3_client = s3_client
+        self.bucket = bucket
+
+    @property
+    def location(self) -> str:
+        return f"s3://{self.bucket}"
+
+    def list_objects(self, prefix: str) -> typing.Iterator[dict]:
+        return s3.list_all_objects(self.s3_client, self.bucket, prefix)
+
+    def list_prefixes(self, prefix: str) -> typing.Iterator[str]:
+        return s3.list_all_prefixes(self.s3_client, self.bucket, prefix)
+
+    def head(self, key: str) -> dict | None:
+        try:
+            return s3.call(self.s3_client, "head_object", Bucket=self.bucket, Key=key)
+        except ClientError as error:
+            if s3.get_error_code(error) in s3.MISSING_CODES:
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return s3.key_exists(self.s3_client, self.bucket, key)
+
+    def keys_exist(self, keys: list[str]) -> set[str]:
+        return s3.keys_exist(self.s3_client, self.bucket, keys)
+
+    def get(self, key: str, path: str):
+        s3.download_file(self.s3_client, self.bucket, key, path)
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = s3.call(
+            self.s3_client,
+            "get_object",
+            Bucket=self.bucket,
+            Key=key,
+            Range=f"bytes={start}-{end}",
+        )
+        return response["Body"].read()
+
+    def put(
+        self,
+        key: str,
+        path: str,
+        metadata: dict,
+        acl: str | None = None,
+        content_type: str = "application/zip",
+    ):
+        with open(path, "rb") as f:
+            s3.call(
+                self.s3_client,
+                "put_object",
+                ACL=acl or "private",
+                Body=f,
+                Bucket=self.bucket,
+                Key=key,
+                ContentType=content_type,
+                ContentLength=os.path.getsize(path),
+                Metadata=metadata,
+            )
+
+    def copy(self, source: Storage, source_key: str, key: str):
+        if not isinstance(source, S3Storage):
+            super().copy(source, source_key, key)
+            return
+
+        # Objects are copied server-side between buckets without passing
+        # through this host, which also preserves their metadata.
+        s3.call(
+            self.s3_client,
+            "copy_object",
+            ACL="private",
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": source.bucket, "Key": source_key},
+            MetadataDirective="COPY",
+        )
+
+    def presign(self, key: str, expires_in: int) -> str:
+        return self.s3_client.generate_presigned_url(
+            ClientMethod="get_object",
+            ExpiresIn=expires_in,
+            Params={"Bucket": self.bucket, "Key": key},
+        )
+
+    def delete(self, keys: list[str]):
+        for index in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[index : index + DELETE_BATCH_SIZE]
+            response = s3.call(
+                self.s3_client,
+                "delete_objects",
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            errors = response.get("Errors") or []
+            if errors:
+                failed = ", ".join(error["Key"] for error in errors)
+                raise RuntimeError(
+                    f"Failed to delete {len(errors)} object(s): {failed}"
+                )
+
+
+class LocalStorage(Storage):
+    """
+    Storage backend for repositories in a local directory, e.g. an on-host
+    mirror of a remote repository. Objects are stored as files at their key
+    path within the directory and their metadata is stored in JSON sidecar
+    files within the metadata directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = pathlib.Path(directory).expanduser().absolute()
+
+    @property
+    def location(self) -> str:
+        return self.directory.as_uri()
+
+    def _resolve(self, path: pathlib.Path, key: str) -> pathlib.Path:
+        """
+        Raises an error for keys that resolve to paths outside of the
+        repository directory, e.g. absolute keys or keys containing "..".
+        """
+        if not path.resolve().is_relative_to(self.directory.resolve()):
+            raise ValueError(f'Key "{key}" is outside of the repository directory')
+        return path
+
+    def _get_path(self, key: str) -> pathlib.Path:
+        return self._resolve(self.directory.joinpath(key), key)
+
+    def _get_metadata_path(self, key: str) -> pathlib.Path:
+        path = self.directory.joinpath(LOCAL_METADATA_DIRECTORY, f"{key}.json")
+        return self._resolve(path, key)
+
+    def _read_sidecar(self, key: str) -> dict:
+        path = self._get_metadata_path(key)
+        return json.loads(path.read_text()) if path.exists() else {}
+
+    def _get_entry(self, key: str, sidecar: dict) -> dict:
+        stat = self._get_path(key).stat()
+        return {
+            "Key": key,
+            "Size": stat.st_size,
+            "ETag": sidecar.get("ETag") or _compute_etag(self._get_path(key)),
+            "LastModified": datetime.datetime.fromtimestamp(
+                stat.st_mtime, tz=datetime.UTC
+            ),
+        }
+
+    def list_objects(self, prefix: str) -> typing.Iterator[dict]:
+        # Only the deepest directory containing the whole prefix needs to be
+        # walked instead of the entire repository.
+        directory = self._get_path(prefix.rsplit("/", 1)[0] if "/" in prefix else "")
+        if not directory.is_dir():
+            return
+
+        for root, directories, filenames in os.walk(directory):
+            directories[:] = sorted(
+                d for d in directories if d != LOCAL_METADATA_DIRECTORY
+            )
+            for filename in sorted(filenames):
+                path = pathlib.Path(root, filename)
+                key = path.relative_to(self.directory).as_posix()
+                if key.startswith(prefix):
+                    yield self._get_entry(key, self._read_sidecar(key))
+
+    def list_prefixes(self, prefix: str) -> typing.Iterator[str]:
+        directory = self._get_path(prefix)
+        if not directory.is_dir():
+            return
+
+        for path in sorted(directory.iterdir()):
+            if path.is_dir() and path.name != LOCAL_METADATA_DIRECTORY:
+                yield f"{prefix}{path.name}/"
+
+    def head(self, key: str) -> dict | None:
+        if not self._get_path(key).is_file():
+            return None
+
+        sidecar = self._read_sidecar(key)
+        entry = self._get_entry(key, sidecar)
+        return {
+            "Metadata": sidecar.get("Metadata") or {},
+            "ContentLength": entry["Size"],
+            "ETag": entry["ETag"],
+            "LastModified": entry["LastModified"],
+        }
+
+    def exists(self, key: str) -> bool:
+        return self._get_path(key).is_file()
+
+    def get(self, key: str, path: str):
+        shutil.copyfile(self._get_path(key), path)
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        with self._get_path(key).open("rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    def put(
+        self,
+        key: str,
+        path: str,
+        metadata: dict,
+        acl: str | None = None,
+        content_type: str = "application/zip",
+    ):
+        destination = self._get_path(key)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, destination)
+
+        sidecar_path = self._get_metadata_path(key)
+        sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+        sidecar = {"Metadata": metadata, "ETag": _compute_etag(destination)}
+        sidecar_path.write_text(json.dumps(sidecar))
+
+    def presign(self, key: str, expires_in: int) -> str:
+        # Local files are readable by anyone with access to the host and so
+        # their URLs do not expire.
+        return self._get_path(key).as_uri()
+
+    def delete(self, keys: list[str]):
+        for key in keys:
+            self._get_path(key).unlink(missing_ok=True)
+            self._get_metadata_path(key).unlink(missing_ok=True)
+
+
+class HttpStorage(Storage):
+    """
+    Read-only storage backend for repositories served over HTTP by a pipper
+    proxy server, which caches the repository for the hosts using it.
+    """
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+
+    @property
+    def location(self) -> str:
+        return self.url
+
+    def _get_url(self, route: str, key: str) -> str:
+        return f"{self.url}/{route}/{quote(key)}"
+
+    def list_objects(self, prefix: str) -> typing.Iterator[dict]:
+        response = requests.get(
+            f"{self.url}/list", params={"prefix": prefix}, timeout=HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        for entry in response.json()["Contents"]:
+            yield {
+                **entry,
+                "LastModified": datetime.datetime.fromisoformat(entry["LastModified"]),
+            }
+
+    def head(self, key: str) -> dict | None:
+        response = requests.get(self._get_url("head", key), timeout=HTTP_TIMEOUT)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = response.json()
+        return {
+            **data,
+            "LastModified": datetime.datetime.fromisoformat(data["LastModified"]),
+        }
+
+    def get(self, key: str, path: str):
+        url = self._get_url("objects", key)
+        with closing(requests.get(url, stream=True, timeout=HTTP_TIMEOUT)) as response:
+            response.raise_for_status()
+            with open(path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = requests.get(
+            self._get_url("objects", key),
+            headers={"Range": f"bytes={start}-{end}"},
+            timeout=HTTP_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.content
+
+    def put(
+        self,
+        key: str,
+        path: str,
+        metadata: dict,
+        acl: str | None = None,
+        content_type: str = "application/zip",
+    ):
+        raise PermissionError("Pipper files cannot be published through a proxy.")
+
+    def presign(self, key: str, expires_in: int) -> str:
+        # The proxy serves files without authorization, so its URLs are used
+        # as they are.
+        return self._get_url("objects", key)
+
+    def delete(self, keys: list[str]):
+        raise PermissionError("Pipper files cannot be deleted through a proxy.")
+
+
+def _compute_etag(path: pathlib.Path) -> str:
+    """Computes an S3 style ETag, the quoted md5 hash, of the local file."""
+    with path.open("rb") as f:
+        return '"{}"'.format(hashlib.file_digest(f, "md5").hexdigest())
+
+
+def is_http(location: str) -> bool:
+    """Determines whether or not the location refers to a proxy server."""
+    return location.startswith(("http://", "https://"))
+
+
+def is_local(location: str) -> bool:
+    """Determines whether or not the location refers to a local repository."""
+    return location.startswith(LOCAL_SCHEME)
+
+
+def create_storage(location: str, s3_client: BaseClient) -> Storage:
+    """
+    Creates the storage backend for the repository location, which is either
+    the name of an S3 bucket, a file:// URL of a local directory or the
+    http(s):// URL of a pipper proxy server.
+
+    :param location:
+        The bucket name or local directory URL of the repository.
+    :param s3_client:
+        The S3 client used when the location is an S3 bucket.
+    """
+    if is_http(location):
+        return HttpStorage(location)
+    if is_local(location):
+        return LocalStorage(location[len(LOCAL_SCHEME) :])
+    return S3Storage(s3_client, location)
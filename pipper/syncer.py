@@ -0,0 +1,215 @@
+from concurrent import futures
+
+from pipper import storage
+from pipper import versioning
+from pipper.environment import Environment
+
+#: Number of pipper files copied concurrently when not specified by the command.
+DEFAULT_JOBS = 8
+
+
+def parse_location(env: Environment, location: str) -> tuple[storage.Storage, str]:
+    """
+    Parses a repository location into its storage backend and root prefix.
+    Locations are either a bucket name, an `s3://bucket/root-prefix` URL or a
+    `file:///directory` URL. Unless the location specifies a root prefix, the
+    root prefix of the environment is used.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :param location:
+        The repository location to parse.
+    """
+    if location.startswith("s3://"):
+        bucket, _, root_prefix = location[len("s3://") :].partition("/")
+        backend = storage.S3Storage(env.s3_client, bucket)
+        return backend, root_prefix.strip("/") or env.root_prefix
+
+    return storage.create_storage(location, env.s3_client), env.root_prefix
+
+
+def list_entries(
+    backend: storage.Storage,
+    root_prefix: str,
+    package_names: list[str] | None = None,
+    version_prefix: str | None = None,
+) -> dict[str, dict]:
+    """
+    Lists the pipper files in the repository that match the package and
+    version filters with one listing per package, or a single listing of the
+    whole repository when no packages are specified.
+
+    :param backend:
+        Storage backend of the repository.
+    :param root_prefix:
+        Root prefix of the repository within the storage backend.
+    :param package_names:
+        Names of the packages to list. All packages are listed if empty.
+    :param version_prefix:
+        A constraining version prefix, which may include wildcard characters.
+    :return:
+        A dictionary mapping the keys of the pipper files relative to the
+        root prefix to their listing entries.
+    """
+    # Packages are listed in both layouts, as repositories being migrated to
+    # the sharded layout contain both.
+    key_prefixes = [
+        versioning.make_s3_key_prefix(name, version_prefix, root_prefix, sharded)
+        for name in package_names or []
+        for sharded in (False, True)
+    ] or [f"{root_prefix}/"]
+    version_start = versioning.serialize_prefix(version_prefix or "").split("*")[0]
+
+    entries: dict[str, dict] = {}
+    for key_prefix in key_prefixes:
+        for entry in backend.list_objects(key_prefix):
+            relative_key = entry["Key"][len(root_prefix) + 1 :]
+            filename = relative_key.rsplit("/", 1)[-1]
+            if filename.endswith(".pipper") and filename.startswith(version_start):
+                entries[relative_key] = entry
+    return entries
+
+
+def find_changes(source: dict[str, dict], destination: dict[str, dict]) -> list[str]:
+    """
+    Determines which pipper files are missing from the destination or differ
+    from the source by comparing their ETags. ETags of local files are their
+    md5 hashes, which match those of S3 objects uploaded in a single part.
+
+    :param source:
+        Listing entries of the source repository by relative key.
+    :param destination:
+        Listing entries of the destination repository by relative key.
+    :return:
+        The sorted relative keys of the pipper files that need to be copied.
+    """
+    return sorted(
+        key
+        for key, entry in source.items()
+        if (destination.get(key) or {}).get("ETag") != entry["ETag"]
+    )
+
+
+def copy_many(
+    source: storage.Storage,
+    destination: storage.Storage,
+    copies: list[tuple[str, str]],
+    jobs: int,
+):
+    """
+    Copies the pipper files concurrently from the source repository to the
+    destination repository. Copies between S3 buckets are made server-side.
+    Pending copies are cancelled after the first failure.
+
+    :param source:
+        Storage backend of the source repository.
+    :param destination:
+        Storage backend of the destination repository.
+    :param copies:
+        Pairs of the source and destination keys of the pipper files to copy.
+    :param jobs:
+        Maximum number of pipper files copied concurrently.
+    """
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {
+            executor.submit(destination.copy, source, source_key, key): key
+            for source_key, key in copies
+        }
+        try:
+            for future in futures.as_completed(pending):
+                future.result()
+                print(f"[COPIED]: {pending[future]}")
+        except Exception:
+            for future in pending:
+                future.cancel()
+            raise
+
+
+def sync(env: Environment) -> list[str]:
+    """
+    Incrementally mirrors a pipper repository to another bucket, prefix or
+    local directory by copying only the pipper files that are missing from
+    the destination or differ from the source.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :return:
+        The keys, relative to the root prefixes, of the copied pipper files.
+    """
+    source, source_prefix = parse_location(env, env.args["source"])
+    destination, destination_prefix = parse_location(env, env.args["destination"])
+    package_names = env.args.get("package_names") or []
+    version_prefix = env.args.get("version_prefix")
+
+    source_entries = list_entries(source, source_prefix, package_names, version_prefix)
+    destination_entries = list_entries(
+        destination, destination_prefix, package_names, version_prefix
+    )
+    changes = find_changes(source_entries, destination_entries)
+
+    source_location = f"{source.location}/{source_prefix}"
+    destination_location = f"{destination.location}/{destination_prefix}"
+    print(
+        f"[SYNCING]: {len(changes)} of {len(source_entries)} pipper files "
+        f"from {source_location} to {destination_location}"
+    )
+
+    if env.args.get("dry_run"):
+        for key in changes:
+            print(f"[DRY-RUN]: Would copy {key}")
+        return changes
+
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    copies = [(f"{source_prefix}/{k}", f"{destination_prefix}/{k}") for k in changes]
+    copy_many(source, destination, copies, jobs)
+
+    print(f"[SYNCED]: {len(changes)} pipper files copied")
+    return changes
+
+
+def migrate(env: Environment) -> list[tuple[str, str]]:
+    """
+    Migrates the pipper files of the repository to the sharded or the legacy
+    key layout by copying them to their keys in the target layout. Unless the
+    delete flag is set, the pipper files remain at their original keys as
+    well, so clients that have not been configured with the target layout yet
+    keep working.
+
+    :param env:
+        Configuration data for the execution environment for this command invocation.
+    :return:
+        Pairs of the original and target keys of the migrated pipper files.
+    """
+    backend = env.storage
+    sharded = env.args.get("target_layout") == versioning.layout.SHARDED_LAYOUT
+    keys = {
+        entry["Key"]
+        for entry in backend.list_objects(f"{env.root_prefix}/")
+        if entry["Key"].endswith(".pipper")
+    }
+
+    migrations = []
+    for key in sorted(keys):
+        remote = versioning.RemoteVersion(bucket=env.bucket, key=key)
+        target = versioning.make_s3_key(
+            remote.package_name, remote.safe_version, env.root_prefix, sharded
+        )
+        if target != key:
+            migrations.append((key, target))
+
+    copies = [(key, target) for key, target in migrations if target not in keys]
+    print(f"[MIGRATING]: {len(migrations)} of {len(keys)} pipper files")
+    if env.args.get("dry_run"):
+        for key, target in migrations:
+            print(f"[DRY-RUN]: Would migrate {key} -> {target}")
+        return migrations
+
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    copy_many(backend, backend, copies, jobs)
+
+    if env.args.get("delete"):
+        backend.delete([key for key, _ in migrations])
+        print(f"[DELETED]: {len(migrations)} pipper files at their original keys")
+
+    print(f"[MIGRATED]: {len(migrations)} pipper files")
+    return migrations
@@ -0,0 +1,5 @@
+import sys
+
+from pipper.tests.benchmarks import runner
+
+sys.exit(runner.main())
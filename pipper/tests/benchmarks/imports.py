@@ -0,0 +1,152 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+from pipper import bundler
+from pipper import installer
+
+#: Number of modules in the imported package by default.
+DEFAULT_MODULES = 200
+
+#: Name of the imported package.
+PACKAGE_NAME = "imported"
+
+#: Code run in a new interpreter that prints the seconds taken by the import.
+TIMER = (
+    "import time; started = time.perf_counter(); import {name}; "
+    "print(time.perf_counter() - started)"
+)
+
+#: Source of each module, which is large enough for compiling it to dominate
+#: the time it takes to import the module without bytecode.
+MODULE_SOURCE = "\n\n".join(
+    f"def function_{index}(values):\n"
+    f"    return [value * {index} for value in values if value % 2]"
+    for index in range(50)
+)
+
+
+def write_wheel(path: pathlib.Path, modules: int):
+    """Writes a wheel of a package that imports all of its modules."""
+    imports = "\n".join(f"from . import module_{i}" for i in range(modules))
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr(f"{PACKAGE_NAME}/__init__.py", imports + "\n")
+        for index in range(modules):
+            zipper.writestr(f"{PACKAGE_NAME}/module_{index}.py", MODULE_SOURCE)
+        zipper.writestr(
+            f"{PACKAGE_NAME}-1.0.0.dist-info/METADATA",
+            f"Metadata-Version: 2.1\nName: {PACKAGE_NAME}\nVersion: 1.0.0\n",
+        )
+
+
+def install(wheel_path: pathlib.Path, directory: pathlib.Path, overlay: bool):
+    """
+    Extracts the wheel into the directory like an installation without
+    bytecode compilation, then lays down a bytecode overlay for the running
+    interpreter from a pipper bundle if specified.
+    """
+    with zipfile.ZipFile(wheel_path) as zipper:
+        zipper.extractall(directory)
+    if not overlay:
+        return
+
+    bundle_directory = directory.parent.joinpath(f"{directory.name}-bundle")
+    bundle_directory.mkdir()
+    python_version = "{}.{}".format(*sys.version_info[:2])
+    with contextlib.redirect_stdout(io.StringIO()):
+        cache_tag, filename = bundler.create_bytecode_overlay(
+            str(wheel_path), str(bundle_directory), python_version
+        )
+        bundle_path = bundle_directory.joinpath("package.pipper")
+        with zipfile.ZipFile(bundle_path, "w") as zipper:
+            zipper.write(bundle_directory.joinpath(filename), filename)
+        metadata = {"name": PACKAGE_NAME, "bytecode": {cache_tag: filename}}
+        installer.install_bytecode_overlay(str(bundle_path), metadata, str(directory))
+
+
+def time_import(directory: pathlib.Path, repeat: int) -> float:
+    """
+    Returns the median seconds taken to import the package in a new
+    interpreter. Bytecode is not written so that every import is cold.
+    """
+    env = {**os.environ, "PYTHONPATH": str(directory)}
+    code = TIMER.format(name=PACKAGE_NAME)
+    durations = [
+        float(
+            subprocess.run(
+                [sys.executable, "-B", "-c", code],
+                capture_output=True,
+                check=True,
+                env=env,
+                text=True,
+            ).stdout
+        )
+        for _ in range(repeat)
+    ]
+    return statistics.median(durations)
+
+
+def measure(modules: int = DEFAULT_MODULES, repeat: int = 5) -> dict:
+    """
+    Times cold-start imports of a package installed without bytecode, which
+    compiles every module on import, and with the precompiled bytecode
+    overlay of its pipper bundle.
+
+    :param modules:
+        Number of modules in the imported package.
+    :param repeat:
+        Number of timed imports of each installation.
+    :return:
+        Median seconds per import of each installation, along with the
+        speedup of the overlay.
+    """
+    with tempfile.TemporaryDirectory(prefix="pipper-benchmarks-") as directory:
+        root = pathlib.Path(directory)
+        wheel_path = root.joinpath(f"{PACKAGE_NAME}-1.0.0-py3-none-any.whl")
+        write_wheel(wheel_path, modules)
+        results = {}
+        for name, overlay in (("source", False), ("overlay", True)):
+            install(wheel_path, root.joinpath(name), overlay)
+            results[name] = round(time_import(root.joinpath(name), repeat), 6)
+
+    return {
+        "python": sys.implementation.cache_tag,
+        "modules": modules,
+        "seconds": results,
+        "speedup": round(results["source"] / results["overlay"], 2),
+    }
+
+
+def main(cli_args: list[str] | None = None):
+    """Runs the cold-start import benchmark of the bytecode overlays."""
+    parser = argparse.ArgumentParser(
+        prog="python -m pipper.tests.benchmarks.imports",
+        description="Benchmarks cold-start imports with bytecode overlays.",
+    )
+    parser.add_argument("--modules", type=int, default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="Writes the results as JSON.")
+    args = parser.parse_args(cli_args)
+
+    results = measure(args.modules, args.repeat)
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    seconds = results["seconds"]
+    print(f"{'Source':>10}{'Overlay':>10}  Seconds/import ({results['python']})")
+    print(
+        f"{seconds['source']:>10.4f}{seconds['overlay']:>10.4f}  "
+        f"{results['speedup']}x with {results['modules']} modules"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import pathlib
+import platform
+import statistics
+import tempfile
+import time
+import typing
+
+import pipper
+from pipper import environment
+from pipper import s3
+from pipper.tests import fake_s3
+from pipper.tests.benchmarks import scenarios
+
+#: Baseline results stored with the benchmarks.
+BASELINE_PATH = pathlib.Path(__file__).parent.joinpath("baseline.json")
+
+#: Latency in seconds injected into every request to the fake S3 server.
+DEFAULT_LATENCY = 0.005
+
+#: Fraction by which the median duration of a benchmark may exceed the
+#: baseline before it is reported as a regression.
+DEFAULT_TOLERANCE = 0.25
+
+
+def count_requests() -> int:
+    """Returns the number of S3 requests made since the counters were reset."""
+    return sum(count for name, count in s3.get_counters().items() if "." not in name)
+
+
+def measure(operation: typing.Callable, repeat: int, warmup: int) -> dict:
+    """
+    Times the operation after running it the warmup number of times.
+
+    :param operation:
+        The operation to time.
+    :param repeat:
+        Number of timed runs of the operation.
+    :param warmup:
+        Number of untimed runs of the operation before the timed ones.
+    :return:
+        The median, minimum and maximum durations of the timed runs in seconds
+        and the number of S3 requests made by each run.
+    """
+    for _ in range(warmup):
+        operation()
+
+    durations = []
+    requests = 0
+    for _ in range(repeat):
+        s3.reset_counters()
+        started = time.perf_counter()
+        operation()
+        durations.append(time.perf_counter() - started)
+        requests = max(requests, count_requests())
+
+    return {
+        "median": round(statistics.median(durations), 6),
+        "min": round(min(durations), 6),
+        "max": round(max(durations), 6),
+        "repeat": repeat,
+        "requests": requests,
+    }
+
+
+def run_suite(
+    scale: str = "full",
+    latency: float = DEFAULT_LATENCY,
+    repeat: int = 3,
+    warmup: int = 1,
+    select: str | None = None,
+) -> dict:
+    """
+    Runs the benchmark scenarios against a fake S3 server that injects the
+    latency into every request. The output of the commands is discarded and
+    the pipper cache is redirected to a scratch directory for the run.
+
+    :param scale:
+        Name of the scale that determines the sizes of the scenarios.
+    :param latency:
+        Latency in seconds injected into every request.
+    :param repeat:
+        Number of timed runs of each benchmark.
+    :param warmup:
+        Number of untimed runs of each benchmark before the timed ones.
+    :param select:
+        Only runs the benchmarks whose names contain this substring.
+    :return:
+        The machine-readable results of the run.
+    """
+    benchmarks = {}
+    cache_directory = environment.CACHE_DIRECTORY
+    with (
+        tempfile.TemporaryDirectory(prefix="pipper-benchmarks-") as directory,
+        fake_s3.serve() as server,
+    ):
+        environment.CACHE_DIRECTORY = os.path.join(directory, "cache")
+        bench = scenarios.Bench(server, directory)
+        try:
+            for name, sizes in scenarios.SCALES[scale].items():
+                for size in sizes:
+                    label = f"{name}[{size}]"
+                    if select and select not in label:
+                        continue
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        server.default_delay = 0.0
+                        operation = scenarios.SCENARIOS[name](bench, size)
+                        server.default_delay = latency
+                        benchmarks[label] = measure(operation, repeat, warmup)
+        finally:
+            environment.CACHE_DIRECTORY = cache_directory
+            s3.configure()
+
+    return {
+        "pipper": pipper.__version__,
+        "python": platform.python_version(),
+        "scale": scale,
+        "latency": latency,
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compares the results with the baseline results of the same benchmarks.
+
+    :param results:
+        Results of the benchmark run.
+    :param baseline:
+        Results of an earlier benchmark run with the same scale and latency.
+    :param tolerance:
+        Fraction by which a median duration may exceed the baseline.
+    :return:
+        Descriptions of the benchmarks that are slower than the tolerance
+        allows or that make more S3 requests than in the baseline.
+    """
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        expected = baseline["benchmarks"].get(name)
+        if not expected:
+            continue
+
+        if result["median"] > expected["median"] * (1 + tolerance):
+            regressions.append(
+                f"{name} took {result['median']:.3f}s instead of "
+                f"{expected['median']:.3f}s"
+            )
+        if result["requests"] > expected["requests"]:
+            regressions.append(
+                f"{name} made {result['requests']} requests instead of "
+                f"{expected['requests']}"
+            )
+    return regressions
+
+
+def format_results(results: dict, baseline: dict | None = None) -> str:
+    """Formats the results as a table, relative to the baseline if any."""
+    expected = (baseline or {}).get("benchmarks") or {}
+    lines = [f"{'Benchmark':<28}{'Median':>10}{'Min':>10}{'Requests':>10}{'Change':>9}"]
+    for name, result in results["benchmarks"].items():
+        change = ""
+        if name in expected and expected[name]["median"]:
+            change = f"{result['median'] / expected[name]['median'] - 1:+.0%}"
+        lines.append(
+            f"{name:<28}{result['median']:>10.3f}{result['min']:>10.3f}"
+            f"{result['requests']:>10}{change:>9}"
+        )
+    return "\n".join(lines)
+
+
+def load_baseline(path: pathlib.Path, results: dict) -> dict | None:
+    """
+    Loads the baseline results if they exist and were recorded with the same
+    scale and latency as the results.
+    """
+    if not path.exists():
+        return None
+
+    baseline = json.loads(path.read_text())
+    conditions = ("scale", "latency")
+    if any(baseline[name] != results[name] for name in conditions):
+        print(
+            f"[WARNING]: Baseline was recorded at the {baseline['scale']} scale "
+            f"with {baseline['latency']}s latency and is not compared"
+        )
+        return None
+    return baseline
+
+
+def parse(cli_args: list[str] | None = None) -> argparse.Namespace:
+    """Parses the command line arguments of the benchmark runner."""
+    parser = argparse.ArgumentParser(
+        prog="python -m pipper.tests.benchmarks",
+        description="Benchmarks pipper against a fake S3 server.",
+    )
+    parser.add_argument("--scale", choices=sorted(scenarios.SCALES), default="full")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("-k", "--select", help="Only runs matching benchmarks.")
+    parser.add_argument("-o", "--output", help="Writes the results as JSON.")
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Replaces the baseline with the results instead of comparing them.",
+    )
+    return parser.parse_args(cli_args)
+
+
+def main(cli_args: list[str] | None = None) -> int:
+    """
+    Runs the benchmarks and compares them with the baseline.
+
+    :return:
+        The exit code of the runner, which is 1 if any benchmark regressed.
+    """
+    args = parse(cli_args)
+    results = run_suite(args.scale, args.latency, args.repeat, args.warmup, args.select)
+
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(format_results(results))
+        print(f"[SAVED]: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline, results)
+    print(format_results(results, baseline))
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    for regression in regressions:
+        print(f"[REGRESSION]: {regression}")
+    return 1 if regressions else 0
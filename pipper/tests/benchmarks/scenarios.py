@@ -0,0 +1,213 @@
+import io
+import itertools
+import json
+import os
+import typing
+import zipfile
+
+from pipper import command
+from pipper import versioning
+from pipper.environment import Environment
+from pipper.tests import fake_s3
+
+#: Root prefix of the benchmark repositories.
+ROOT_PREFIX = "pipper"
+
+#: Number of versions published for each package that a scenario resolves.
+VERSIONS_PER_PACKAGE = 20
+
+#: Version constraints resolved by the find_latest_match scenario, along with
+#: whether or not pre-releases are included.
+CONSTRAINTS: list[tuple[str | None, bool]] = [
+    (None, False),
+    (None, True),
+    ("=1.*", False),
+    ("=1.2.*", False),
+    ("<2.0.0", False),
+    (">=2.1.0", True),
+    ("<=0.19.19", False),
+]
+
+
+def make_versions(count: int) -> list[str]:
+    """
+    Creates distinct semantic versions spread over majors, minors and patches,
+    with every tenth version being a pre-release.
+    """
+    versions = []
+    for index in range(count):
+        version = f"{index // 400}.{index // 20 % 20}.{index % 20}"
+        versions.append(f"{version}-rc.1" if index % 10 == 9 else version)
+    return versions
+
+
+def write_bundle(path: str, name: str, version: str, dependencies: list[str]):
+    """Writes a minimal pipper bundle containing an empty wheel."""
+    wheel_name = f"{name.replace('-', '_')}-{version}-py3-none-any.whl"
+    wheel = io.BytesIO()
+    with zipfile.ZipFile(wheel, "w") as zipper:
+        zipper.writestr(
+            f"{name}-{version}.dist-info/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        )
+
+    metadata = {
+        "name": name,
+        "version": version,
+        "safe_version": versioning.serialize(version),
+        "wheel_name": wheel_name,
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "dependencies": dependencies,
+    }
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr("package.meta", json.dumps(metadata))
+        zipper.writestr("package.whl", wheel.getvalue())
+
+
+class Bench:
+    """
+    Repositories on a fake S3 server shared by the scenarios of a benchmark
+    run, along with a scratch directory for local files.
+    """
+
+    def __init__(self, server: fake_s3.FakeS3Server, directory: str):
+        self.server = server
+        self.directory = directory
+
+    def get_args(self, bucket: str) -> list[str]:
+        """Command line arguments that point a command at the repository."""
+        return [
+            f"--bucket={bucket}",
+            f"--endpoint-url={self.server.url}",
+            "--region=us-east-1",
+            "--credentials",
+            "fake",
+            "fake",
+        ]
+
+    def create_environment(self, bucket: str) -> Environment:
+        """Creates an environment for calling pipper functions directly."""
+        return Environment(
+            {
+                "bucket": bucket,
+                "endpoint_url": self.server.url,
+                "region": "us-east-1",
+                "aws_credentials": ["fake", "fake"],
+            }
+        )
+
+    def seed_versions(self, bucket: str, name: str, versions: list[str]):
+        """Adds empty pipper files of the versions of the package."""
+        for version in versions:
+            key = versioning.make_s3_key(name, version, ROOT_PREFIX)
+            self.server.objects[f"{bucket}/{key}"] = b""
+
+    def seed_bundle(self, bucket: str, name: str, version: str, dependencies: list):
+        """Adds an installable pipper bundle of the package version."""
+        path = os.path.join(self.directory, f"{name}-{version}.pipper")
+        write_bundle(path, name, version, dependencies)
+        key = versioning.make_s3_key(name, version, ROOT_PREFIX)
+        with open(path, "rb") as f:
+            self.server.objects[f"{bucket}/{key}"] = f.read()
+
+
+def list_versions(bench: Bench, size: int) -> typing.Callable:
+    """Lists every version of a package with the given number of versions."""
+    bucket = f"list-versions-{size}"
+    bench.seed_versions(bucket, "listed", make_versions(size))
+    env = bench.create_environment(bucket)
+    return lambda: versioning.list_versions(env, "listed", include_prereleases=True)
+
+
+def find_latest_match(bench: Bench, size: int) -> typing.Callable:
+    """Resolves a variety of constraints against a package's versions."""
+    bucket = f"find-latest-match-{size}"
+    bench.seed_versions(bucket, "matched", make_versions(size))
+    env = bench.create_environment(bucket)
+
+    def operation():
+        for constraint, include_prereleases in CONSTRAINTS:
+            versioning.find_latest_match(
+                env, "matched", constraint, include_prereleases
+            )
+
+    return operation
+
+
+def install_graph(bench: Bench, size: int) -> typing.Callable:
+    """
+    Installs, as a dry run, a package whose dependencies form a binary tree
+    of the given number of packages, each with several published versions.
+    """
+    bucket = f"install-graph-{size}"
+    for index in range(size):
+        name = f"graph-{index:03d}"
+        children = [i for i in (2 * index + 1, 2 * index + 2) if i < size]
+        versions = make_versions(VERSIONS_PER_PACKAGE)
+        bench.seed_versions(bucket, name, versions[:-2])
+        bench.seed_bundle(
+            bucket, name, versions[-2], [f"graph-{i:03d}" for i in children]
+        )
+
+    args = ["install", "graph-000", "--dry-run", *bench.get_args(bucket)]
+    return lambda: command.run(args)
+
+
+def publish(bench: Bench, size: int) -> typing.Callable:
+    """Publishes the given number of bundles into an empty repository."""
+    directory = os.path.join(bench.directory, f"publish-{size}")
+    os.makedirs(directory)
+    for index in range(size):
+        path = os.path.join(directory, f"published-{index:03d}-1.0.0.pipper")
+        write_bundle(path, f"published-{index:03d}", "1.0.0", [])
+
+    # Every run publishes into a new bucket, so no bundle is already published.
+    buckets = (f"publish-{size}-{run}" for run in itertools.count())
+    return lambda: command.run(
+        ["publish", directory, "--all", *bench.get_args(next(buckets))]
+    )
+
+
+def authorize(bench: Bench, size: int) -> typing.Callable:
+    """Authorizes the dependencies of a configs file with many packages."""
+    bucket = f"authorize-{size}"
+    names = [f"authorized-{index:03d}" for index in range(size)]
+    for name in names:
+        bench.seed_versions(bucket, name, make_versions(VERSIONS_PER_PACKAGE))
+
+    configs_path = os.path.join(bench.directory, f"authorize-{size}.json")
+    with open(configs_path, "w") as f:
+        json.dump({"dependencies": [f"{name}:0.*" for name in names]}, f)
+
+    args = ["authorize", f"--input={configs_path}", *bench.get_args(bucket)]
+    return lambda: command.run(args)
+
+
+#: Scenarios by name, each creating its fixtures in the bench for a size and
+#: returning the operation to time.
+SCENARIOS: dict[str, typing.Callable[[Bench, int], typing.Callable]] = {
+    "list_versions": list_versions,
+    "find_latest_match": find_latest_match,
+    "install_graph": install_graph,
+    "publish": publish,
+    "authorize": authorize,
+}
+
+#: Sizes with which each scenario is run at each scale. The smoke scale only
+#: verifies that the scenarios work.
+SCALES: dict[str, dict[str, list[int]]] = {
+    "full": {
+        "list_versions": [10, 1000, 20000],
+        "find_latest_match": [1000],
+        "install_graph": [50],
+        "publish": [100],
+        "authorize": [200],
+    },
+    "smoke": {
+        "list_versions": [10, 100],
+        "find_latest_match": [50],
+        "install_graph": [5],
+        "publish": [3],
+        "authorize": [5],
+    },
+}
@@ -0,0 +1,80 @@
+import argparse
+import json
+import pathlib
+import time
+import typing
+
+from pipper.tests.benchmarks import scenarios
+from pipper.tests.versioning import legacy_serde
+from pipper.versioning import serde
+
+#: Number of distinct versions converted by default, which all fit in the
+#: caches of the memoized conversions.
+DEFAULT_KEYS = 50_000
+
+
+def time_per_million(function: typing.Callable, values: list[str]) -> float:
+    """Returns the seconds the function takes to convert a million values."""
+    started = time.perf_counter()
+    for value in values:
+        function(value)
+    return (time.perf_counter() - started) * 1_000_000 / len(values)
+
+
+def measure(keys: int = DEFAULT_KEYS) -> dict:
+    """
+    Times the legacy and the current conversions of distinct versions, with
+    the memoized conversions timed both before and after they are cached,
+    i.e. for a first listing of the versions and for repeated listings.
+
+    :param keys:
+        Number of distinct versions to convert.
+    :return:
+        Seconds per million conversions by function and implementation, along
+        with the speedups of the current implementation.
+    """
+    versions = scenarios.make_versions(keys)
+    safe_versions = [legacy_serde.serialize(version) for version in versions]
+
+    results = {}
+    for name, values in (("serialize", versions), ("deserialize", safe_versions)):
+        function = getattr(serde, name)
+        function.cache_clear()
+        legacy = time_per_million(getattr(legacy_serde, name), values)
+        cold = time_per_million(function, values)
+        warm = time_per_million(function, values)
+        results[name] = {
+            "legacy": round(legacy, 4),
+            "cold": round(cold, 4),
+            "warm": round(warm, 4),
+            "cold_speedup": round(legacy / cold, 2),
+            "warm_speedup": round(legacy / warm, 2),
+        }
+    return {"keys": keys, "seconds_per_million": results}
+
+
+def main(cli_args: list[str] | None = None):
+    """Runs the microbenchmarks of the version conversions."""
+    parser = argparse.ArgumentParser(
+        prog="python -m pipper.tests.benchmarks.serde",
+        description="Benchmarks the version serialization functions.",
+    )
+    parser.add_argument("--keys", type=int, default=DEFAULT_KEYS)
+    parser.add_argument("-o", "--output", help="Writes the results as JSON.")
+    args = parser.parse_args(cli_args)
+
+    results = measure(args.keys)
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    print(f"{'Function':<14}{'Legacy':>10}{'Cold':>10}{'Warm':>10}  Seconds/1M keys")
+    for name, result in results["seconds_per_million"].items():
+        print(
+            f"{name:<14}{result['legacy']:>10.3f}{result['cold']:>10.3f}"
+            f"{result['warm']:>10.3f}  "
+            f"{result['cold_speedup']}x cold, {result['warm_speedup']}x warm"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+import datetime
+import io
+import json
 import os
 import pathlib
 import shutil
+import sys
 import tempfile
+import zipfile
+
+import pytest
 
 import pipper
 from pipper import command
@@ -122,3 +129,126 @@ def test_bundle_without_pipper_dot_json():
     finally:
         os.chdir(str(current_directory))
         shutil.rmtree(directory)
+
+
+def _write_wheel(directory: pathlib.Path, name: str, version: str) -> pathlib.Path:
+    """Writes a minimal prebuilt wheel file into the given directory."""
+    path = directory.joinpath(f"{name}-{version}-py3-none-any.whl")
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr(
+            f"{name}-{version}.dist-info/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        )
+        zipper.writestr(f"{name}/__init__.py", "VALUE = 1\n")
+    return path
+
+
+def test_bundle_wheel(tmp_path: pathlib.Path):
+    """Should bundle a prebuilt wheel without building the package."""
+    wheel_path = _write_wheel(tmp_path, "foo", "1.2.3")
+    configs_path = tmp_path.joinpath("pipper.json")
+    configs_path.write_text(json.dumps({"dependencies": ["bar"]}))
+
+    command.run(["bundle", f"--wheel={wheel_path}", f"--config={configs_path}"])
+
+    bundle_path = tmp_path.joinpath("foo-v1-2-3.pipper")
+    with zipfile.ZipFile(bundle_path) as zipper:
+        metadata = json.loads(zipper.read("package.meta"))
+    assert metadata["version"] == "1.2.3"
+    assert metadata["wheel_name"] == wheel_path.name
+    assert metadata["dependencies"] == ["bar"]
+
+
+def test_bundle_wheel_directory(tmp_path: pathlib.Path):
+    """Should bundle every prebuilt wheel within a directory."""
+    _write_wheel(tmp_path, "foo", "1.2.3")
+    _write_wheel(tmp_path, "bar", "0.0.1")
+    output_directory = tmp_path.joinpath("output")
+    output_directory.mkdir()
+
+    command.run(["bundle", f"--wheel={tmp_path}", f"--output={output_directory}"])
+
+    assert sorted(os.listdir(output_directory)) == [
+        "bar-v0-0-1.pipper",
+        "foo-v1-2-3.pipper",
+    ]
+
+
+def test_bundle_wheel_configs(tmp_path: pathlib.Path, monkeypatch):
+    """Should only apply explicit configurations to a single prebuilt wheel."""
+    wheel_path = _write_wheel(tmp_path, "foo", "1.2.3")
+    configs_path = tmp_path.joinpath("pipper.json")
+    configs_path.write_text(json.dumps({"dependencies": ["bar"]}))
+    monkeypatch.chdir(tmp_path)
+
+    command.run(["bundle", f"--wheel={wheel_path}"])
+    with zipfile.ZipFile(tmp_path.joinpath("foo-v1-2-3.pipper")) as zipper:
+        assert "dependencies" not in json.loads(zipper.read("package.meta"))
+
+    _write_wheel(tmp_path, "baz", "0.0.1")
+    with pytest.raises(ValueError):
+        command.run(["bundle", f"--wheel={tmp_path}", f"--config={configs_path}"])
+
+
+def test_bundle_wheel_reproducible(tmp_path: pathlib.Path, monkeypatch):
+    """Should create identical bundles from identical inputs."""
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    wheel_path = _write_wheel(tmp_path, "foo", "1.2.3")
+    bundles = []
+    for name in ("first", "second"):
+        output_directory = tmp_path.joinpath(name)
+        output_directory.mkdir()
+        command.run(["bundle", f"--wheel={wheel_path}", f"--output={output_directory}"])
+        bundles.append(output_directory.joinpath("foo-v1-2-3.pipper").read_bytes())
+
+    assert bundles[0] == bundles[1]
+
+    with zipfile.ZipFile(tmp_path.joinpath("first", "foo-v1-2-3.pipper")) as zipper:
+        infos = {info.filename: info for info in zipper.infolist()}
+        metadata = json.loads(zipper.read("package.meta"))
+
+    assert list(infos) == ["package.meta", "package.whl"]
+    assert infos["package.meta"].compress_type == zipfile.ZIP_DEFLATED
+    assert infos["package.whl"].compress_type == zipfile.ZIP_STORED
+    assert infos["package.whl"].date_time == (2023, 11, 14, 22, 13, 20)
+    assert metadata["timestamp"] == "2023-11-14T22:13:20+00:00"
+    assert metadata["manifest"]["package.whl"]["size"] == wheel_path.stat().st_size
+
+
+def test_bundle_wheel_timestamp(tmp_path: pathlib.Path, monkeypatch):
+    """Should take the default timestamp from the wheel instead of the clock."""
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    wheel_path = _write_wheel(tmp_path, "foo", "1.2.3")
+    with zipfile.ZipFile(wheel_path) as zipper:
+        latest = max(info.date_time for info in zipper.infolist())
+
+    bundles = []
+    for name in ("first", "second"):
+        output_directory = tmp_path.joinpath(name)
+        output_directory.mkdir()
+        command.run(["bundle", f"--wheel={wheel_path}", f"--output={output_directory}"])
+        bundles.append(output_directory.joinpath("foo-v1-2-3.pipper").read_bytes())
+
+    assert bundles[0] == bundles[1]
+    with zipfile.ZipFile(io.BytesIO(bundles[0])) as zipper:
+        metadata = json.loads(zipper.read("package.meta"))
+    expected = datetime.datetime(*latest, tzinfo=datetime.UTC).isoformat()
+    assert metadata["timestamp"] == expected
+
+
+def test_bundle_wheel_precompile(tmp_path: pathlib.Path):
+    """Should add a bytecode overlay for the requested python version."""
+    wheel_path = _write_wheel(tmp_path, "foo", "1.2.3")
+    python_version = "{}.{}".format(*sys.version_info[:2])
+
+    command.run(["bundle", f"--wheel={wheel_path}", f"--precompile={python_version}"])
+
+    with zipfile.ZipFile(tmp_path.joinpath("foo-v1-2-3.pipper")) as zipper:
+        metadata = json.loads(zipper.read("package.meta"))
+        filename = metadata["bytecode"][sys.implementation.cache_tag]
+        overlay = zipfile.ZipFile(io.BytesIO(zipper.read(filename)))
+
+    assert filename in metadata["manifest"]
+    assert overlay.namelist() == [
+        f"foo/__pycache__/__init__.{sys.implementation.cache_tag}.pyc"
+    ]
@@ -0,0 +1,94 @@
+import json
+import pathlib
+import zipfile
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from pipper import command
+
+
+def _write_wheel(directory: pathlib.Path, name: str, version: str) -> pathlib.Path:
+    """Writes a minimal prebuilt wheel file into the given directory."""
+    path = directory.joinpath(f"{name}-{version}-py3-none-any.whl")
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr(
+            f"{name}-{version}.dist-info/METADATA",
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        )
+    return path
+
+
+def _publish(tmp_path: pathlib.Path, name: str, version: str, dependencies: list):
+    """Bundles a wheel and publishes it into the local repository."""
+    directory = tmp_path.joinpath(name)
+    directory.mkdir()
+    wheel_path = _write_wheel(directory, name, version)
+    configs_path = directory.joinpath("pipper.json")
+    configs_path.write_text(json.dumps({"dependencies": dependencies}))
+    command.run(["bundle", f"--wheel={wheel_path}", f"--config={configs_path}"])
+    repository = tmp_path.joinpath("repository").as_uri()
+    command.run(["publish", str(directory), f"--bucket={repository}"])
+
+
+@patch("pipper.wheelhouse.subprocess.run")
+def test_download_wheelhouse(run: MagicMock, tmp_path: pathlib.Path):
+    """Should export the transitive wheels with a hash-pinned requirements file."""
+    _publish(tmp_path, "foo", "1.0.0", ["bar"])
+    _publish(tmp_path, "bar", "2.0.0", [])
+    configs_path = tmp_path.joinpath("pipper.json")
+    configs_path.write_text(json.dumps({"dependencies": ["foo"], "pypi": ["six"]}))
+    wheelhouse = tmp_path.joinpath("wheelhouse")
+    wheelhouse.mkdir()
+    _write_wheel(wheelhouse, "stale", "0.1.0")
+
+    command.run(
+        [
+            "download",
+            f"--input={configs_path}",
+            f"--wheelhouse={wheelhouse}",
+            f"--bucket={tmp_path.joinpath('repository').as_uri()}",
+        ]
+    )
+
+    assert sorted(p.name for p in wheelhouse.iterdir()) == [
+        "bar-2.0.0-py3-none-any.whl",
+        "foo-1.0.0-py3-none-any.whl",
+        "requirements.txt",
+        "stale-0.1.0-py3-none-any.whl",
+    ]
+    pip_args = run.call_args.args[0]
+    assert "six" in pip_args
+    assert pip_args[3:5] == ["download", "--only-binary=:all:"]
+    assert pip_args[pip_args.index("--find-links") + 1] == str(wheelhouse)
+    assert any(a.endswith("/bar-2.0.0-py3-none-any.whl") for a in pip_args)
+    requirements = wheelhouse.joinpath("requirements.txt").read_text().splitlines()
+    assert len(requirements) == 2
+    assert requirements[0].startswith("bar==2.0.0 --hash=sha256:")
+    assert requirements[1].startswith("foo==1.0.0 --hash=sha256:")
+
+
+def test_download_trace_out(tmp_path: pathlib.Path, capsys):
+    """Should print the timings and write the spans of the download as a trace."""
+    _publish(tmp_path, "foo", "1.0.0", [])
+    trace_path = tmp_path.joinpath("trace.json")
+
+    command.run(
+        [
+            "download",
+            "foo",
+            "--extract",
+            f"--directory={tmp_path.joinpath('saved')}",
+            f"--bucket={tmp_path.joinpath('repository').as_uri()}",
+            "--timings",
+            f"--trace-out={trace_path}",
+        ]
+    )
+
+    output = capsys.readouterr().out
+    assert "[TIMINGS]:" in output
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    names = {event["name"] for event in events}
+    assert {"environment", "download", "resolve", "list_versions"} <= names
+    assert "extract" in names
+    fetch = next(e for e in events if e["name"] == "download" and "bytes" in e["args"])
+    assert fetch["args"]["bytes"] > 0
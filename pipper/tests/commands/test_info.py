@@ -1,9 +1,13 @@
+import json
+import pathlib
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import lobotomy
 
 from pipper import command
+from pipper import storage
+from pipper import versioning
 from pipper.tests import utils
 
 
@@ -20,3 +24,81 @@ def test_info_local(boto_mocks: utils.BotoMocks, list_objects: MagicMock):
     """..."""
     list_objects.return_value = utils.make_list_objects_response(contents=[])
     command.run(["info", "fake-package", "--local"])
+
+
+def test_info_all(tmp_path: pathlib.Path, capsys):
+    """Should report the status of every dependency in the configs file."""
+    source = tmp_path.joinpath("bundle.pipper")
+    source.write_bytes(b"bundle")
+    repository = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    for name, version in [("foo", "1.0.0"), ("foo", "2.0.0"), ("bar", "0.1.0")]:
+        repository.put(versioning.make_s3_key(name, version), str(source), {})
+    configs_path = tmp_path.joinpath("pipper.json")
+    configs_path.write_text(json.dumps({"dependencies": ["foo:1.*", "bar", "baz"]}))
+    installed = {"foo": "1.0.0", "bar": "0.2.0", "baz": "1.0"}
+
+    args = ["-q", f"--bucket={repository.location}", f"--input={configs_path}"]
+    with patch("pipper.wrapper.list_installed", return_value=installed):
+        command.run(["info", "--all", "--json", *args])
+        report = json.loads(capsys.readouterr().out)
+        command.run(["outdated", *args])
+        table = capsys.readouterr().out
+
+    assert report == [
+        {
+            "name": "foo",
+            "installed": "1.0.0",
+            "wanted": "1.0.0",
+            "latest": "2.0.0",
+            "status": "behind",
+        },
+        {
+            "name": "bar",
+            "installed": "0.2.0",
+            "wanted": "0.1.0",
+            "latest": "0.1.0",
+            "status": "ahead",
+        },
+        {
+            "name": "baz",
+            "installed": "1.0",
+            "wanted": None,
+            "latest": None,
+            "status": "unknown",
+        },
+    ]
+    rows = table[table.index("Package") :].splitlines()
+    assert [row.split() for row in rows[1:]] == [
+        ["foo", "1.0.0", "1.0.0", "2.0.0", "behind"]
+    ]
+
+
+def test_info_all_installed(tmp_path: pathlib.Path, capsys, monkeypatch):
+    """Should only report the installed distributions that are published."""
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path.joinpath("bundle.pipper")
+    source.write_bytes(b"bundle")
+    repository = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    for name, version in [("my_pkg", "1.0.0"), ("other", "0.1.0")]:
+        repository.put(versioning.make_s3_key(name, version), str(source), {})
+    installed = {"my-pkg": "1.0.0", "requests": "2.0.0"}
+
+    args = ["info", "--all", "--json", f"--bucket={repository.location}"]
+    with (
+        patch("pipper.wrapper.list_installed", return_value=installed),
+        patch.object(
+            versioning, "list_versions", wraps=versioning.list_versions
+        ) as list_versions,
+    ):
+        command.run(args)
+
+    assert json.loads(capsys.readouterr().out) == [
+        {
+            "name": "my_pkg",
+            "installed": "1.0.0",
+            "wanted": "1.0.0",
+            "latest": "1.0.0",
+            "status": "current",
+        }
+    ]
+    assert list_versions.call_count == 1
@@ -1,3 +1,5 @@
+import pathlib
+import tempfile
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
@@ -5,8 +7,79 @@ from pipper import command
 from pipper.tests import utils
 
 
+def _write_distribution(directory: pathlib.Path, name: str):
+    """Writes an installed distribution with a RECORD of its files."""
+    directory.joinpath(name).mkdir()
+    directory.joinpath(name, "__init__.py").write_text("VALUE = 1\n")
+    dist_info = directory.joinpath(f"{name}-1.0.0.dist-info")
+    dist_info.mkdir()
+    dist_info.joinpath("RECORD").write_text(
+        f"{name}/__init__.py,,\n{dist_info.name}/RECORD,,\n"
+    )
+
+
 @patch("pipper.installer.install")
 @utils.PatchSession()
 def test_install(boto_mocks: utils.BotoMocks, install: MagicMock):
     """..."""
     command.run(["install", "foo"])
+
+
+@patch("pipper.wrapper.compile_bytecode")
+@patch("pipper.installer.install")
+@utils.PatchSession()
+def test_install_deferred_compile(
+    boto_mocks: utils.BotoMocks,
+    install: MagicMock,
+    compile_bytecode: MagicMock,
+):
+    """Should compile the bytecode of the installed files once at the end."""
+    with tempfile.TemporaryDirectory() as directory:
+        target = pathlib.Path(directory).resolve()
+        _write_distribution(target, "existing")
+        install.side_effect = lambda env, name: _write_distribution(target, name)
+        command.run(
+            [
+                "install",
+                "foo",
+                "bar",
+                f"--target={target}",
+                "--compile-workers=4",
+                "--optimize=0",
+                "--optimize=2",
+            ]
+        )
+
+    assert install.call_count == 2
+    compile_bytecode.assert_called_once_with(
+        files=[
+            str(target.joinpath("bar", "__init__.py")),
+            str(target.joinpath("foo", "__init__.py")),
+        ],
+        workers=4,
+        optimize=[0, 2],
+        dry_run=False,
+    )
+
+
+@patch("pipper.wrapper.compile_bytecode")
+@patch("pipper.installer.install")
+@utils.PatchSession()
+def test_install_optimize(
+    boto_mocks: utils.BotoMocks, install: MagicMock, compile_bytecode: MagicMock
+):
+    """Should defer compilation when optimization levels are specified."""
+    command.run(["install", "foo", "--optimize=1"])
+    assert compile_bytecode.call_args.kwargs["workers"] == 0
+    assert compile_bytecode.call_args.kwargs["optimize"] == [1]
+
+
+@patch("pipper.wrapper.compile_bytecode")
+@patch("pipper.installer.install")
+@utils.PatchSession()
+def test_install_no_compile(
+    boto_mocks: utils.BotoMocks, install: MagicMock, compile_bytecode: MagicMock
+):
+    """Should not compile bytecode when compilation is disabled."""
+    command.run(["install", "foo", "--no-compile", "--compile-workers=4"])
+    compile_bytecode.assert_not_called()
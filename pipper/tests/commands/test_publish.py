@@ -1,5 +1,7 @@
+import hashlib
 import json
 import pathlib
+import zipfile
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
@@ -25,7 +27,7 @@ def test_publish(
     monkeypatch,
 ):
     """Should successfully publish a bundle."""
-    lobotomized.add_call("s3", "list_objects", {"Contents": []})
+    lobotomized.add_call("s3", "list_objects_v2", {"Contents": []})
     lobotomized.add_call("s3", "put_object", {})
 
     monkeypatch.chdir(pathlib.Path(__file__).parent)
@@ -52,7 +54,12 @@ def test_publish_skipped(
     monkeypatch,
 ):
     """Should skip publishing if the target bundle version is already published."""
-    lobotomized.add_call("s3", "list_objects", {"Contents": [{}]})
+    lobotomized.add_call(
+        "s3",
+        "list_objects_v2",
+        {"Contents": [{"Key": "pipper/foo.pipper.fake/v0-1-123.pipper"}]},
+    )
+    lobotomized.add_call("s3", "head_object", {"Metadata": {}})
 
     monkeypatch.chdir(pathlib.Path(__file__).parent)
 
@@ -66,3 +73,102 @@ def test_publish_skipped(
     )
 
     command.run(["publish", "foo.pipper.fake", "--bucket=foo-bucket"])
+
+
+def _write_bundle(directory: pathlib.Path, name: str, version: str) -> pathlib.Path:
+    """Writes a minimal pipper bundle into the given directory."""
+    safe_version = "v" + version.replace(".", "-")
+    path = directory.joinpath(f"{name}-{safe_version}.pipper")
+    metadata = {
+        "name": name,
+        "version": version,
+        "safe_version": safe_version,
+        "timestamp": "2021-01-01T12:23:34Z",
+    }
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr("package.meta", json.dumps(metadata))
+    return path
+
+
+@lobotomy.Patch()
+def test_publish_all(lobotomized: lobotomy.Lobotomy, tmp_path: pathlib.Path):
+    """Should publish every unpublished bundle in the directory."""
+    _write_bundle(tmp_path, "foo", "0.1.0")
+    _write_bundle(tmp_path, "foo", "0.1.1")
+    _write_bundle(tmp_path, "foo", "0.2.0")
+    lobotomized.add_call(
+        "s3", "list_objects_v2", {"Contents": [{"Key": "pipper/foo/v0-1-0.pipper"}]}
+    )
+    lobotomized.add_call("s3", "head_object", {"Metadata": {}})
+    lobotomized.add_call("s3", "put_object", {})
+    lobotomized.add_call("s3", "put_object", {})
+
+    command.run(["publish", str(tmp_path), "--all", "--bucket=foo-bucket"])
+
+    listing = lobotomized.get_service_call("s3", "list_objects_v2")
+    assert listing.request["Prefix"] == "pipper/foo/v0-"
+    uploaded = sorted(
+        call.request["Key"]
+        for call in lobotomized.get_service_calls("s3", "put_object")
+    )
+    assert uploaded == ["pipper/foo/v0-1-1.pipper", "pipper/foo/v0-2-0.pipper"]
+
+
+@lobotomy.Patch()
+def test_publish_failure(lobotomized: lobotomy.Lobotomy, tmp_path: pathlib.Path):
+    """Should raise an error when an upload fails."""
+    _write_bundle(tmp_path, "foo", "0.1.0")
+    lobotomized.add_call("s3", "list_objects_v2", {"Contents": []})
+    lobotomized.add_error_call("s3", "put_object", "AccessDenied")
+
+    with pytest.raises(RuntimeError):
+        command.run(["publish", str(tmp_path), "--bucket=foo-bucket"])
+
+
+@lobotomy.Patch()
+def test_publish_identical(lobotomized: lobotomy.Lobotomy, tmp_path: pathlib.Path):
+    """Should not upload a bundle identical to the published one, even forced."""
+    path = _write_bundle(tmp_path, "foo", "0.1.0")
+    sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+    lobotomized.add_call(
+        "s3", "list_objects_v2", {"Contents": [{"Key": "pipper/foo/v0-1-0.pipper"}]}
+    )
+    lobotomized.add_call("s3", "head_object", {"Metadata": {"sha256": sha256}})
+
+    command.run(["publish", str(path), "--force", "--bucket=foo-bucket"])
+
+    assert not lobotomized.get_service_calls("s3", "put_object")
+
+
+@lobotomy.Patch()
+def test_publish_conflict(lobotomized: lobotomy.Lobotomy, tmp_path: pathlib.Path):
+    """Should report differing published contents and only replace when forced."""
+    path = _write_bundle(tmp_path, "foo", "0.1.0")
+    sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+    lobotomized.add_call(
+        "s3", "list_objects_v2", {"Contents": [{"Key": "pipper/foo/v0-1-0.pipper"}]}
+    )
+    lobotomized.add_call("s3", "head_object", {"Metadata": {"sha256": "different"}})
+    lobotomized.add_call("s3", "put_object", {})
+
+    with pytest.raises(ValueError):
+        command.run(["publish", str(path), "--skip-fails", "--bucket=foo-bucket"])
+    assert not lobotomized.get_service_calls("s3", "put_object")
+
+    command.run(["publish", str(path), "--force", "--bucket=foo-bucket"])
+    upload = lobotomized.get_service_call("s3", "put_object")
+    assert upload.request["Metadata"]["sha256"] == sha256
+
+
+def test_publish_local(tmp_path: pathlib.Path):
+    """Should publish a bundle into a local directory repository."""
+    path = _write_bundle(tmp_path, "foo", "0.1.0")
+    repository = tmp_path.joinpath("repository")
+
+    command.run(["publish", str(path), f"--bucket=file://{repository}"])
+
+    published = repository.joinpath("pipper", "foo", "v0-1-0.pipper")
+    assert published.read_bytes() == path.read_bytes()
+    sidecar = repository.joinpath(".metadata", "pipper", "foo", "v0-1-0.pipper.json")
+    sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+    assert json.loads(sidecar.read_text())["Metadata"]["sha256"] == sha256
@@ -0,0 +1,309 @@
+import datetime
+import json
+import pathlib
+import time
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from pipper import command
+from pipper import indexer
+from pipper import parser
+from pipper import pruner
+from pipper import storage
+from pipper import versioning
+from pipper.environment import Environment
+
+
+def _populate(directory: pathlib.Path, keys: list[str]) -> storage.LocalStorage:
+    """Creates a local repository containing the given keys."""
+    directory.mkdir()
+    source = directory.joinpath("bundle.pipper")
+    source.write_bytes(b"bundle")
+    repository = storage.LocalStorage(str(directory.joinpath("repository")))
+    for key in keys:
+        repository.put(key, str(source), {"name": key})
+    return repository
+
+
+def test_repository_sync(tmp_path: pathlib.Path):
+    """Should incrementally copy the filtered pipper files."""
+    source = _populate(
+        tmp_path.joinpath("source"),
+        [
+            "pipper/foo/v0-1-0.pipper",
+            "pipper/foo/v1-0-0.pipper",
+            "pipper/bar/v0-1-0.pipper",
+        ],
+    )
+    destination = tmp_path.joinpath("destination")
+    args = [
+        "repository",
+        "sync",
+        source.location,
+        destination.as_uri(),
+        "--package=foo",
+        "--version=0.*",
+    ]
+
+    command.run(args)
+    mirror = storage.LocalStorage(str(destination))
+    assert [e["Key"] for e in mirror.list_objects("pipper/")] == [
+        "pipper/foo/v0-1-0.pipper"
+    ]
+    assert mirror.head("pipper/foo/v0-1-0.pipper")["Metadata"] == {
+        "name": "pipper/foo/v0-1-0.pipper"
+    }
+
+    source_path = source.directory.joinpath("pipper/foo/v0-1-0.pipper")
+    source_path.write_bytes(b"changed")
+    source.directory.joinpath(".metadata/pipper/foo/v0-1-0.pipper.json").unlink()
+    command.run(args)
+    assert destination.joinpath("pipper/foo/v0-1-0.pipper").read_bytes() == (b"changed")
+
+
+def _write_bundle(directory: pathlib.Path, name: str, version: str) -> pathlib.Path:
+    """Writes a pipper bundle containing a minimal wheel."""
+    wheel_name = f"{name}-{version}-py3-none-any.whl"
+    path = directory.joinpath(f"{name}-{version}.pipper")
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr("package.meta", json.dumps({"wheel_name": wheel_name}))
+        zipper.writestr("package.whl", f"{name} {version}")
+    return path
+
+
+def test_repository_build_index(tmp_path: pathlib.Path):
+    """Should incrementally build a simple index of the repository wheels."""
+    repository = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    for name, version in [("foo_bar", "0.1.0"), ("foo_bar", "0.2.0"), ("baz", "1.0")]:
+        key = f"pipper/{name}/v{version.replace('.', '-')}.pipper"
+        repository.put(key, str(_write_bundle(tmp_path, name, version)), {})
+    args = ["repository", "build-index", f"--bucket={repository.location}"]
+
+    command.run(args)
+
+    index = repository.directory.joinpath("pipper", "_simple")
+    page = index.joinpath("foo-bar", "index.html").read_text()
+    assert 'href="foo_bar-0.1.0-py3-none-any.whl#sha256=' in page
+    assert 'href="foo_bar-0.2.0-py3-none-any.whl#sha256=' in page
+    assert index.joinpath("foo-bar", "foo_bar-0.2.0-py3-none-any.whl").exists()
+    projects = json.loads(index.joinpath("index.json").read_text())["projects"]
+    assert projects == [{"name": "baz"}, {"name": "foo-bar"}]
+
+    with patch.object(storage.LocalStorage, "put") as put:
+        command.run(args)
+    put.assert_not_called()
+
+
+def test_repository_build_index_acl(tmp_path: pathlib.Path):
+    """Should upload the wheels and pages of the index with the ACL."""
+    repository = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    key = versioning.make_s3_key("foo", "0.1.0")
+    repository.put(key, str(_write_bundle(tmp_path, "foo", "0.1.0")), {})
+    args = ["repository", "build-index", f"--bucket={repository.location}"]
+
+    with patch.object(storage.LocalStorage, "put", wraps=repository.put) as put:
+        command.run([*args, "--acl=public-read"])
+    acls = {call.args[0]: call.kwargs.get("acl") for call in put.call_args_list}
+    assert acls.pop(f"pipper/_simple/{indexer.STATE_FILENAME}") is None
+    assert set(acls.values()) == {"public-read"}
+    assert "pipper/_simple/foo/foo-0.1.0-py3-none-any.whl" in acls
+
+
+def test_repository_build_index_updates(tmp_path: pathlib.Path):
+    """Should delete orphaned wheels and index published files without listing."""
+    repository = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    for version in ["0.1.0", "0.2.0"]:
+        key = versioning.make_s3_key("foo", version)
+        repository.put(key, str(_write_bundle(tmp_path, "foo", version)), {})
+    command.run(["repository", "build-index", f"--bucket={repository.location}"])
+
+    project = repository.directory.joinpath("pipper", "_simple", "foo")
+    repository.delete([versioning.make_s3_key("foo", "0.1.0")])
+    command.run(["repository", "build-index", f"--bucket={repository.location}"])
+    assert not project.joinpath("foo-0.1.0-py3-none-any.whl").exists()
+    assert "foo-0.1.0" not in project.joinpath("index.html").read_text()
+
+    key = versioning.make_s3_key("foo", "0.3.0")
+    path = _write_bundle(tmp_path, "foo", "0.3.0")
+    repository.put(key, str(path), {})
+    env = Environment({"bucket": repository.location})
+    with patch.object(storage.LocalStorage, "list_objects") as list_objects:
+        state = indexer.build_index(env, {key: str(path)})
+    list_objects.assert_not_called()
+    assert sorted(entry["filename"] for entry in state.values()) == [
+        "foo-0.2.0-py3-none-any.whl",
+        "foo-0.3.0-py3-none-any.whl",
+    ]
+    assert "foo-0.3.0" in project.joinpath("index.html").read_text()
+
+
+def test_repository_migrate(tmp_path: pathlib.Path):
+    """Should copy legacy keys into the sharded layout and delete the originals."""
+    repository = _populate(
+        tmp_path.joinpath("source"),
+        ["pipper/foo/v0-1-0.pipper", "pipper/bar/v1-0-0.pipper"],
+    )
+    args = ["repository", "migrate", f"--bucket={repository.location}", "--delete"]
+
+    command.run(args)
+
+    keys = [e["Key"] for e in repository.list_objects("pipper/")]
+    assert sorted(keys) == sorted(
+        [
+            versioning.make_s3_key("foo", "0.1.0", sharded=True),
+            versioning.make_s3_key("bar", "1.0.0", sharded=True),
+        ]
+    )
+
+    env = Environment({"bucket": repository.location, "layout": "sharded"})
+    remotes = versioning.list_versions(env, "foo")
+    assert [r.version for r in remotes] == ["0.1.0"]
+
+
+def test_repository_catalog(tmp_path: pathlib.Path, capsys):
+    """Should list the packages of both layouts with version summaries."""
+    repository = _populate(
+        tmp_path.joinpath("source"),
+        [
+            "pipper/foo/v0-1-0.pipper",
+            "pipper/foo/v1-0-0.pipper",
+            "pipper/foo/v1-1-0__pre_alpha_1.pipper",
+            "pipper/_simple/index.html",
+            "pipper/simple/v1-0-0.pipper",
+            versioning.make_s3_key("bar", "2.0.0", sharded=True),
+        ],
+    )
+    args = ["repository", "catalog", f"--bucket={repository.location}"]
+
+    command.run(args)
+    lines = capsys.readouterr().out.splitlines()
+    names = ("foo", "bar", "simple", "_simple")
+    assert [line for line in lines if line in names] == ["foo", "simple", "bar"]
+
+    command.run([*args, "--summary", "--json"])
+    lines = capsys.readouterr().out.splitlines()
+    summaries = {
+        summary["name"]: summary
+        for summary in (json.loads(line) for line in lines if line.startswith("{"))
+    }
+    assert summaries.keys() == {"foo", "simple", "bar"}
+    assert summaries["foo"]["versions"] == 3
+    assert summaries["foo"]["latest"] == "1.0.0"
+    assert summaries["foo"]["size"] == 3 * len(b"bundle")
+    assert summaries["bar"]["latest"] == "2.0.0"
+
+
+def test_repository_prune(tmp_path: pathlib.Path):
+    """Should remove the versions selected by the retention rules."""
+    releases = ["0.1.0", "0.2.0", "1.0.0"]
+    prereleases = ["1.1.0-alpha.1", "1.1.0-alpha.2", "1.1.0-alpha.3"]
+    repository = _populate(
+        tmp_path.joinpath("source"),
+        [versioning.make_s3_key("foo", v) for v in releases + prereleases],
+    )
+    args = [
+        "repository",
+        "prune",
+        "foo",
+        f"--bucket={repository.location}",
+        "--keep-latest=2",
+        "--keep-prereleases=1",
+    ]
+
+    command.run([*args, "--older-than=1d"])
+    assert len(list(repository.list_objects("pipper/foo/"))) == 6
+
+    command.run([*args, "--dry-run"])
+    assert len(list(repository.list_objects("pipper/foo/"))) == 6
+
+    command.run(args)
+    keys = [e["Key"] for e in repository.list_objects("pipper/foo/")]
+    assert sorted(keys) == sorted(
+        versioning.make_s3_key("foo", v) for v in ["0.2.0", "1.0.0", "1.1.0-alpha.3"]
+    )
+
+
+@pytest.mark.parametrize(
+    "age, expected",
+    [
+        ("30d", datetime.timedelta(days=30)),
+        ("12 hours", datetime.timedelta(hours=12)),
+        ("90m", datetime.timedelta(minutes=90)),
+        ("45secs", datetime.timedelta(seconds=45)),
+    ],
+)
+def test_parse_age(age: str, expected: datetime.timedelta):
+    """Should convert ages with known units."""
+    assert pruner.parse_age(age) == expected
+
+
+@pytest.mark.parametrize("age", ["30", "3months", "2w", "d", "", "1.5d", "-1d"])
+def test_parse_age_invalid(age: str):
+    """Should reject ages without a number and a known unit."""
+    with pytest.raises(ValueError):
+        pruner.parse_age(age)
+
+
+@pytest.mark.parametrize("option", ["--keep-latest=-1", "--keep-prereleases=-2"])
+def test_prune_negative_keep(option: str):
+    """Should reject negative numbers of versions to keep."""
+    with pytest.raises(SystemExit):
+        parser.parse(["repository", "prune", "foo", option])
+
+
+def test_list_versions_merged(tmp_path: pathlib.Path):
+    """Should list the versions of both layouts of a sharded repository."""
+    repository = _populate(
+        tmp_path.joinpath("source"),
+        [
+            versioning.make_s3_key("foo", "0.1.0", sharded=True),
+            versioning.make_s3_key("foo", "0.2.0", sharded=True),
+            versioning.make_s3_key("foo", "0.2.0"),
+            versioning.make_s3_key("foo", "0.3.0"),
+        ],
+    )
+    env = Environment({"bucket": repository.location, "layout": "sharded"})
+
+    remotes = versioning.list_versions(env, "foo")
+    assert [r.version for r in remotes] == ["0.1.0", "0.2.0", "0.3.0"]
+    assert remotes[1].key == versioning.make_s3_key("foo", "0.2.0", sharded=True)
+
+    command.run(
+        [
+            "repository",
+            "prune",
+            "foo",
+            f"--bucket={repository.location}",
+            "--layout=sharded",
+            "--keep-latest=1",
+        ]
+    )
+    keys = [e["Key"] for e in repository.list_objects("pipper/")]
+    assert keys == [versioning.make_s3_key("foo", "0.3.0")]
+
+
+def test_list_versions_legacy_cached(tmp_path: pathlib.Path):
+    """Should briefly reuse empty listings of the legacy keys of a package."""
+    repository = _populate(
+        tmp_path.joinpath("source"),
+        [versioning.make_s3_key("foo", "0.1.0", sharded=True)],
+    )
+    env = Environment({"bucket": repository.location, "layout": "sharded"})
+    with patch.object(
+        storage.LocalStorage, "list_objects", wraps=repository.list_objects
+    ) as list_objects:
+        versioning.list_versions(env, "foo")
+        assert list_objects.call_count == 2
+        versioning.list_versions(env, "foo")
+        assert list_objects.call_count == 3
+
+        expired = time.monotonic() + versioning.LEGACY_LISTING_TTL
+        with patch.object(versioning.time, "monotonic", return_value=expired):
+            versioning.list_versions(env, "foo")
+        assert list_objects.call_count == 5
+
+        env = Environment({"bucket": repository.location, "layout": "sharded"})
+        versioning.list_versions(env, "foo")
+        assert list_objects.call_count == 7
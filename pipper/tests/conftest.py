@@ -0,0 +1,11 @@
+import pytest
+
+from pipper import environment
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path_factory, monkeypatch):
+    """Keeps tests from reading or writing the user's pipper cache."""
+    directory = tmp_path_factory.mktemp("pipper-cache")
+    monkeypatch.setattr(environment, "CACHE_DIRECTORY", str(directory))
+    return directory
@@ -0,0 +1,238 @@
+import bisect
+import collections
+import contextlib
+import hashlib
+import itertools
+import threading
+import time
+import typing
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import unquote
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
+
+LAST_MODIFIED = "2024-01-01T00:00:00.000Z"
+
+#: Maximum number of keys returned in a single page of a listing, like S3.
+MAX_KEYS = 1000
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    """
+    Serves the path-style head, get, put and paginated list requests of an
+    S3 client from the objects of the fake server, after the latency injected
+    for each request.
+    """
+
+    # Persistent connections keep the latency of new connections out of the
+    # measured requests, as with the connection pools of real S3 clients.
+    protocol_version = "HTTP/1.1"
+    # Responses are written in several parts, which would otherwise be held
+    # back by Nagle's algorithm until the client acknowledges the first one.
+    disable_nagle_algorithm = True
+    server: "FakeS3Server"
+
+    def _send(self, status: HTTPStatus, body: bytes, headers: dict):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_object(self, key: str):
+        time.sleep(self.server.next_delay())
+        body = self.server.objects.get(key)
+        if body is None:
+            self._send(HTTPStatus.NOT_FOUND, b"", {})
+            return
+
+        etag = hashlib.md5(body).hexdigest()
+        headers = {"ETag": f'"{etag}"', "Last-Modified": LAST_MODIFIED}
+        for name, value in self.server.metadata.get(key, {}).items():
+            headers[f"x-amz-meta-{name}"] = value
+        self._send(HTTPStatus.OK, body, headers)
+
+    def _read_body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if "aws-chunked" not in (self.headers.get("Content-Encoding") or ""):
+            return body
+
+        # Chunks are prefixed by their hexadecimal size and a signature, and
+        # followed by the checksum trailers after the last, empty chunk.
+        decoded = b""
+        while body:
+            header, _, body = body.partition(b"\r\n")
+            size = int(header.split(b";")[0], 16)
+            if size == 0:
+                break
+            decoded, body = decoded + body[:size], body[size + 2 :]
+        return decoded
+
+    def _store_object(self, key: str):
+        body = self._read_body()
+        time.sleep(self.server.next_delay())
+        self.server.objects[key] = body
+        self.server.metadata[key] = {
+            name[len("x-amz-meta-") :]: value
+            for name, value in self.headers.items()
+            if name.lower().startswith("x-amz-meta-")
+        }
+        etag = hashlib.md5(body).hexdigest()
+        self._send(HTTPStatus.OK, b"", {"ETag": f'"{etag}"'})
+
+    def _list_page(self, bucket: str, query: dict) -> tuple[list, list, str | None]:
+        prefix = (query.get("prefix") or [""])[0]
+        delimiter = (query.get("delimiter") or [""])[0]
+        after = (query.get("continuation-token") or query.get("start-after") or [""])[0]
+        max_keys = min(int((query.get("max-keys") or [MAX_KEYS])[0]), MAX_KEYS)
+
+        contents: list[tuple[str, bytes]] = []
+        prefixes: list[str] = []
+        keys = self.server.get_sorted_keys()
+        start = bisect.bisect_right(keys, f"{bucket}/{max(prefix, after)}")
+        for key in itertools.islice(keys, start, None):
+            name = key[len(bucket) + 1 :]
+            if not key.startswith(f"{bucket}/{prefix}"):
+                break
+            if name <= after:
+                continue
+            if len(contents) + len(prefixes) == max_keys:
+                return contents, prefixes, after
+            head, found, _ = name[len(prefix) :].partition(delimiter or "\0")
+            if not found:
+                contents.append((name, self.server.objects[key]))
+                after = name
+            elif f"{prefix}{head}{delimiter}" not in prefixes:
+                prefixes.append(f"{prefix}{head}{delimiter}")
+                after = f"{prefix}{head}{delimiter}\uffff"
+        return contents, prefixes, None
+
+    def _send_listing(self, bucket: str, query: dict):
+        time.sleep(self.server.next_delay())
+        contents, prefixes, token = self._list_page(bucket, query)
+        entries = "".join(
+            f"<Contents><Key>{escape(name)}</Key>"
+            f"<LastModified>{LAST_MODIFIED}</LastModified>"
+            f'<ETag>"{hashlib.md5(body).hexdigest()}"</ETag>'
+            f"<Size>{len(body)}</Size></Contents>"
+            for name, body in contents
+        ) + "".join(
+            f"<CommonPrefixes><Prefix>{escape(p)}</Prefix></CommonPrefixes>"
+            for p in prefixes
+        )
+        truncated = "true" if token else "false"
+        next_token = (
+            f"<NextContinuationToken>{escape(token)}</NextContinuationToken>"
+            if token
+            else ""
+        )
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{bucket}</Name><KeyCount>{len(contents) + len(prefixes)}"
+            f"</KeyCount><IsTruncated>{truncated}</IsTruncated>{next_token}"
+            f"{entries}</ListBucketResult>"
+        )
+        self._send(HTTPStatus.OK, xml.encode(), {"Content-Type": "application/xml"})
+
+    def do_HEAD(self):
+        self._send_object(unquote(urlparse(self.path).path.lstrip("/")))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = unquote(url.path.lstrip("/"))
+        query = parse_qs(url.query)
+        if "/" not in path and "list-type" in query:
+            self._send_listing(path, query)
+        else:
+            self._send_object(path)
+
+    def do_PUT(self):
+        self._store_object(unquote(urlparse(self.path).path.lstrip("/")))
+
+    def log_message(self, format: str, *args):
+        pass
+
+
+class FakeS3Server(ThreadingHTTPServer):
+    """
+    Threaded HTTP server imitating S3 with injectable per-request latency,
+    e.g. to reproduce requests that stall.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeS3Handler)
+        self.objects: dict[str, bytes] = {}
+        self.metadata: dict[str, dict[str, str]] = {}
+        self.delays: collections.deque[float] = collections.deque()
+        self.default_delay = 0.0
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._sorted_keys: list[str] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_sorted_keys(self) -> list[str]:
+        """
+        Returns the sorted keys of the objects, which are only sorted again
+        after objects have been added.
+        """
+        with self._lock:
+            if len(self._sorted_keys) != len(self.objects):
+                self._sorted_keys = sorted(self.objects)
+            return self._sorted_keys
+
+    def next_delay(self) -> float:
+        """
+        Returns the latency to inject into the next request, which is the next
+        queued delay or the default delay once the queue is exhausted.
+        """
+        with self._lock:
+            self.request_count += 1
+            return self.delays.popleft() if self.delays else self.default_delay
+
+    def create_client(self) -> BaseClient:
+        """Creates an S3 client that sends its requests to this server."""
+        return boto3.client(
+            "s3",
+            endpoint_url=self.url,
+            region_name="us-east-1",
+            aws_access_key_id="fake",
+            aws_secret_access_key="fake",
+            config=Config(
+                s3={"addressing_style": "path"},
+                retries={"max_attempts": 1},
+                max_pool_connections=32,
+            ),
+        )
+
+    def handle_error(self, request, client_address):
+        # Clients abandon stalled requests, so writing their responses fails.
+        pass
+
+
+@contextlib.contextmanager
+def serve() -> typing.Iterator[FakeS3Server]:
+    """Runs a fake S3 server in a background thread."""
+    server = FakeS3Server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,5 +1,17 @@
+import json
+import pathlib
+import time
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
 import pytest
 
+from pipper import authorizer
+from pipper import environment
+from pipper import storage
+from pipper import versioning
+from pipper.environment import Environment
+
 scenarios = [
     ("72s", 72),
     ("85sec", 85),
@@ -14,5 +26,99 @@ scenarios = [
 
 
 @pytest.mark.parametrize("age,total_seconds", scenarios)
-def to_time_delta(age: str, total_seconds: int):
+def test_to_time_delta(age: str, total_seconds: int):
     """Should convert the age to the expected number of seconds"""
+    assert authorizer.to_time_delta(age).total_seconds() == total_seconds
+
+
+def _publish(repository: storage.LocalStorage, source: pathlib.Path, package: dict):
+    """Stores a pipper file with the package metadata in the local repository."""
+    key = versioning.make_s3_key(package["name"], package["version"])
+    repository.put(key, str(source), {"package": json.dumps(package)})
+
+
+def test_create_many_urls(tmp_path: pathlib.Path):
+    """Should resolve packages once each and sign dependencies first."""
+    source = tmp_path.joinpath("bundle.pipper")
+    source.write_bytes(b"bundle")
+    repository = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    _publish(repository, source, {"name": "foo", "version": "1.0.0"})
+    _publish(repository, source, {"name": "foo", "version": "1.1.0"})
+    _publish(repository, source, {"name": "foo", "version": "2.0.0"})
+    _publish(
+        repository,
+        source,
+        {"name": "bar", "version": "0.1.0", "dependencies": ["foo:1.*"]},
+    )
+    env = Environment(
+        {"bucket": repository.location, "include_dependencies": True, "quiet": True}
+    )
+
+    with patch.object(
+        versioning, "list_versions", wraps=versioning.list_versions
+    ) as list_versions:
+        urls = authorizer.create_many_urls(env, ["bar", "foo:1.*", "foo"])
+
+    assert list_versions.call_count == 2, "Expected one listing per package."
+    assert list(urls) == ["foo:1.*", "foo", "bar"]
+    assert urls["foo:1.*"].endswith("/foo/v1-1-0.pipper")
+    assert urls["foo"].endswith("/foo/v2-0-0.pipper")
+    assert urls["bar"].endswith("/bar/v0-1-0.pipper")
+
+
+def test_sign_many_cached(tmp_path: pathlib.Path):
+    """Should reuse cached URLs that remain valid for long enough."""
+    backend = MagicMock(location="s3://bucket")
+    backend.presign.side_effect = lambda key, expires_in: f"{key}?{time.time()}"
+    env = MagicMock(storage=backend, args={"cache_urls": True})
+
+    first = authorizer.sign_many(env, ["pipper/foo/v1-0-0.pipper"], 600)
+    second = authorizer.sign_many(env, ["pipper/foo/v1-0-0.pipper"], 600)
+    assert first == second
+    assert backend.presign.call_count == 1
+
+    with patch.object(authorizer.time, "time", return_value=time.time() + 400):
+        third = authorizer.sign_many(env, ["pipper/foo/v1-0-0.pipper"], 600)
+    assert third != first, "Expected URLs close to expiring to be replaced."
+    assert backend.presign.call_count == 2
+
+
+def test_sign_many_cache_file():
+    """Should only allow the current user to read the cached URLs."""
+    backend = MagicMock(location="s3://bucket")
+    backend.presign.return_value = "https://bucket/pipper/foo/v1-0-0.pipper"
+    env = MagicMock(storage=backend, args={"cache_urls": True})
+    authorizer.sign_many(env, ["pipper/foo/v1-0-0.pipper"], 600)
+
+    path = pathlib.Path(environment.CACHE_DIRECTORY, authorizer.URL_CACHE_FILENAME)
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+@patch("pipper.authorizer.get_signing_identity")
+def test_sign_many_cached_identity(get_signing_identity: MagicMock):
+    """Should not reuse URLs of other access keys or with expired credentials."""
+    backend = MagicMock(location="s3://bucket")
+    backend.presign.side_effect = lambda key, expires_in: f"{key}?{time.time()}"
+    env = MagicMock(storage=backend, args={"cache_urls": True})
+    keys = ["pipper/foo/v1-0-0.pipper"]
+
+    get_signing_identity.return_value = ("FIRST", None)
+    first = authorizer.sign_many(env, keys, 600)
+    get_signing_identity.return_value = ("SECOND", time.time() + 100)
+    second = authorizer.sign_many(env, keys, 600)
+    assert first != second
+    assert authorizer.sign_many(env, keys, 600) != second
+    assert backend.presign.call_count == 3
+
+    get_signing_identity.return_value = ("FIRST", None)
+    assert authorizer.sign_many(env, keys, 600) == first
+
+
+def test_get_signing_identity():
+    """Should identify S3 URLs by the access key that signs them."""
+    env = Environment({"bucket": "bucket", "aws_credentials": ["KEY", "SECRET"]})
+    assert authorizer.get_signing_identity(env) == ("KEY", None)
+
+    env = Environment({"bucket": "file:///repository"})
+    assert authorizer.get_signing_identity(env) == ("", None)
@@ -0,0 +1,82 @@
+import json
+import pathlib
+
+from pipper.tests.benchmarks import imports as imports_benchmark
+from pipper.tests.benchmarks import runner
+from pipper.tests.benchmarks import scenarios
+from pipper.tests.benchmarks import serde as serde_benchmark
+
+
+def test_smoke(tmp_path: pathlib.Path, capsys):
+    """Should run every scenario and report regressions from the baseline."""
+    results = runner.run_suite(scale="smoke", latency=0.0, repeat=1, warmup=0)
+
+    expected = {
+        f"{name}[{size}]"
+        for name, sizes in scenarios.SCALES["smoke"].items()
+        for size in sizes
+    }
+    assert set(results["benchmarks"]) == expected
+    assert all(r["requests"] > 0 for r in results["benchmarks"].values())
+    assert results["benchmarks"]["publish[3]"]["requests"] == 6
+
+    baseline = json.loads(json.dumps(results))
+    assert runner.compare(results, baseline, tolerance=0.0) == []
+
+    baseline["benchmarks"]["authorize[5]"]["requests"] -= 1
+    baseline["benchmarks"]["publish[3]"]["median"] /= 2
+    regressions = runner.compare(results, baseline, tolerance=0.5)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("publish[3] took")
+    assert regressions[1].startswith("authorize[5] made 5 requests")
+
+
+def test_main(tmp_path: pathlib.Path, capsys):
+    """Should write the results and fail when compared with a faster baseline."""
+    output_path = tmp_path.joinpath("results.json")
+    baseline_path = tmp_path.joinpath("baseline.json")
+    args = ["--scale=smoke", "--latency=0", "--repeat=1", "--warmup=0"]
+
+    code = runner.main(
+        [
+            *args,
+            "-k",
+            "list_versions[10]",
+            f"--baseline={baseline_path}",
+            "--save-baseline",
+        ]
+    )
+    assert code == 0
+
+    baseline = json.loads(baseline_path.read_text())
+    baseline["benchmarks"]["list_versions[10]"]["requests"] = 0
+    baseline_path.write_text(json.dumps(baseline))
+    code = runner.main(
+        [
+            *args,
+            "-k",
+            "list_versions[10]",
+            f"--baseline={baseline_path}",
+            f"--output={output_path}",
+        ]
+    )
+    assert code == 1
+    assert "[REGRESSION]: list_versions[10] made 1 requests" in capsys.readouterr().out
+    assert list(json.loads(output_path.read_text())["benchmarks"]) == [
+        "list_versions[10]"
+    ]
+
+
+def test_serde_microbenchmark():
+    """Should time the legacy and current conversions of the versions."""
+    results = serde_benchmark.measure(keys=500)
+    assert results["keys"] == 500
+    for result in results["seconds_per_million"].values():
+        assert result["legacy"] > 0 and result["cold"] > 0 and result["warm"] > 0
+
+
+def test_imports_benchmark():
+    """Should time cold-start imports with and without the bytecode overlay."""
+    results = imports_benchmark.measure(modules=20, repeat=1)
+    assert results["modules"] == 20
+    assert results["seconds"]["source"] > results["seconds"]["overlay"] > 0
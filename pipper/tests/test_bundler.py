@@ -0,0 +1,131 @@
+import pathlib
+import subprocess
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from pipper import bundler
+from pipper import environment
+
+
+def _create_package(directory: pathlib.Path):
+    """Writes a minimal package source tree into the given directory."""
+    directory.joinpath("foo").mkdir()
+    directory.joinpath("foo", "__init__.py").write_text("VALUE = 1\n")
+    directory.joinpath("setup.py").write_text("from setuptools import setup\n")
+    directory.joinpath("dist").mkdir()
+    directory.joinpath("dist", "foo-0.0.1-py3-none-any.whl").write_text("fake")
+
+
+def test_list_source_files(tmp_path: pathlib.Path):
+    """Should list source files while skipping build output directories."""
+    _create_package(tmp_path)
+    assert bundler.list_source_files(str(tmp_path)) == ["foo/__init__.py", "setup.py"]
+
+
+def test_list_source_files_git(tmp_path: pathlib.Path):
+    """Should list tracked files of ignored directories but not build outputs."""
+    _create_package(tmp_path)
+    tmp_path.joinpath("foo", "build").mkdir()
+    tmp_path.joinpath("foo", "build", "__init__.py").write_text("")
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    subprocess.run(["git", "-C", str(tmp_path), "add", "foo", "setup.py"], check=True)
+
+    assert bundler.list_source_files(str(tmp_path)) == [
+        "foo/__init__.py",
+        "foo/build/__init__.py",
+        "setup.py",
+    ]
+
+
+def test_compute_source_hash(tmp_path: pathlib.Path):
+    """Should only change the source hash when the source files change."""
+    _create_package(tmp_path)
+    original = bundler.compute_source_hash(str(tmp_path))
+
+    tmp_path.joinpath("dist", "foo-0.0.2-py3-none-any.whl").write_text("fake")
+    assert original == bundler.compute_source_hash(str(tmp_path))
+
+    tmp_path.joinpath("foo", "__init__.py").write_text("VALUE = 2\n")
+    assert original != bundler.compute_source_hash(str(tmp_path))
+
+
+@patch("pipper.bundler.create_wheel")
+def test_create_cached_wheel(
+    create_wheel: MagicMock, tmp_path: pathlib.Path, monkeypatch
+):
+    """Should reuse the cached wheel when the source hash is unchanged."""
+    monkeypatch.setattr(environment, "CACHE_DIRECTORY", str(tmp_path / "cache"))
+    package_directory = tmp_path / "package"
+    package_directory.mkdir()
+    _create_package(package_directory)
+    bundle_directory = tmp_path / "bundle"
+    bundle_directory.mkdir()
+    wheel_path = bundle_directory / "package.whl"
+
+    def build(*args):
+        wheel_path.write_bytes(b"wheel")
+        return {"wheel_path": str(wheel_path), "package_name": "foo"}
+
+    create_wheel.side_effect = build
+
+    first = bundler.create_cached_wheel(str(package_directory), str(bundle_directory))
+    wheel_path.unlink()
+    second = bundler.create_cached_wheel(str(package_directory), str(bundle_directory))
+
+    assert create_wheel.call_count == 1
+    assert first == second
+    assert first["source_hash"]
+    assert wheel_path.read_bytes() == b"wheel"
+
+    bundler.create_cached_wheel(str(package_directory), str(bundle_directory), False)
+    assert create_wheel.call_count == 2
+
+
+@patch("pipper.bundler.ProjectBuilder")
+@patch("pipper.bundler.subprocess.run")
+def test_get_build_environment(
+    run: MagicMock, project_builder: MagicMock, tmp_path: pathlib.Path
+):
+    """Should create a build environment once and reuse it afterwards."""
+    package_directory = tmp_path / "package"
+    package_directory.mkdir()
+    package_directory.joinpath("pyproject.toml").write_text(
+        '[build-system]\nrequires = ["setuptools", "wheel"]\n'
+    )
+
+    get_requires = project_builder.return_value.get_requires_for_build
+    get_requires.return_value = set()
+
+    first = bundler.get_build_environment(str(package_directory))
+    assert run.call_count == 2
+    assert run.call_args.args[0][-3:] == ["build", "setuptools", "wheel"]
+
+    second = bundler.get_build_environment(str(package_directory))
+    assert run.call_count == 2, "Expected the environment to be reused."
+    assert first == second
+
+    get_requires.return_value = {"extra"}
+    bundler.get_build_environment(str(package_directory))
+    bundler.get_build_environment(str(package_directory))
+    assert run.call_count == 3, "Expected dynamic requirements installed once."
+    assert run.call_args.args[0][-1] == "extra"
+
+
+@patch("pipper.bundler.ProjectBuilder")
+@patch("pipper.bundler.subprocess.run")
+def test_get_build_environment_keyed(
+    run: MagicMock, project_builder: MagicMock, tmp_path: pathlib.Path
+):
+    """Should use different build environments for different requirements."""
+    first_directory = tmp_path / "first"
+    first_directory.mkdir()
+    second_directory = tmp_path / "second"
+    second_directory.mkdir()
+    second_directory.joinpath("pyproject.toml").write_text(
+        '[build-system]\nrequires = ["hatchling"]\n'
+    )
+
+    project_builder.return_value.get_requires_for_build.return_value = set()
+    first = bundler.get_build_environment(str(first_directory))
+    second = bundler.get_build_environment(str(second_directory))
+    assert first != second
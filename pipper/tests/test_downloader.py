@@ -0,0 +1,65 @@
+import hashlib
+import json
+import pathlib
+import zipfile
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from pipper import downloader
+
+
+def _write_bundle(path: pathlib.Path, manifest: dict):
+    """Writes a minimal pipper bundle with the given manifest."""
+    metadata = {"name": "foo", "wheel_name": "foo.whl", "manifest": manifest}
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr("package.meta", json.dumps(metadata))
+        zipper.writestr("package.whl", b"wheel")
+
+
+def test_extract_pipper_file(tmp_path: pathlib.Path):
+    """Should extract a bundle whose wheel matches its manifest."""
+    bundle_path = tmp_path.joinpath("foo.pipper")
+    sha256 = hashlib.sha256(b"wheel").hexdigest()
+    _write_bundle(bundle_path, {"package.whl": {"size": 5, "sha256": sha256}})
+
+    result = downloader.extract_pipper_file(str(bundle_path))
+    assert pathlib.Path(result["wheel_path"]).read_bytes() == b"wheel"
+
+
+def test_extract_pipper_file_mismatch(tmp_path: pathlib.Path):
+    """Should raise an error if the wheel does not match the manifest."""
+    bundle_path = tmp_path.joinpath("foo.pipper")
+    _write_bundle(bundle_path, {"package.whl": {"size": 5, "sha256": "0" * 64}})
+
+    with pytest.raises(ValueError):
+        downloader.extract_pipper_file(str(bundle_path))
+
+
+@patch("pipper.downloader.requests.get")
+def test_fetch_bundle_unsigned(get: MagicMock, tmp_path: pathlib.Path):
+    """Should download from the download base URL without the S3 API."""
+    get.return_value.iter_content.return_value = [b"bundle"]
+    env = MagicMock(download_base_url="https://cdn.example.com/")
+    path = tmp_path.joinpath("foo.pipper")
+
+    assert downloader.fetch_bundle(env, "pipper/foo/v0-1-0.pipper", str(path))
+    assert get.call_args.args[0] == "https://cdn.example.com/pipper/foo/v0-1-0.pipper"
+    assert path.read_bytes() == b"bundle"
+    env.storage.get.assert_not_called()
+
+
+@patch("pipper.downloader.requests.get")
+def test_fetch_bundle_fallback(get: MagicMock, tmp_path: pathlib.Path):
+    """Should fall back to the repository storage if the unsigned GET fails."""
+    get.side_effect = requests.ConnectionError("unreachable")
+    env = MagicMock(download_base_url="https://cdn.example.com")
+    path = tmp_path.joinpath("foo.pipper")
+
+    assert downloader.fetch_bundle(env, "pipper/foo/v0-1-0.pipper", str(path))
+    env.storage.get.assert_called_once_with("pipper/foo/v0-1-0.pipper", str(path))
+
+    env.storage.exists.return_value = False
+    assert not downloader.fetch_bundle(env, "pipper/foo/v0-1-0.pipper", str(path))
@@ -0,0 +1,61 @@
+import io
+import json
+import pathlib
+import sys
+import zipfile
+
+from pipper import installer
+
+
+def _write_bundle(path: pathlib.Path, cache_tag: str):
+    """Writes a pipper bundle with a bytecode overlay for the cache tag."""
+    overlay = io.BytesIO()
+    with zipfile.ZipFile(overlay, "w") as zipper:
+        zipper.writestr(f"foo/__pycache__/__init__.{cache_tag}.pyc", b"pyc")
+        zipper.writestr(f"foo/__pycache__/missing.{cache_tag}.pyc", b"pyc")
+
+    metadata = {"name": "foo", "bytecode": {cache_tag: "bytecode.zip"}}
+    with zipfile.ZipFile(path, "w") as zipper:
+        zipper.writestr("package.meta", json.dumps(metadata))
+        zipper.writestr("bytecode.zip", overlay.getvalue())
+    return metadata
+
+
+def test_install_bytecode_overlay(tmp_path: pathlib.Path):
+    """Should install bytecode next to the sources for a matching interpreter."""
+    cache_tag = sys.implementation.cache_tag
+    bundle_path = tmp_path.joinpath("foo.pipper")
+    metadata = _write_bundle(bundle_path, cache_tag)
+    target = tmp_path.joinpath("target")
+    target.joinpath("foo").mkdir(parents=True)
+    target.joinpath("foo", "__init__.py").write_text("")
+    dist_info = target.joinpath("foo-1.0.0.dist-info")
+    dist_info.mkdir()
+    dist_info.joinpath("METADATA").write_text("Name: foo\nVersion: 1.0.0\n")
+    dist_info.joinpath("RECORD").write_text(
+        f"foo/__init__.py,sha256=abc,0\nfoo/__pycache__/__init__.{cache_tag}.pyc,,\n"
+        "foo-1.0.0.dist-info/RECORD,,\n"
+    )
+
+    assert installer.install_bytecode_overlay(str(bundle_path), metadata, str(target))
+    pycache = target.joinpath("foo", "__pycache__")
+    assert [p.name for p in pycache.iterdir()] == [f"__init__.{cache_tag}.pyc"]
+    assert dist_info.joinpath("RECORD").read_text().splitlines() == [
+        "foo/__init__.py,sha256=abc,0",
+        "foo-1.0.0.dist-info/RECORD,,",
+        f"foo/__pycache__/__init__.{cache_tag}.pyc,"
+        "sha256=XIXYXFut-9G5oMkXzd5cqLO9uY9irq5xEnmmVi5v2fY,3",
+    ]
+
+
+def test_install_bytecode_overlay_mismatch(tmp_path: pathlib.Path):
+    """Should ignore bytecode overlays for other interpreters."""
+    bundle_path = tmp_path.joinpath("foo.pipper")
+    metadata = _write_bundle(bundle_path, "cpython-27")
+    target = tmp_path.joinpath("target")
+    target.joinpath("foo").mkdir(parents=True)
+
+    assert not installer.install_bytecode_overlay(
+        str(bundle_path), metadata, str(target)
+    )
+    assert not target.joinpath("foo", "__pycache__").exists()
@@ -0,0 +1,146 @@
+import pathlib
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+import pytest
+
+from pipper import proxy
+from pipper import storage
+
+
+@pytest.fixture(name="served")
+def served_fixture(tmp_path: pathlib.Path):
+    """Serves a local repository through a proxy server in the background."""
+    source = tmp_path.joinpath("bundle.pipper")
+    source.write_bytes(b"0123456789")
+    backend = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    backend.put("pipper/foo/v0-1-0.pipper", str(source), {"sha256": "abc"})
+
+    server = proxy.create_server(
+        backend, cache_directory=str(tmp_path.joinpath("cache")), quiet=True
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield backend, server
+    server.shutdown()
+    server.server_close()
+
+
+def test_proxy(served, tmp_path: pathlib.Path):
+    """Should serve the repository to the http storage backend."""
+    backend, server = served
+    client = storage.create_storage(server.url, None)
+    assert isinstance(client, storage.HttpStorage)
+
+    keys = [entry["Key"] for entry in client.list_objects("pipper/foo/")]
+    assert keys == ["pipper/foo/v0-1-0.pipper"]
+    assert client.head("pipper/foo/v0-1-0.pipper")["Metadata"] == {"sha256": "abc"}
+    assert client.head("pipper/foo/v9-9-9.pipper") is None
+    assert client.get_range("pipper/foo/v0-1-0.pipper", 2, 4) == b"234"
+
+    path = tmp_path.joinpath("downloaded.pipper")
+    client.get("pipper/foo/v0-1-0.pipper", str(path))
+    assert path.read_bytes() == b"0123456789"
+
+    with pytest.raises(PermissionError):
+        client.put("pipper/foo/v0-2-0.pipper", str(path), {})
+
+
+@pytest.mark.parametrize(
+    "header, status, content, content_range",
+    [
+        ("bytes=2-4", 206, b"234", "bytes 2-4/10"),
+        ("bytes=7-", 206, b"789", "bytes 7-9/10"),
+        ("bytes=-3", 206, b"789", "bytes 7-9/10"),
+        ("bytes=-30", 206, b"0123456789", "bytes 0-9/10"),
+        ("bytes=8-20", 206, b"89", "bytes 8-9/10"),
+        ("bytes=10-", 416, b"", "bytes */10"),
+        ("bytes=-0", 416, b"", "bytes */10"),
+        ("bytes=4-2", 200, b"0123456789", None),
+        ("bytes=a-b", 200, b"0123456789", None),
+        ("bytes=0-1,4-5", 200, b"0123456789", None),
+    ],
+)
+def test_proxy_range(
+    served, header: str, status: int, content: bytes, content_range: str | None
+):
+    """Should serve satisfiable single byte ranges and ignore invalid ones."""
+    _, server = served
+    request = urllib.request.Request(
+        f"{server.url}/objects/pipper/foo/v0-1-0.pipper", headers={"Range": header}
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            assert (response.status, response.read()) == (status, content)
+            assert response.headers.get("Content-Range") == content_range
+    except urllib.error.HTTPError as error:
+        assert (error.code, error.headers.get("Content-Range")) == (
+            status,
+            content_range,
+        )
+
+
+def test_proxy_cache(served, tmp_path: pathlib.Path):
+    """Should download each file from the repository only once."""
+    backend, server = served
+    client = storage.HttpStorage(server.url)
+
+    with patch.object(backend, "get", wraps=backend.get) as get:
+        threads = [
+            threading.Thread(
+                target=client.get,
+                args=("pipper/foo/v0-1-0.pipper", str(tmp_path / f"{i}.pipper")),
+            )
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert get.call_count == 1
+    assert all(tmp_path.joinpath(f"{i}.pipper").exists() for i in range(8))
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/objects/%2Fetc%2Fhostname",
+        "/head/%2Fetc%2Fhostname",
+        "/objects/pipper%2F..%2F..%2Fbundle.pipper",
+        "/head/",
+        "/list?prefix=%2Fetc%2F",
+    ],
+)
+def test_proxy_rejects_keys_outside(served, tmp_path: pathlib.Path, path: str):
+    """Should reject keys that refer to files outside of the repository."""
+    backend, server = served
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"{server.url}{path}")
+    assert error.value.code == 400
+    assert not list(tmp_path.glob("*.etag"))
+
+
+def test_normalize_key():
+    """Should normalize keys and reject empty, absolute and parent keys."""
+    assert (
+        proxy.normalize_key("pipper//foo/./v0-1-0.pipper") == "pipper/foo/v0-1-0.pipper"
+    )
+    assert proxy.normalize_key("/etc/hostname") is None
+    assert proxy.normalize_key("pipper/../../secret") is None
+    assert proxy.normalize_key("C:/secret") is None
+    assert proxy.normalize_key("") is None
+
+
+def test_proxy_cache_outside(tmp_path: pathlib.Path):
+    """Should refuse to cache files outside of the cache directory."""
+    backend = storage.LocalStorage(str(tmp_path.joinpath("repository")))
+    cache = proxy.ProxyCache(backend, str(tmp_path.joinpath("cache")), 30)
+    with (
+        patch.object(cache, "head", return_value={"ETag": "abc"}),
+        pytest.raises(ValueError),
+    ):
+        cache.get_path(str(tmp_path.joinpath("secret.txt")))
+    assert not tmp_path.joinpath("secret.txt.etag").exists()
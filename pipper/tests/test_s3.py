@@ -0,0 +1,260 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.exceptions import EndpointConnectionError
+
+from pipper import s3
+from pipper.tests import fake_s3
+
+
+def _error(code: str) -> ClientError:
+    """Creates an S3 client error with the given error code."""
+    return ClientError({"Error": {"Code": code}}, "HeadObject")
+
+
+def test_key_exists():
+    """Should treat missing objects as non-existent and raise other errors."""
+    client = MagicMock()
+    assert s3.key_exists(client, "bucket", "foo")
+
+    client.head_object.side_effect = _error("404")
+    assert not s3.key_exists(client, "bucket", "foo")
+
+    client.head_object.side_effect = _error("403")
+    with pytest.raises(ClientError):
+        s3.key_exists(client, "bucket", "foo")
+
+
+@patch("pipper.s3.time.sleep")
+def test_call_throttled(sleep: MagicMock):
+    """Should back off and retry throttled requests."""
+    s3.reset_counters()
+    client = MagicMock()
+    client.put_object.side_effect = [_error("SlowDown"), _error("503"), {}]
+
+    assert s3.call(client, "put_object", Bucket="bucket", Key="foo") == {}
+    assert sleep.call_count == 2
+    assert s3.get_counters() == {"put_object": 3, "put_object.throttled": 2}
+
+
+@patch("pipper.s3.time.sleep")
+def test_call_throttled_exhausted(sleep: MagicMock):
+    """Should raise the throttling error after the last attempt."""
+    client = MagicMock()
+    client.put_object.side_effect = _error("SlowDown")
+
+    with pytest.raises(ClientError):
+        s3.call(client, "put_object", Bucket="bucket", Key="foo")
+    assert client.put_object.call_count == s3.MAX_ATTEMPTS
+
+
+@patch("pipper.s3.time.sleep")
+def test_call_failed(sleep: MagicMock):
+    """Should retry transient failures and raise other errors immediately."""
+    s3.reset_counters()
+    client = MagicMock()
+    client.get_object.side_effect = [
+        _error("InternalError"),
+        EndpointConnectionError(endpoint_url="http://s3"),
+        {},
+    ]
+    assert s3.call(client, "get_object", Bucket="bucket", Key="foo") == {}
+    assert s3.get_counters() == {"get_object": 3, "get_object.failed": 2}
+
+    client.get_object.side_effect = _error("AccessDenied")
+    with pytest.raises(ClientError):
+        s3.call(client, "get_object", Bucket="bucket", Key="foo")
+    assert s3.get_counters()["get_object"] == 4
+
+
+@patch("pipper.s3.time.sleep")
+def test_download_file_retried(sleep: MagicMock):
+    """Should retry managed downloads like every other request."""
+    s3.reset_counters()
+    client = MagicMock()
+    client.download_file.side_effect = [_error("SlowDown"), None]
+
+    s3.download_file(client, "bucket", "foo", "/tmp/foo")
+    assert client.download_file.call_count == 2
+    assert s3.get_counters() == {"download_file": 2, "download_file.throttled": 1}
+
+
+def test_client_config():
+    """Should leave retrying requests to pipper alone."""
+    assert s3.CLIENT_CONFIG.retries == {"mode": "standard", "total_max_attempts": 1}
+
+
+def test_call_coalesced():
+    """Should share a single request between identical concurrent calls."""
+    s3.reset_counters()
+    started = threading.Event()
+    release = threading.Event()
+
+    def head_object(**kwargs):
+        started.set()
+        release.wait(5)
+        return {"Metadata": {}}
+
+    client = MagicMock()
+    client.head_object.side_effect = head_object
+    results = []
+
+    def run():
+        results.append(s3.call(client, "head_object", Bucket="bucket", Key="foo"))
+
+    first = threading.Thread(target=run)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=run)
+    second.start()
+    while not s3.get_counters().get("head_object.coalesced"):
+        second.join(0.01)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert client.head_object.call_count == 1
+    assert results == [{"Metadata": {}}, {"Metadata": {}}]
+
+
+def test_keys_exist():
+    """Should check keys with one paginated listing per parent prefix."""
+    client = MagicMock()
+    client.list_objects_v2.side_effect = [
+        {"Contents": [{"Key": "p/foo/v0-1-0.pipper"}], "NextContinuationToken": "a"},
+        {"Contents": [{"Key": "p/foo/v0-1-1.pipper"}]},
+        {"Contents": []},
+    ]
+
+    existing = s3.keys_exist(
+        client,
+        "bucket",
+        ["p/foo/v0-1-0.pipper", "p/foo/v0-2-0.pipper", "p/bar/v1-0-0.pipper"],
+    )
+
+    assert existing == {"p/foo/v0-1-0.pipper"}
+    prefixes = [c.kwargs["Prefix"] for c in client.list_objects_v2.call_args_list]
+    assert prefixes == ["p/foo/v0-", "p/foo/v0-", "p/bar/v1-0-0.pipper"]
+
+
+def test_list_all_prefixes():
+    """Should page through the common prefixes of a delimited listing."""
+    client = MagicMock()
+    client.list_objects_v2.side_effect = [
+        {
+            "CommonPrefixes": [{"Prefix": "pipper/bar/"}],
+            "NextContinuationToken": "next",
+        },
+        {"CommonPrefixes": [{"Prefix": "pipper/foo/"}]},
+    ]
+
+    prefixes = list(s3.list_all_prefixes(client, "bucket", "pipper/"))
+    assert prefixes == ["pipper/bar/", "pipper/foo/"]
+    client.list_objects_v2.assert_called_with(
+        Bucket="bucket", Prefix="pipper/", Delimiter="/", ContinuationToken="next"
+    )
+
+
+@pytest.fixture(name="fake")
+def fake_fixture():
+    """Serves a fake S3 bucket and restores the request settings afterwards."""
+    s3.reset_counters()
+    with fake_s3.serve() as server:
+        server.objects["bucket/pipper/foo/v0-1-0.pipper"] = b"bundle"
+        yield server
+    s3.configure()
+
+
+def test_call_hedged(fake: fake_s3.FakeS3Server):
+    """Should duplicate slow requests and use the first response."""
+    s3.configure(hedge=True, hedge_delay=0.05)
+    fake.delays.append(1.5)
+    client = fake.create_client()
+
+    started = time.monotonic()
+    response = s3.call(client, "list_objects_v2", Bucket="bucket", Prefix="pipper/")
+    assert time.monotonic() - started < 1.0
+    assert [e["Key"] for e in response["Contents"]] == ["pipper/foo/v0-1-0.pipper"]
+
+    counters = s3.get_counters()
+    assert counters["list_objects_v2.hedged"] == 1
+    assert counters["list_objects_v2.hedge_won"] == 1
+
+
+def test_call_deadline(fake: fake_s3.FakeS3Server):
+    """Should abandon and retry attempts that exceed their deadline."""
+    s3.configure(deadlines=s3.parse_deadlines(["5", "head_object=0.1"]))
+    fake.delays.extend([1.0, 1.0])
+    client = fake.create_client()
+
+    response = s3.call(
+        client, "head_object", Bucket="bucket", Key="pipper/foo/v0-1-0.pipper"
+    )
+    assert response["ContentLength"] == len(b"bundle")
+    assert s3.get_counters()["head_object.timeout"] == 2
+
+    fake.default_delay = 1.0
+    with pytest.raises(s3.DeadlineExceededError):
+        s3.call(client, "head_object", Bucket="bucket", Key="pipper/foo/v0-1-0.pipper")
+    assert s3.get_counters()["head_object.timeout"] == 2 + s3.MAX_ATTEMPTS
+
+
+def test_call_deadline_writes(fake: fake_s3.FakeS3Server):
+    """Should not abandon writes or unranged GETs at the deadline."""
+    s3.configure(deadlines=s3.parse_deadlines(["0.1"]))
+    fake.default_delay = 0.3
+    client = fake.create_client()
+
+    s3.call(client, "put_object", Bucket="bucket", Key="pipper/bar", Body=b"bar")
+    response = s3.call(client, "get_object", Bucket="bucket", Key="pipper/bar")
+    assert response["Body"].read() == b"bar"
+    assert s3.get_counters() == {"put_object": 1, "get_object": 1}
+
+
+def test_parse_deadlines():
+    """Should only accept deadlines of read operations."""
+    assert s3.parse_deadlines(["5", "head_object=0.5"]) == {
+        "*": 5.0,
+        "head_object": 0.5,
+    }
+    with pytest.raises(ValueError):
+        s3.parse_deadlines(["put_object=1"])
+
+
+def test_token_bucket():
+    """Should limit the request rate and adapt it to throttling."""
+    bucket = s3.TokenBucket(rate=50, burst=1)
+    started = time.monotonic()
+    waits = [bucket.acquire() for _ in range(6)]
+    assert waits[0] == 0
+    assert time.monotonic() - started >= 0.09
+
+    bucket.throttled()
+    assert bucket.rate == 25
+    bucket.succeeded()
+    assert bucket.rate == 25 + s3.RATE_RECOVERY
+
+
+@patch("pipper.s3.random.uniform", return_value=0.5)
+@patch("pipper.s3.time.sleep")
+def test_call_rate_limited(sleep: MagicMock, uniform: MagicMock):
+    """Should delay the first request and reduce the rate when throttled."""
+    s3.reset_counters()
+    s3.configure(rate_limit=100, burst=10, start_jitter=3)
+    client = MagicMock()
+    client.put_object.side_effect = [_error("SlowDown"), {}, {}]
+
+    try:
+        s3.call(client, "put_object", Bucket="bucket", Key="foo")
+        s3.call(client, "put_object", Bucket="bucket", Key="foo")
+        bucket = s3._bucket
+    finally:
+        s3.configure()
+
+    uniform.assert_any_call(0, 3)
+    assert sleep.call_args_list[0].args == (0.5,), "Expected a single start jitter."
+    assert bucket.rate == 100 * s3.RATE_DECREASE_FACTOR + 2 * s3.RATE_RECOVERY
@@ -0,0 +1,95 @@
+import pathlib
+from unittest.mock import MagicMock
+
+import pytest
+
+from pipper import storage
+
+
+def test_local_storage(tmp_path: pathlib.Path):
+    """Should store, list and read objects in a local directory."""
+    source = tmp_path.joinpath("source.pipper")
+    source.write_bytes(b"0123456789")
+    repository = storage.create_storage(f"file://{tmp_path}/repo", None)
+    assert isinstance(repository, storage.LocalStorage)
+
+    repository.put("pipper/foo/v0-1-0.pipper", str(source), {"sha256": "abc"})
+    repository.put("pipper/foo/v0-2-0.pipper", str(source), {})
+    repository.put("pipper/foobar/v1-0-0.pipper", str(source), {})
+
+    keys = [entry["Key"] for entry in repository.list_objects("pipper/foo/v0-")]
+    assert keys == ["pipper/foo/v0-1-0.pipper", "pipper/foo/v0-2-0.pipper"]
+
+    head = repository.head("pipper/foo/v0-1-0.pipper")
+    assert head["Metadata"] == {"sha256": "abc"}
+    assert head["ContentLength"] == 10
+    assert repository.head("pipper/foo/v9-9-9.pipper") is None
+
+    assert repository.keys_exist(
+        ["pipper/foo/v0-1-0.pipper", "pipper/foo/v9-9-9.pipper"]
+    ) == {"pipper/foo/v0-1-0.pipper"}
+    assert repository.get_range("pipper/foo/v0-1-0.pipper", 2, 4) == b"234"
+
+    destination = tmp_path.joinpath("downloaded.pipper")
+    repository.get("pipper/foo/v0-1-0.pipper", str(destination))
+    assert destination.read_bytes() == b"0123456789"
+
+    url = repository.presign("pipper/foo/v0-1-0.pipper", 60)
+    assert url == tmp_path.joinpath("repo/pipper/foo/v0-1-0.pipper").as_uri()
+
+
+@pytest.mark.parametrize("key", ["/etc/hostname", "../secret.txt", "pipper/../../x"])
+def test_local_storage_outside(tmp_path: pathlib.Path, key: str):
+    """Should refuse keys that resolve outside of the repository directory."""
+    tmp_path.joinpath("secret.txt").write_text("secret")
+    repository = storage.LocalStorage(str(tmp_path.joinpath("repo")))
+
+    with pytest.raises(ValueError):
+        repository.head(key)
+    with pytest.raises(ValueError):
+        repository.get(key, str(tmp_path.joinpath("copy.txt")))
+    with pytest.raises(ValueError):
+        repository.put(key, str(tmp_path.joinpath("secret.txt")), {})
+    assert not tmp_path.joinpath("copy.txt").exists()
+
+
+def test_s3_storage_copy():
+    """Should copy objects between buckets server-side."""
+    source = storage.S3Storage(MagicMock(), "source-bucket")
+    destination = storage.S3Storage(MagicMock(), "destination-bucket")
+
+    destination.copy(source, "pipper/foo/v0-1-0.pipper", "mirror/foo/v0-1-0.pipper")
+
+    kwargs = destination.s3_client.copy_object.call_args.kwargs
+    assert kwargs["CopySource"] == {
+        "Bucket": "source-bucket",
+        "Key": "pipper/foo/v0-1-0.pipper",
+    }
+    assert kwargs["Key"] == "mirror/foo/v0-1-0.pipper"
+    source.s3_client.download_file.assert_not_called()
+
+
+def test_s3_storage_delete():
+    """Should delete objects in batches of at most 1000 keys."""
+    client = MagicMock()
+    client.delete_objects.return_value = {}
+    keys = [f"pipper/foo/v0-0-{i}.pipper" for i in range(1500)]
+
+    storage.S3Storage(client, "bucket").delete(keys)
+
+    batches = [
+        c.kwargs["Delete"]["Objects"] for c in client.delete_objects.call_args_list
+    ]
+    assert [len(batch) for batch in batches] == [1000, 500]
+    assert batches[1][-1] == {"Key": keys[-1]}
+
+
+def test_storage_incomplete():
+    """Should refuse to create backends that do not implement the interface."""
+
+    class Incomplete(storage.Storage):
+        def list_objects(self, prefix: str):
+            return iter([])
+
+    with pytest.raises(TypeError):
+        Incomplete()  # type: ignore[abstract]
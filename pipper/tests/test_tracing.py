@@ -0,0 +1,61 @@
+import json
+import pathlib
+import threading
+
+from pipper import tracing
+
+
+@tracing.traced("work")
+def _work(size: int) -> int:
+    """Adds the size to the bytes of the enclosing span."""
+    tracing.add("bytes", size)
+    return size
+
+
+def test_disabled():
+    """Should not record spans while tracing is disabled."""
+    tracing.disable()
+    with tracing.span("outer"):
+        assert _work(3) == 3
+    assert tracing.get_spans() == []
+
+
+def test_summarize():
+    """Should aggregate nested spans by their path and sum their attributes."""
+    tracing.enable()
+    try:
+        with tracing.span("outer", package="foo"):
+            _work(3)
+            _work(4)
+            tracing.add("s3_calls")
+        thread = threading.Thread(target=_work, args=(5,))
+        thread.start()
+        thread.join()
+        summary = {aggregate["path"]: aggregate for aggregate in tracing.summarize()}
+        events = tracing.to_trace_events()["traceEvents"]
+    finally:
+        tracing.disable()
+
+    assert summary["outer/work"]["count"] == 2
+    assert summary["outer/work"]["bytes"] == 7
+    assert summary["outer"]["s3_calls"] == 1
+    assert summary["outer"]["seconds"] >= summary["outer/work"]["seconds"]
+    assert summary["work"]["bytes"] == 5
+    outer = next(e for e in events if e["name"] == "outer")
+    assert outer["ph"] == "X" and outer["args"]["package"] == "foo"
+    assert len({e["tid"] for e in events}) == 2
+
+
+def test_write_trace(tmp_path: pathlib.Path):
+    """Should write the spans as a Chrome trace event file."""
+    tracing.enable()
+    try:
+        _work(1)
+        path = tracing.write_trace(str(tmp_path.joinpath("trace.json")))
+        assert "work" in tracing.format_summary()
+    finally:
+        tracing.disable()
+
+    events = json.loads(pathlib.Path(path).read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["work"]
+    assert events[0]["args"] == {"bytes": 1}
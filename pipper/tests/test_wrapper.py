@@ -0,0 +1,85 @@
+import importlib.util
+import pathlib
+import py_compile
+import sys
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from pipper import wrapper
+
+
+@patch("pipper.wrapper.subprocess.run")
+def test_install_wheel_no_compile(run: MagicMock):
+    """Should tell pip not to compile bytecode when disabled."""
+    wrapper.install_wheel("foo.whl", compile_bytecode=False)
+    assert "--no-compile" in run.call_args.args[0]
+
+    wrapper.install_wheel("foo.whl")
+    assert "--no-compile" not in run.call_args.args[0]
+
+
+def test_compile_bytecode(tmp_path: pathlib.Path):
+    """Should compile python files in parallel for each optimization level."""
+    tmp_path.joinpath("foo").mkdir()
+    tmp_path.joinpath("foo", "__init__.py").write_text("VALUE = 1\n")
+    tmp_path.joinpath("foo", "bar.py").write_text("VALUE = 2\n")
+
+    files = [str(p) for p in tmp_path.joinpath("foo").iterdir()]
+    wrapper.compile_bytecode(files, workers=2, optimize=[0, 1])
+
+    cache_tag = sys.implementation.cache_tag
+    names = sorted(p.name for p in tmp_path.joinpath("foo", "__pycache__").iterdir())
+    assert names == [
+        f"__init__.{cache_tag}.opt-1.pyc",
+        f"__init__.{cache_tag}.pyc",
+        f"bar.{cache_tag}.opt-1.pyc",
+        f"bar.{cache_tag}.pyc",
+    ]
+
+
+def test_compile_bytecode_checked(tmp_path: pathlib.Path):
+    """Should not replace hash-checked bytecode with timestamp-checked bytecode."""
+    path = tmp_path.joinpath("foo.py")
+    path.write_text("VALUE = 1\n")
+    cache_path = importlib.util.cache_from_source(str(path))
+    py_compile.compile(
+        str(path),
+        cache_path,
+        invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+    )
+    assert wrapper.has_checked_bytecode(str(path), -1)
+    assert not wrapper.has_checked_bytecode(str(path), 1)
+    contents = pathlib.Path(cache_path).read_bytes()
+
+    wrapper.compile_bytecode([str(path)], workers=1, optimize=[-1, 1])
+    assert pathlib.Path(cache_path).read_bytes() == contents
+    assert pathlib.Path(
+        importlib.util.cache_from_source(str(path), optimization=1)
+    ).exists()
+
+
+def test_get_install_directories(tmp_path: pathlib.Path):
+    """Should use the target directory when one is specified."""
+    assert wrapper.get_install_directories(False, str(tmp_path)) == [str(tmp_path)]
+    assert wrapper.get_install_directories(False, None)
+
+
+def test_list_installed_files(tmp_path: pathlib.Path):
+    """Should list the python files of distributions installed after a snapshot."""
+    for name in ("foo", "bar"):
+        tmp_path.joinpath(name).mkdir()
+        tmp_path.joinpath(name, "__init__.py").write_text("")
+        dist_info = tmp_path.joinpath(f"{name}-1.0.0.dist-info")
+        dist_info.mkdir()
+        if name == "foo":
+            snapshot = wrapper.snapshot_records([str(tmp_path)])
+        dist_info.joinpath("RECORD").write_text(
+            f"{name}/__init__.py,sha256=abc,0\n../../bin/{name},,\n"
+        )
+
+    assert wrapper.list_installed_files([str(tmp_path)], snapshot) == [
+        str(tmp_path.joinpath("bar", "__init__.py").resolve()),
+        str(tmp_path.joinpath("foo", "__init__.py").resolve()),
+    ]
+    snapshot = wrapper.snapshot_records([str(tmp_path)])
+    assert wrapper.list_installed_files([str(tmp_path)], snapshot) == []
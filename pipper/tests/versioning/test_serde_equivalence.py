@@ -0,0 +1,112 @@
+import random
+import typing
+
+import pytest
+
+from pipper.tests.versioning import legacy_serde
+from pipper.versioning import serde
+
+#: Number of randomly generated inputs compared for each function.
+CASES = 5000
+
+#: Names of the functions whose results are compared.
+FUNCTIONS = ("serialize", "serialize_prefix", "deserialize", "deserialize_prefix")
+
+#: Characters inserted into the generated versions to make them invalid.
+NOISE = "0123456789.-+_vVa \n"
+
+
+def _identifier(rng: random.Random) -> str:
+    """Generates a pre-release or build identifier, which may be invalid."""
+    choices = [
+        str(rng.randint(0, 30)),
+        f"0{rng.randint(0, 9)}",
+        rng.choice(["alpha", "beta", "rc", "dev", "pre", "build", "v", "x-y"]),
+        "".join(rng.choices("abcv-019", k=rng.randint(1, 6))),
+    ]
+    return rng.choices(choices, weights=[4, 1, 4, 3])[0]
+
+
+def _version(rng: random.Random) -> str:
+    """Generates a complete semantic version, mostly valid ones."""
+    version = ".".join(
+        rng.choices(
+            [str(rng.randint(0, 12)), str(rng.randint(0, 100_000)), "01"],
+            weights=[10, 4, 1],
+        )[0]
+        for _ in range(3)
+    )
+    if rng.random() < 0.5:
+        identifiers = [_identifier(rng) for _ in range(rng.randint(1, 3))]
+        version += "-" + rng.choice([".", "-"]).join(identifiers)
+    if rng.random() < 0.3:
+        identifiers = [_identifier(rng) for _ in range(rng.randint(1, 3))]
+        version += "+" + rng.choice([".", "-"]).join(identifiers)
+    return version
+
+
+def _mutate(rng: random.Random, value: str) -> str:
+    """Randomly inserts, removes or truncates characters of the value."""
+    action = rng.choice(["insert", "remove", "truncate", "keep", "keep", "keep"])
+    position = rng.randint(0, len(value))
+    if action == "insert":
+        return value[:position] + rng.choice(NOISE) + value[position:]
+    if action == "remove":
+        return value[:position] + value[position + 1 :]
+    if action == "truncate":
+        return value[:position]
+    return value
+
+
+def _outcome(function: typing.Callable, value: str) -> tuple:
+    """Returns the result of the function or the error it raised."""
+    try:
+        return "result", function(value)
+    except ValueError as error:
+        return "error", str(error)
+
+
+def _generate(seed: int) -> typing.Iterator[tuple[str, str]]:
+    """Generates pairs of possibly invalid versions and safe versions."""
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        version = _version(rng)
+        try:
+            safe_version = legacy_serde.serialize(version)
+        except ValueError:
+            safe_version = "v" + version.replace(".", "-")
+        yield _mutate(rng, version), _mutate(rng, safe_version)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_equivalence(seed: int):
+    """Should convert versions exactly like the legacy implementation."""
+    serde.serialize.cache_clear()
+    serde.deserialize.cache_clear()
+    for version, safe_version in _generate(seed):
+        for value in (version, safe_version):
+            for name in FUNCTIONS:
+                expected = _outcome(getattr(legacy_serde, name), value)
+                assert _outcome(getattr(serde, name), value) == expected, value
+
+
+def test_round_trip():
+    """Should deserialize the serialized valid versions to themselves."""
+    rng = random.Random(4)
+    versions = [_version(rng) for _ in range(CASES)]
+    valid = [v for v in versions if _outcome(serde.serialize, v)[0] == "result"]
+    assert len(valid) > CASES // 4
+    for version in valid:
+        # Trailing "v" characters are stripped from safe versions, as before.
+        if not version.endswith("v"):
+            assert serde.deserialize(serde.serialize(version)) == version
+
+
+def test_cache_bounded():
+    """Should memoize conversions in caches of bounded size."""
+    serde.deserialize.cache_clear()
+    serde.deserialize("v1-2-3")
+    serde.deserialize("v1-2-3")
+    info = serde.deserialize.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 1, serde.CACHE_SIZE)
+    assert serde.serialize.cache_info().maxsize == serde.CACHE_SIZE
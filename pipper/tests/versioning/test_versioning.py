@@ -47,3 +47,15 @@ def test_remote_sorting():
         Expected the RemoteVersions to be sorted by version such that their
         package names are sorted alphabetically.
         """
+
+
+def test_make_s3_key_sharded():
+    """Should insert the package shard between the root prefix and the name."""
+    key = versioning.make_s3_key("fake-package", "1.2.3", sharded=True)
+    shard = versioning.layout.get_shard("fake-package")
+    remote = versioning.RemoteVersion("FAKE", key)
+
+    assert key == f"pipper/{shard}/fake-package/v1-2-3.pipper"
+    assert remote.package_name == "fake-package"
+    assert remote.root_prefix == "pipper"
+    assert remote.version == "1.2.3"
@@ -0,0 +1,209 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import typing
+
+#: Names of the span attributes that are summed when spans are aggregated.
+SUMMED_ATTRIBUTES = ("bytes", "s3_calls")
+
+_spans: list[dict] = []
+_local = threading.local()
+_lock = threading.Lock()
+_state: dict[str, typing.Any] = {"enabled": False, "origin": 0.0}
+
+
+def enable():
+    """
+    Enables the recording of timing spans. Spans are not recorded until this
+    is called, in which case the instrumentation costs a single flag check.
+    """
+    with _lock:
+        _spans.clear()
+        _state.update(enabled=True, origin=time.perf_counter())
+
+
+def disable():
+    """Disables the recording of timing spans and discards those recorded."""
+    with _lock:
+        _spans.clear()
+        _state["enabled"] = False
+
+
+def is_enabled() -> bool:
+    """Whether or not timing spans are being recorded."""
+    return bool(_state["enabled"])
+
+
+def _get_stack() -> list[dict]:
+    """Returns the stack of the spans that are open in the current thread."""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+@contextlib.contextmanager
+def _record(name: str, attributes: dict) -> typing.Iterator[dict]:
+    stack = _get_stack()
+    record = {
+        "name": name,
+        "path": f"{stack[-1]['path']}/{name}" if stack else name,
+        "thread": threading.get_ident(),
+        "start": time.perf_counter() - _state["origin"],
+        "duration": 0.0,
+        "attributes": dict(attributes),
+    }
+    stack.append(record)
+    try:
+        yield record
+    finally:
+        stack.pop()
+        record["duration"] = time.perf_counter() - _state["origin"] - record["start"]
+        with _lock:
+            _spans.append(record)
+
+
+def span(name: str, **attributes) -> typing.ContextManager:
+    """
+    Times the enclosed block as a span nested within the span that is open in
+    the current thread, if any. Spans opened in worker threads are not nested
+    within the spans of the threads that started them.
+
+    :param name:
+        Name of the span, e.g. "download".
+    :param attributes:
+        Additional information to record with the span, e.g. the package.
+    """
+    if not _state["enabled"]:
+        return contextlib.nullcontext()
+    return _record(name, attributes)
+
+
+def traced(name: str) -> typing.Callable:
+    """
+    Decorates a function to time each of its calls as a span with the given
+    name. The function is called directly while spans are not recorded.
+    """
+
+    def decorator(function: typing.Callable) -> typing.Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return function(*args, **kwargs)
+            with _record(name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def annotate(**attributes):
+    """Records the attributes with the innermost span open in the current thread."""
+    if not _state["enabled"]:
+        return
+    stack = _get_stack()
+    if stack:
+        stack[-1]["attributes"].update(attributes)
+
+
+def add(name: str, value: float = 1):
+    """
+    Adds the value to the named attribute of the innermost span that is open
+    in the current thread, e.g. the number of bytes it transferred.
+    """
+    if not _state["enabled"]:
+        return
+    stack = _get_stack()
+    if stack:
+        attributes = stack[-1]["attributes"]
+        attributes[name] = attributes.get(name, 0) + value
+
+
+def add_file_size(path: str):
+    """
+    Adds the size of the file to the bytes of the innermost span that is open
+    in the current thread, without reading its size while tracing is disabled.
+    """
+    if _state["enabled"]:
+        add("bytes", os.path.getsize(path))
+
+
+def get_spans() -> list[dict]:
+    """Returns the completed spans in the order in which they completed."""
+    with _lock:
+        return list(_spans)
+
+
+def summarize() -> list[dict]:
+    """
+    Aggregates the completed spans by their nesting path, summing their
+    durations and the summed attributes.
+
+    :return:
+        The aggregates sorted by their path, each with the path, the number
+        of spans, their total duration in seconds and the summed attributes.
+    """
+    aggregates: dict[str, dict] = {}
+    for record in get_spans():
+        aggregate = aggregates.setdefault(
+            record["path"], {"path": record["path"], "count": 0, "seconds": 0.0}
+        )
+        aggregate["count"] += 1
+        aggregate["seconds"] += record["duration"]
+        for name in SUMMED_ATTRIBUTES:
+            if name in record["attributes"]:
+                aggregate[name] = aggregate.get(name, 0) + record["attributes"][name]
+    return [aggregates[path] for path in sorted(aggregates)]
+
+
+def format_summary() -> str:
+    """Formats the aggregated spans as an indented table."""
+    lines = [f"{'Span':<48}{'Count':>7}{'Seconds':>10}  Details"]
+    for aggregate in summarize():
+        depth = aggregate["path"].count("/")
+        label = "  " * depth + aggregate["path"].rsplit("/", 1)[-1]
+        details = ", ".join(
+            f"{name}={aggregate[name]}"
+            for name in SUMMED_ATTRIBUTES
+            if name in aggregate
+        )
+        count, seconds = aggregate["count"], aggregate["seconds"]
+        lines.append(f"{label:<48}{count:>7}{seconds:>10.3f}  {details}")
+    return "\n".join(lines)
+
+
+def to_trace_events() -> dict:
+    """
+    Converts the completed spans into the Chrome trace event format, which
+    can be loaded by chrome://tracing, Perfetto and OpenTelemetry tooling.
+    """
+    pid = os.getpid()
+    threads: dict[int, int] = {}
+    events = []
+    for record in sorted(get_spans(), key=lambda r: r["start"]):
+        tid = threads.setdefault(record["thread"], len(threads) + 1)
+        events.append(
+            {
+                "name": record["name"],
+                "cat": "pipper",
+                "ph": "X",
+                "ts": round(record["start"] * 1e6, 3),
+                "dur": round(record["duration"] * 1e6, 3),
+                "pid": pid,
+                "tid": tid,
+                "args": record["attributes"],
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_trace(path: str) -> str:
+    """Writes the completed spans as a Chrome trace event file."""
+    path = os.path.realpath(path)
+    with open(path, "w") as f:
+        json.dump(to_trace_events(), f, default=str)
+    return path
@@ -1,14 +1,23 @@
+import time
 from urllib.parse import urlparse
 
 from pipper import s3  # noqa
+from pipper import tracing  # noqa
 from pipper.environment import Environment  # noqa
 from pipper.versioning.definitions import RemoteVersion  # noqa
+from pipper.versioning.layout import get_package_prefix  # noqa
 from pipper.versioning.serde import deserialize  # noqa
 from pipper.versioning.serde import deserialize_prefix  # noqa
 from pipper.versioning.serde import explode  # noqa
 from pipper.versioning.serde import serialize  # noqa
 from pipper.versioning.serde import serialize_prefix  # noqa
 
+#: Seconds for which an environment reuses an empty listing of the legacy
+#: key prefix of a package in a sharded repository instead of listing it
+#: again. Versions published there later by clients that still use the legacy
+#: layout are found once the listing expires.
+LEGACY_LISTING_TTL = 60.0
+
 
 def to_remote_version(
     package_name: str,
@@ -32,9 +41,17 @@ def parse_package_url(package_url: str) -> RemoteVersion:
 
     `https://s3.amazonaws.com/bucket-name/prefix/package-name/v0-0-18.pipper`
 
-    into a RemoteVersion object.
+    into a RemoteVersion object. URLs of bundles in local repositories, i.e.
+    `file:///directory/prefix/package-name/v0-0-18.pipper`, are parsed with
+    the repository directory URL in place of the bucket name.
     """
     url_data = urlparse(package_url)
+    if url_data.scheme == "file":
+        directory, *key_parts = url_data.path.rsplit("/", 3)
+        return RemoteVersion(
+            bucket=f"file://{directory}", key="/".join(key_parts), url=package_url
+        )
+
     parts = url_data.path.strip("/").split("/", 1)
     return RemoteVersion(bucket=parts[0], key=parts[1], url=package_url)
 
@@ -43,20 +60,85 @@ def make_s3_key(
     package_name: str,
     package_version: str,
     root_prefix: str = "pipper",
+    sharded: bool = False,
 ) -> str:
     """
     Converts a package name and version into a fully-qualified S3 key to the
     location where the file resides in the hosting S3 bucket. The package
     version must be a complete semantic version but can be serialized or not.
+    Keys in sharded repositories contain the shard segment of the package.
     """
     safe_version = (
         serialize(package_version)
         if not package_version.startswith("v")
         else package_version
     )
-    return f"{root_prefix}/{package_name}/{safe_version}.pipper"
+    package_prefix = get_package_prefix(package_name, root_prefix, sharded)
+    return f"{package_prefix}/{safe_version}.pipper"
+
+
+def make_s3_key_prefix(
+    package_name: str,
+    version_prefix: str | None = None,
+    root_prefix: str = "pipper",
+    sharded: bool = False,
+) -> str:
+    """
+    Converts a package name and optional version prefix into the S3 key prefix
+    shared by the keys of all matching versions. The version prefix may
+    include wildcard characters, in which case everything from the first
+    wildcard onwards is ignored.
+    """
+    safe_prefix = serialize_prefix(version_prefix or "").split("*")[0]
+    package_prefix = get_package_prefix(package_name, root_prefix, sharded)
+    return f"{package_prefix}/{safe_prefix or 'v'}"
+
+
+def list_package_entries(
+    environment: Environment,
+    package_name: str,
+    version_prefix: str | None = None,
+) -> list[dict]:
+    """
+    Lists the entries of the pipper files of the package. In sharded
+    repositories, both the sharded and the legacy key prefixes of the package
+    are listed, as clients that still use the legacy layout may publish new
+    versions there while the repository is being migrated. Entries of the
+    sharded key prefix come first and versions found in both are included
+    twice. An empty listing of the legacy key prefix of a package found at
+    its sharded key prefix is reused by the environment for a while.
+
+    :param environment:
+        Context object for the currently running command invocation.
+    :param package_name:
+        Name of the pipper package to list.
+    :param version_prefix:
+        A constraining version prefix, which may include wildcard characters.
+    """
+    layouts = [True, False] if environment.sharded else [False]
+    listed = environment.empty_legacy_listings.get(package_name)
+    if listed is not None and time.monotonic() - listed < LEGACY_LISTING_TTL:
+        layouts = [True]
+
+    listings = []
+    for sharded in layouts:
+        key_prefix = make_s3_key_prefix(
+            package_name, version_prefix, environment.root_prefix, sharded
+        )
+        listings.append(
+            [
+                entry
+                for entry in environment.storage.list_objects(key_prefix)
+                if entry["Key"].endswith(".pipper")
+            ]
+        )
+
+    if len(listings) == 2 and listings[0] and not listings[1] and not version_prefix:
+        environment.empty_legacy_listings[package_name] = time.monotonic()
+    return [entry for listing in listings for entry in listing]
 
 
+@tracing.traced("list_versions")
 def list_versions(
     environment: Environment,
     package_name: str,
@@ -68,7 +150,9 @@ def list_versions(
     Lists the available versions of the specified package by querying the
     remote S3 storage and returns those as keys. The results are sorted in
     order of increasing version unless `reverse` is True in which case the
-    returned list is sorted from highest version to lowest one.
+    returned list is sorted from highest version to lowest one. In sharded
+    repositories, the versions at the sharded and the unsharded keys of the
+    package are merged, preferring the sharded keys of versions found in both.
 
     By default, only stable releases are returned, but pre-releases can be
     included as well if the `include_prereleases` argument is set to True.
@@ -87,35 +171,19 @@ def list_versions(
     :param include_prereleases:
         Whether or not to include pre-release versions in the results.
     """
-    prefix = serialize_prefix(version_prefix or "").split("*")[0]
-    key_prefix = f"{environment.root_prefix}/{package_name}/v{prefix}"
-
-    responses: list[dict] = []
-    while not responses or responses[-1].get("NextContinuationToken"):
-        continuation_kwargs = (
-            {"ContinuationToken": responses[-1].get("NextContinuationToken")}
-            if responses
-            else {}
+    tracing.annotate(package=package_name)
+    results: dict[str, RemoteVersion] = {}
+    for entry in list_package_entries(environment, package_name, version_prefix):
+        remote = RemoteVersion(
+            key=entry["Key"],
+            bucket=environment.bucket,
+            base_url=environment.download_base_url,
         )
-        responses.append(
-            s3.list_objects(
-                s3_client=environment.s3_client,
-                bucket=environment.bucket,
-                prefix=key_prefix,
-                **continuation_kwargs,
-            )
-        )
-
-    results = [
-        RemoteVersion(key=entry["Key"], bucket=environment.bucket)
-        for response in responses
-        for entry in response.get("Contents") or []
-        if entry["Key"].endswith(".pipper")
-    ]
+        results.setdefault(remote.safe_version, remote)
 
     return [
         r
-        for r in sorted(results, reverse=reverse)
+        for r in sorted(results.values(), reverse=reverse)
         if not r.is_prerelease or include_prereleases
     ]
 
@@ -137,7 +205,6 @@ def compare_constraint(version: str, constraint: str) -> int:
     constraint_parts = explode(constraint)
 
     def compare_part(v: str, c: str) -> int:
-        print(version_parts, constraint_parts)
         is_equal = (
             v == c  # direct match
             or "*" in [v, c]  # one is a wildcard
@@ -198,6 +265,29 @@ def find_latest_match(
     if not available:
         raise ValueError(f'No pipper package "{package_name}" was found.')
 
+    return select_latest_match(available, version_constraint)
+
+
+def select_latest_match(
+    available: list[RemoteVersion],
+    version_constraint: str | None = None,
+) -> RemoteVersion | None:
+    """
+    Returns the highest of the already listed remote versions that satisfies
+    the version constraint, which allows multiple constraints on the same
+    package to be resolved from a single listing. If no constraint is
+    specified, the highest version available is returned. If no match is
+    found, a `None` value is returned instead.
+
+    :param available:
+        Remote versions of the package sorted from highest version to lowest.
+    :param version_constraint:
+        A constraining version or partial version as described for the
+        `find_latest_match` function.
+    """
+    if not available:
+        return None
+
     if not version_constraint:
         return available[0]
 
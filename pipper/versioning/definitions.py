@@ -1,5 +1,6 @@
 import semver
 
+from pipper.versioning import layout
 from pipper.versioning import serde
 
 
@@ -13,11 +14,13 @@ class RemoteVersion:
         bucket: str,
         key: str,
         url: str | None = None,
+        base_url: str | None = None,
     ):
         """_ doc..."""
         self._key = key
         self._bucket = bucket
         self._url = url
+        self._base_url = base_url
 
     @property
     def key(self) -> str:
@@ -33,11 +36,14 @@ class RemoteVersion:
         The top-level key prefix common to all packages in the given pipper
         repository. By default, the prefix is 'pipper'.
         """
-        return self._key.rsplit("/", 2)[0]
+        parts = self._key.strip("/").split("/")[:-2]
+        if parts and layout.is_shard(parts[-1]):
+            parts = parts[:-1]
+        return "/".join(parts)
 
     @property
     def package_name(self) -> str:
-        return self._key.strip("/").split("/")[1]
+        return self._key.strip("/").split("/")[-2]
 
     @property
     def filename(self) -> str:
@@ -57,16 +63,13 @@ class RemoteVersion:
 
     @property
     def url(self) -> str:
-        standard_url = "/".join(
-            [
-                "https://s3.amazonaws.com",
-                self.bucket,
-                self.root_prefix,
-                self.package_name,
-                f"{self.safe_version}.pipper",
-            ]
-        )
-        return self._url or standard_url
+        """
+        URL of the remote pipper bundle, which uses the download base URL of
+        the repository when one is configured and the global S3 endpoint
+        otherwise.
+        """
+        base_url = self._base_url or f"https://s3.amazonaws.com/{self.bucket}"
+        return self._url or "{}/{}".format(base_url.rstrip("/"), self.key)
 
     @property
     def is_prerelease(self) -> bool:
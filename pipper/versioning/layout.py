@@ -0,0 +1,42 @@
+import hashlib
+import re
+
+#: Name of the repository layout that adds a hash shard segment to keys.
+SHARDED_LAYOUT = "sharded"
+
+#: Name of the original repository layout without shard segments.
+LEGACY_LAYOUT = "legacy"
+
+#: Number of hexadecimal characters of the package name hash used as the
+#: shard, which spreads packages over 256 key prefixes.
+SHARD_WIDTH = 2
+
+SHARD_REGEX = re.compile(rf"^_[0-9a-f]{{{SHARD_WIDTH}}}$")
+
+
+def get_shard(package_name: str) -> str:
+    """
+    Returns the deterministic shard segment of the package, e.g. `_3f`, which
+    is inserted between the root prefix and the package name in sharded
+    repositories. Each package always maps to the same shard, so listing its
+    versions remains a single request.
+    """
+    digest = hashlib.sha256(package_name.encode()).hexdigest()
+    return f"_{digest[:SHARD_WIDTH]}"
+
+
+def is_shard(segment: str) -> bool:
+    """Determines whether or not the key segment is a shard segment."""
+    return bool(SHARD_REGEX.match(segment))
+
+
+def get_package_prefix(
+    package_name: str, root_prefix: str = "pipper", sharded: bool = False
+) -> str:
+    """
+    Returns the key prefix of the directory containing the versions of the
+    package, which includes the shard segment in sharded repositories.
+    """
+    if sharded:
+        return f"{root_prefix}/{get_shard(package_name)}/{package_name}"
+    return f"{root_prefix}/{package_name}"
@@ -1,4 +1,51 @@
-import semver
+import functools
+import re
+
+#: Maximum number of conversions memoized by `serialize` and `deserialize`,
+#: which keeps the versions of the largest listings cached in bounded memory.
+CACHE_SIZE = 2**16
+
+#: Grammar of a complete semantic version, which is the same grammar that
+#: `semver.Version.parse` validates versions with.
+SEMVER_REGEX = re.compile(
+    r"""
+    ^
+    (?P<major>0|[1-9]\d*)
+    \.
+    (?P<minor>0|[1-9]\d*)
+    \.
+    (?P<patch>0|[1-9]\d*)
+    (?:-(?P<prerelease>
+        (?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)
+        (?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*
+    ))?
+    (?:\+(?P<build>
+        [0-9a-zA-Z-]+
+        (?:\.[0-9a-zA-Z-]+)*
+    ))?
+    \Z
+    """,
+    re.VERBOSE | re.ASCII,
+)
+
+#: Grammar of the safe versions created by `serialize`, which are converted
+#: back in a single pass. Other safe version prefixes, including those ending
+#: in a "v", which is stripped along with the leading one, are deserialized
+#: section by section instead.
+SAFE_VERSION_REGEX = re.compile(
+    r"""
+    v
+    (?P<major>0|[1-9]\d*)
+    -
+    (?P<minor>0|[1-9]\d*)
+    -
+    (?P<patch>0|[1-9]\d*)
+    (?:__pre_(?P<prerelease>[0-9a-zA-Z-]+(?:_[0-9a-zA-Z-]+)*))?
+    (?:__build_(?P<build>[0-9a-zA-Z-]+(?:_[0-9a-zA-Z-]+)*))?
+    (?<!v)
+    """,
+    re.VERBOSE | re.ASCII,
+)
 
 
 def explode(version_prefix: str) -> tuple:
@@ -26,18 +73,24 @@ def explode(version_prefix: str) -> tuple:
     return tuple(sections)
 
 
+@functools.lru_cache(maxsize=CACHE_SIZE)
 def serialize(version: str) -> str:
     """
     Converts the specified semantic version into a URL/filesystem safe
     version. If the version argument is not a valid semantic version a
     ValueError will be raised.
     """
-    try:
-        semver.VersionInfo.parse(version)
-    except ValueError as error:
-        raise ValueError(f'Invalid semantic version "{version}"') from error
+    match = SEMVER_REGEX.match(version)
+    if match is None:
+        raise ValueError(f'Invalid semantic version "{version}"')
 
-    return serialize_prefix(version)
+    major, minor, patch, prerelease, build = match.groups()
+    safe_version = f"v{major}-{minor}-{patch}"
+    if prerelease:
+        safe_version += f"__pre_{prerelease.replace('.', '_')}"
+    if build:
+        safe_version += f"__build_{build.replace('.', '_')}"
+    return safe_version
 
 
 def serialize_prefix(version_prefix: str) -> str:
@@ -74,6 +127,16 @@ def deserialize_prefix(safe_version_prefix: str) -> str:
     if not safe_version_prefix.startswith("v"):
         return safe_version_prefix
 
+    match = SAFE_VERSION_REGEX.fullmatch(safe_version_prefix)
+    if match:
+        major, minor, patch, prerelease, build = match.groups()
+        version = f"{major}.{minor}.{patch}"
+        if prerelease:
+            version += f"-{prerelease.replace('_', '.')}"
+        if build:
+            version += f"+{build.replace('_', '.')}"
+        return version
+
     searches = [
         ("__build_", "split"),
         ("__pre_", "split"),
@@ -99,6 +162,7 @@ def deserialize_prefix(safe_version_prefix: str) -> str:
     return prefix
 
 
+@functools.lru_cache(maxsize=CACHE_SIZE)
 def deserialize(safe_version: str) -> str:
     """
     Converts the specified URL/filesystem safe version into a standard semantic
@@ -106,10 +170,6 @@ def deserialize(safe_version: str) -> str:
     ValueError will be raised.
     """
     result = deserialize_prefix(safe_version)
-
-    try:
-        semver.VersionInfo.parse(result)
-    except ValueError as error:
-        raise ValueError(f'Invalid semantic version "{result}"') from error
-
+    if SEMVER_REGEX.match(result) is None:
+        raise ValueError(f'Invalid semantic version "{result}"')
     return result
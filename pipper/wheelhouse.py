@@ -0,0 +1,199 @@
+import hashlib
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+from concurrent import futures
+
+from packaging.utils import parse_wheel_filename
+
+from pipper import downloader
+from pipper import environment
+from pipper.environment import Environment
+
+#: Name of the requirements file written into the wheelhouse.
+REQUIREMENTS_FILENAME = "requirements.txt"
+
+#: Number of pipper files downloaded concurrently when resolving dependencies.
+DEFAULT_JOBS = 8
+
+
+def fetch_wheel(env: Environment, package_id: str, directory: str) -> dict:
+    """
+    Downloads the pipper file of the package and extracts its bare wheel into
+    the wheelhouse directory.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param package_id:
+        Identifier of the package, either a name or a NAME:VERSION combination.
+    :param directory:
+        The wheelhouse directory into which the wheel is extracted.
+    :return:
+        The metadata of the pipper file.
+    """
+    data = downloader.parse_package_id(env, package_id, use_latest_version=True)
+    # Extracting within the directory keeps the wheel on the same filesystem,
+    # so that it can be moved into place atomically.
+    with tempfile.TemporaryDirectory(prefix=".pipper-fetch-", dir=directory) as temp:
+        bundle_path = os.path.join(temp, "package.pipper")
+        if "url" in data:
+            downloader.save(package_id, bundle_path)
+        elif not downloader.fetch_bundle(env, data["key"], bundle_path):
+            raise FileNotFoundError(
+                f'Version {data["version"]} not available for "{data["name"]}"'
+            )
+        paths = downloader.extract_pipper_file(bundle_path, temp)
+        os.replace(
+            paths["wheel_path"],
+            os.path.join(directory, paths["metadata"]["wheel_name"]),
+        )
+
+    print(f"[EXTRACTED]: {paths['metadata']['wheel_name']}")
+    return paths["metadata"]
+
+
+def resolve_pipper_wheels(
+    env: Environment, package_ids: list[str], directory: str
+) -> list[str]:
+    """
+    Extracts the wheels of the pipper packages and of all their transitive
+    pipper dependencies into the wheelhouse directory. Each level of the
+    dependency graph is downloaded concurrently and every package is only
+    fetched once, at the version first requested for it.
+
+    :param env:
+        Command environment in which this function is being executed
+    :param package_ids:
+        Identifiers of the pipper packages to export.
+    :param directory:
+        The wheelhouse directory into which the wheels are extracted.
+    :return:
+        The filenames of the extracted wheels.
+    """
+    jobs = max(1, int(env.args.get("jobs") or DEFAULT_JOBS))
+    seen: set[str] = set()
+    wheel_names: list[str] = []
+    pending = list(package_ids)
+
+    with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending:
+            level = []
+            for package_id in pending:
+                is_url = "://" in package_id
+                name = package_id if is_url else package_id.split(":", 1)[0]
+                if name not in seen:
+                    seen.add(name)
+                    level.append(package_id)
+
+            results = executor.map(lambda p: fetch_wheel(env, p, directory), level)
+            pending = []
+            for metadata in results:
+                wheel_names.append(metadata["wheel_name"])
+                pending.extend(metadata.get("dependencies") or [])
+
+    return wheel_names
+
+
+def download_wheels(directory: str, requirements: list[str], find_links: str):
+    """
+    Downloads bare wheels of the requirements, and of all their dependencies
+    from PyPI, into the directory with `pip download --only-binary=:all:`.
+    Nothing is built locally, so requirements that are only available as
+    source distributions fail the export. Wheels already in the find links
+    directory are used instead of downloading them.
+
+    :param directory:
+        The directory into which the wheels are collected.
+    :param requirements:
+        PyPI requirement specifiers and paths of wheel files.
+    :param find_links:
+        The wheelhouse directory containing the wheels of earlier exports.
+    """
+    if not requirements:
+        return
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "pip",
+        "download",
+        "--only-binary=:all:",
+        "--dest",
+        directory,
+        "--find-links",
+        find_links,
+        *requirements,
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def write_requirements(directory: str, wheel_names: list[str]) -> str:
+    """
+    Writes a requirements file pinning the wheels to their version and
+    sha256 hash, for use with `pip install --no-index --find-links
+    <directory> --require-hashes -r requirements.txt`. Other wheels in the
+    wheelhouse, e.g. those of earlier exports, are not pinned.
+
+    :param directory:
+        The wheelhouse directory.
+    :param wheel_names:
+        Filenames of the wheels of this export within the wheelhouse.
+    :return:
+        Path of the written requirements file.
+    """
+    lines = []
+    for path in (pathlib.Path(directory, n) for n in sorted(wheel_names)):
+        name, version, *_ = parse_wheel_filename(path.name)
+        with path.open("rb") as f:
+            sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+        lines.append(f"{name}=={version} --hash=sha256:{sha256}")
+
+    requirements_path = os.path.join(directory, REQUIREMENTS_FILENAME)
+    with open(requirements_path, "w") as f:
+        f.write("\n".join(sorted(lines)) + "\n")
+    return requirements_path
+
+
+def export(env: Environment) -> str:
+    """
+    Exports the full transitive set of dependencies of the packages, or of
+    the pipper.(json|yaml) configs file, into a flat directory of bare wheels
+    with a hash-pinned requirements file. Container images can then install
+    them in a separate build layer with `pip install --no-index`, without
+    accessing the repository when the dependencies are unchanged.
+
+    :param env:
+        Command environment in which this function is being executed
+    :return:
+        Path of the written requirements file.
+    """
+    directory = os.path.realpath(env.args["wheelhouse"])
+    os.makedirs(directory, exist_ok=True)
+
+    package_ids = env.args.get("packages") or []
+    pypi_packages: list[str] = []
+    if not package_ids:
+        configs = environment.load_configs(env.args.get("configs_path"))
+        prefix = "dev_" if env.args.get("dev") else ""
+        package_ids = configs.get(f"{prefix}dependencies") or []
+        pypi_packages = configs.get("pypi") or []
+        if configs.get("conda"):
+            print("[WARNING]: Conda packages cannot be exported to a wheelhouse")
+
+    # The wheels of this export are collected into a staging directory first,
+    # so that the requirements only pin them and not the stale wheels of
+    # earlier exports, which pip still reuses from the wheelhouse.
+    with tempfile.TemporaryDirectory(prefix=".pipper-export-", dir=directory) as stage:
+        pipper_names = resolve_pipper_wheels(env, package_ids, stage)
+        wheel_paths = [os.path.join(stage, name) for name in pipper_names]
+        download_wheels(stage, [*pypi_packages, *wheel_paths], directory)
+        wheel_names = [p.name for p in pathlib.Path(stage).glob("*.whl")]
+        for name in wheel_names:
+            os.replace(os.path.join(stage, name), os.path.join(directory, name))
+
+    path = write_requirements(directory, wheel_names)
+    print(f"[WHEELHOUSE]: {directory}")
+    print(f"[REQUIREMENTS]: {path}")
+    return path
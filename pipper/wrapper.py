@@ -1,12 +1,22 @@
+import compileall
+import csv
+import importlib.util
 import os
+import pathlib
+import site
 import subprocess
 import sys
+import sysconfig
+import typing
+from concurrent import futures
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import distributions
 from importlib.metadata import version as get_version
 
+from packaging.utils import canonicalize_name
 from packaging.version import parse as parse_version
 
+from pipper import tracing
 from pipper import versioning
 from pipper.environment import Environment
 
@@ -70,16 +80,32 @@ def status(env: Environment, package_name: str):
         raise
 
 
+def list_installed(env: Environment) -> dict[str, str]:
+    """
+    Returns the versions of all installed distributions by their canonical
+    names, which are read once instead of looking up each package separately.
+    """
+    path = [str(env.target_directory)] if env.target_directory else sys.path
+    return {
+        canonicalize_name(d.metadata["Name"]): d.version
+        for d in distributions(path=path)
+        if d.metadata["Name"]
+    }
+
+
+@tracing.traced("pip")
 def install_wheel(
     wheel_path: str,
     to_user: bool = False,
     target_directory: str | None = None,
     dry_run: bool = False,
     use_pip_legacy_resolver: bool = False,
+    compile_bytecode: bool = True,
 ):
     """
     Installs the specified wheel using the pip associated with the
-    executing python.
+    executing python. If compile_bytecode is False, pip will not compile
+    the installed python files.
     """
     cmd = [
         sys.executable,
@@ -91,6 +117,7 @@ def install_wheel(
     if use_pip_legacy_resolver:
         cmd.append("--use-deprecated=legacy-resolver")
 
+    cmd += [] if compile_bytecode else ["--no-compile"]
     cmd += ["--user"] if to_user else []
     cmd += [f"--target={clean_path(target_directory)}"] if target_directory else []
     print("[COMMAND]:\n", " ".join(cmd).replace(" --", "\n  --"))
@@ -102,15 +129,18 @@ def install_wheel(
         result.check_returncode()
 
 
+@tracing.traced("pip")
 def install_pypi(
     package_name: str,
     to_user: bool = False,
     target_directory: str | None = None,
     dry_run: bool = False,
     use_pip_legacy_resolver: bool = False,
+    compile_bytecode: bool = True,
 ):
     """
-    Installs the specified package from pypi using pip.
+    Installs the specified package from pypi using pip. If compile_bytecode
+    is False, pip will not compile the installed python files.
     """
     cmd = [
         sys.executable,
@@ -122,6 +152,7 @@ def install_pypi(
     if use_pip_legacy_resolver:
         cmd.append("--use-deprecated=legacy-resolver")
 
+    cmd += [] if compile_bytecode else ["--no-compile"]
     cmd += ["--user"] if to_user else []
     cmd += [f"--target={clean_path(target_directory)}"] if target_directory else []
     print("[COMMAND]:\n", " ".join(cmd).replace(" --", "\n  --"))
@@ -133,6 +164,137 @@ def install_pypi(
         result.check_returncode()
 
 
+def get_install_directories(
+    to_user: bool = False, target_directory: str | None = None
+) -> list[str]:
+    """
+    Returns the directories into which pip installs packages for the given
+    installation options.
+    """
+    if target_directory:
+        return [clean_path(target_directory)]
+    if to_user:
+        return [site.getusersitepackages()]
+
+    paths = [sysconfig.get_path("purelib"), sysconfig.get_path("platlib")]
+    return list(dict.fromkeys(p for p in paths if os.path.isdir(p)))
+
+
+def snapshot_records(directories: list[str]) -> dict[str, int]:
+    """
+    Returns the modification times of the RECORD files of the distributions
+    installed in the directories by their paths, which change whenever a
+    distribution is installed, upgraded or reinstalled.
+    """
+    return {
+        str(path): path.stat().st_mtime_ns
+        for directory in directories
+        for path in pathlib.Path(directory).glob("*.dist-info/RECORD")
+    }
+
+
+def list_installed_files(directories: list[str], snapshot: dict[str, int]) -> list[str]:
+    """
+    Lists the python files of the distributions that were installed in the
+    directories after the snapshot of their RECORD files was taken.
+
+    :param directories:
+        Directories into which the distributions were installed.
+    :param snapshot:
+        Modification times of the RECORD files by their paths before the
+        distributions were installed.
+    :return:
+        Sorted paths of the installed python files.
+    """
+    files = set()
+    for record, modified in snapshot_records(directories).items():
+        if snapshot.get(record) == modified:
+            continue
+        directory = pathlib.Path(record).parent.parent
+        with open(record, newline="") as f:
+            for row in csv.reader(f):
+                path = directory.joinpath(row[0]) if row else None
+                if path and path.suffix == ".py" and path.is_file():
+                    files.add(str(path.resolve()))
+    return sorted(files)
+
+
+def has_checked_bytecode(path: str, level: int) -> bool:
+    """
+    Whether or not the python file has bytecode for the optimization level
+    that is checked against the hash of its source, like the bytecode laid
+    down from a precompiled overlay, rather than against its modified time.
+    """
+    optimization = sys.flags.optimize if level < 0 else level
+    cache_path = importlib.util.cache_from_source(path, optimization=optimization or "")
+    try:
+        with open(cache_path, "rb") as f:
+            header = f.read(8)
+    except OSError:
+        return False
+    flags = int.from_bytes(header[4:], "little")
+    return header[:4] == importlib.util.MAGIC_NUMBER and flags == 0b11
+
+
+def _compile_file(path: str, levels: list[int]) -> bool:
+    """Compiles the python file for each of the optimization levels."""
+    # Multiple optimization levels are accepted since Python 3.9, which
+    # the type stubs do not reflect.
+    return compileall.compile_file(path, quiet=1, optimize=typing.cast(int, levels))
+
+
+@tracing.traced("compile")
+def compile_bytecode(
+    files: list[str],
+    workers: int = 0,
+    optimize: list[int] | None = None,
+    dry_run: bool = False,
+):
+    """
+    Compiles the python files into bytecode using multiple processes. Files
+    with up-to-date bytecode are skipped, as are optimization levels for
+    which a file already has hash-checked bytecode, which compileall would
+    otherwise replace with timestamp-checked bytecode.
+
+    :param files:
+        Paths of the python files to compile.
+    :param workers:
+        Number of worker processes to use. Zero uses all available cores.
+    :param optimize:
+        Optimization levels to compile, which default to the optimization level
+        of the executing interpreter.
+    :param dry_run:
+        Whether to just print what would have been compiled.
+    """
+    levels = optimize or [-1]
+    pending = {}
+    for path in files:
+        missing = [level for level in levels if not has_checked_bytecode(path, level)]
+        if missing:
+            pending[path] = missing
+
+    print(f"[COMPILE]: {len(pending)} files (optimize={levels}, workers={workers})")
+    if dry_run:
+        print("[DRY_RUN]: Skipped bytecode compilation.")
+        return
+    if not pending:
+        return
+
+    processes = workers or os.cpu_count() or 1
+    if processes == 1:
+        results = list(map(_compile_file, pending, pending.values()))
+    else:
+        with futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            chunksize = max(1, len(pending) // (4 * processes))
+            results = list(
+                executor.map(
+                    _compile_file, pending, pending.values(), chunksize=chunksize
+                )
+            )
+    if not all(results):
+        print("[WARNING]: Some installed files failed to compile.")
+
+
 def install_conda(
     package: str | dict,
     to_user: bool = False,